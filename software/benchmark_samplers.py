@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the variance-reduced bootstrap samplers.
+
+Every sampler repeats the gamma bootstrap of the 12 uM data `n_repeats`
+times with `size` replicates. The spread of the estimated percentiles (what
+the confidence intervals are made of) over the repeats is the Monte Carlo
+error of the bootstrap. "Equivalent size" is the number of ordinary
+replicates with the same error, with the range allowed by the finite number
+of repeats. The bootstrap mean is reported separately: balancing makes it
+almost exact by construction, which says nothing about the intervals.
+"""
+
+# Importing the packages
+from cat_analysis.modeling import *
+from cat_analysis.data_cleanup import *
+
+import time
+import numpy as np
+import pandas as pd
+
+
+# Reading in the tidy dataframe
+df_tidy = tidy_reader("data/tidy_mt_catastrophe.xlsx")
+
+# Extracting the data for 12uM conc
+data_12 = (df_tidy.loc[df_tidy["Concentration (uM)"] == 12, "Time to Catastrophe (s)"]).values
+
+# Benchmark settings
+sizes = [1000, 2500, 5000]
+n_repeats = 100
+percentiles = [2.5, 97.5]
+
+# Relative standard error of a standard deviation estimated from n_repeats
+rel_se = 1 / np.sqrt(2 * (n_repeats - 1))
+
+rows = []
+
+for size in sizes:
+    for sampler in ["ordinary", "balanced", "antithetic"]:
+
+        # Repeating the bootstrap
+        start = time.perf_counter()
+        estimates = []
+        for _ in range(n_repeats):
+            bs_reps = draw_bs_reps_gamma_suff(data_12, size = size, sampler = sampler)
+            estimates.append(np.concatenate((
+                np.percentile(bs_reps[:, :2], percentiles, axis = 0).ravel(),
+                np.mean(bs_reps[:, :2], axis = 0)
+                )))
+        elapsed = (time.perf_counter() - start) / n_repeats
+
+        # Monte Carlo error of every summary of alpha and beta
+        spread = np.std(estimates, axis = 0, ddof = 1)
+        rows.append([size, sampler, elapsed] + spread.tolist())
+
+columns = [
+    str(p) + "% " + param for p in percentiles for param in ["Alpha", "Beta"]
+    ] + ["Mean Alpha", "Mean Beta"]
+df_bench = pd.DataFrame(rows, columns = ["Size", "Sampler", "Seconds"] + columns)
+
+# Ordinary replicates needed for the same error, error ~ 1 / sqrt(size). Both
+# errors are estimated, so the ratio is only known to about 2 sqrt(2) rel_se
+for size in sizes:
+    ordinary = df_bench.loc[(df_bench["Size"] == size) & (df_bench["Sampler"] == "ordinary"),
+                            columns].values
+    inds = df_bench["Size"] == size
+    ratio = (ordinary / df_bench.loc[inds, columns].values)**2
+    for column, col_ratio in zip(columns, ratio.T):
+        df_bench.loc[inds, "Equivalent size, " + column] = size * col_ratio
+
+spread_range = (1 - 2 * np.sqrt(2) * rel_se)**2, (1 + 2 * np.sqrt(2) * rel_se)**2
+
+with pd.option_context("display.max_columns", None, "display.width", 200):
+    print(df_bench.round(6).to_string(index = False))
+
+print()
+print("With {0} repeats, an equivalent size between {1:.2f} and {2:.2f} times the "
+      "size is consistent with no gain.".format(n_repeats, *spread_range))
+
+# Summary over sizes for the percentiles only
+percentile_columns = ["Equivalent size, " + column for column in columns[:4]]
+for sampler in ["balanced", "antithetic"]:
+    inds = df_bench["Sampler"] == sampler
+    gain = df_bench.loc[inds, percentile_columns].values / df_bench.loc[inds, ["Size"]].values
+    print("{0}: percentile errors equal to those of {1:.2f} to {2:.2f} times as many "
+          "ordinary replicates.".format(sampler.capitalize(), gain.min(), gain.max()))
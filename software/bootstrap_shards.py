@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run a bootstrap in shards on several machines, then merge them.
+
+Every machine computes its replicate range and writes a result file:
+    python bootstrap_shards.py run --model gamma --size 10000 --shard 3/16 --out shard_03.npz
+
+Once all the files are gathered, they are combined into the DataFrame of
+the whole run (checking that no shard is missing or duplicated):
+    python bootstrap_shards.py merge shard_*.npz --out df_conc.csv
+"""
+
+# Importing the packages
+from cat_analysis.modeling import *
+from cat_analysis.data_cleanup import *
+
+import argparse
+import numpy as np
+
+
+# MLE functions selectable from the command line
+mle_functions = {
+    "gamma" : mle_iid_gamma,
+    "model" : mle_model,
+    }
+
+
+def run(args):
+
+    # Reading in the tidy dataframe
+    df_tidy = tidy_reader(args.data, compress = args.compress)
+
+    # Only one concentration for a bootstrap_aic run, all of them otherwise
+    if args.concentration is None:
+        data = df_tidy
+    else:
+        df_conc = df_tidy.loc[df_tidy["Concentration (uM)"] == args.concentration]
+        data = df_conc["Time to Catastrophe (s)"].values
+
+        # Expanding the distinct times of the compressed dataframe
+        if "Count" in df_conc.columns:
+            data = np.repeat(data, df_conc["Count"].values)
+
+    start, stop = bootstrap_shard(
+        mle_functions[args.model],
+        data,
+        size = args.size,
+        shard = args.shard,
+        path = args.out,
+        counter_seed = args.seed,
+        batch_size = args.batch_size,
+        sufficient_stats = args.sufficient_stats,
+        warm_start = args.warm_start,
+        on_failure = args.on_failure,
+        fitter = args.fitter
+        )
+
+    print("Replicates", start, "to", stop - 1, "written to", args.out)
+
+
+def merge(args):
+
+    df_mle = merge_shards(args.shards)
+    df_mle.to_csv(args.out, index = False)
+
+    print(len(df_mle), "replicates written to", args.out)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = __doc__,
+                                     formatter_class = argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    # Computing one shard
+    parser_run = commands.add_parser("run", help = "compute one shard")
+    parser_run.add_argument("--model", choices = list(mle_functions), default = "gamma")
+    parser_run.add_argument("--size", type = int, required = True,
+                            help = "number of replicates of the whole run")
+    parser_run.add_argument("--shard", required = True, help = "i/k, counting from 1")
+    parser_run.add_argument("--seed", type = int, default = 3252)
+    parser_run.add_argument("--out", required = True, help = "result file (.npz)")
+    parser_run.add_argument("--data", default = "data/tidy_mt_catastrophe.xlsx")
+    parser_run.add_argument("--concentration", type = int, default = None,
+                            help = "bootstrap_aic run of one concentration")
+    parser_run.add_argument("--batch-size", type = int, default = None)
+    parser_run.add_argument("--sufficient-stats", action = "store_true")
+    parser_run.add_argument("--warm-start", choices = ["mle", "mom"], default = None)
+    parser_run.add_argument("--on-failure", choices = ["raise", "retry", "nan"],
+                            default = "raise")
+    parser_run.add_argument("--fitter", choices = ["scalar", "batched"], default = "scalar")
+    parser_run.add_argument("--compress", action = "store_true",
+                            help = "read the tie-compressed data, the times sorted")
+    parser_run.set_defaults(func = run)
+
+    # Merging the shards
+    parser_merge = commands.add_parser("merge", help = "merge shard files")
+    parser_merge.add_argument("shards", nargs = "+")
+    parser_merge.add_argument("--out", required = True, help = "merged DataFrame (.csv)")
+    parser_merge.set_defaults(func = merge)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -5,6 +5,8 @@ Python package to analyze microtubule time to catastrophe
 from .modeling import *
 from .figure_plotter import *
 from .data_cleanup import *
+from .online import *
+from .results import *
 
 __author__ = "Pratyush Kandimalla (@KandimallaPrat)"
 __email__ = "pkandima@caltech.edu"
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chunked bootstrap runs and their checkpoints.
+
+A checkpoint is a .npz file holding the replicates of one or several 
+bootstraps, each with a description of its run and the state of the 
+module random number generator, so that an interrupted run can be resumed.
+"""
+
+# Importing required packages
+import numpy as np
+
+import warnings
+import tqdm
+
+import os
+import json
+import hashlib
+
+from . import samplers
+from .fitting import _collect_fits
+
+
+def _load_checkpoint(path):
+    """
+    Read all the bootstraps stored in a checkpoint file. Returns a 
+    dictionary {key : {"fits" : four lists like `_fit_block`, "meta" : dict}}.
+    """
+    
+    if not os.path.exists(path):
+        return {}
+    
+    runs = {}
+    
+    with np.load(path, allow_pickle = False) as saved:
+        
+        keys = json.loads(str(saved["keys"]))
+        
+        for i, key in enumerate(keys):
+            runs[key] = {
+                "fits" : [
+                    list(saved[str(i) + "_estimates"]),
+                    saved[str(i) + "_status"].tolist(),
+                    saved[str(i) + "_nfev"].tolist(),
+                    saved[str(i) + "_message"].tolist(),
+                    ],
+                "meta" : json.loads(str(saved[str(i) + "_meta"])),
+                }
+    
+    return runs
+
+
+def _save_checkpoint(path, key, fits, meta):
+    """
+    Store the replicates of one bootstrap in a checkpoint file, keeping the
+    other bootstraps stored in it. The file is replaced atomically, so an 
+    interruption while writing leaves the previous checkpoint intact.
+    """
+    
+    runs = _load_checkpoint(path)
+    runs[key] = {"fits" : fits, "meta" : meta}
+    
+    _save_runs(path, runs)
+
+
+def _save_runs(path, runs):
+    """
+    Write bootstraps {key : {"fits" : ..., "meta" : ...}} to a .npz file in
+    the format read by `_load_checkpoint`, replacing the file atomically.
+    """
+    
+    arrays = {"keys" : np.array(json.dumps(list(runs)))}
+    
+    for i, run in enumerate(runs.values()):
+        res_mles, diagnostics = _collect_fits(*run["fits"])
+        arrays[str(i) + "_estimates"] = res_mles
+        arrays[str(i) + "_status"] = diagnostics["status"]
+        arrays[str(i) + "_nfev"] = diagnostics["nfev"]
+        arrays[str(i) + "_message"] = np.array(diagnostics["message"], dtype = str)
+        arrays[str(i) + "_meta"] = np.array(json.dumps(run["meta"]))
+    
+    # Writing next to the checkpoint and swapping
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(path + ".tmp", path)
+
+
+def _checkpoint_meta(mle_fun, data, size, chunk_size, sampler, args = (), 
+                     warm_start = None, on_failure = "raise", fitter = "scalar"):
+    """
+    Description of a bootstrap run, used to make sure a checkpoint is only 
+    resumed by the same run. Everything that changes the replicates is 
+    recorded: the data, the resampling, the extra arguments of the MLE 
+    function (its method options), the starting points, the failure policy
+    and the fitter.
+    """
+    
+    data = np.ascontiguousarray(data, dtype = float)
+    
+    return {
+        "function" : mle_fun.__name__,
+        "size" : int(size),
+        "chunk_size" : int(chunk_size),
+        "sampler" : sampler,
+        "data_sha1" : hashlib.sha1(data.tobytes()).hexdigest(),
+        "args" : repr(tuple(args)),
+        "warm_start" : warm_start,
+        "on_failure" : on_failure,
+        "fitter" : fitter,
+        }
+
+
+def _run_chunks(run_chunk, size, chunk_size, progress_bar, meta, checkpoint = None,
+                checkpoint_key = "bootstrap", checkpoint_every = 1000, resume = False):
+    """
+    Run a bootstrap chunk by chunk on the module random number generator.
+    
+    `run_chunk(n_chunk)` computes the next `n_chunk` replicates and returns
+    the four lists of `_fit_block`. The completed replicates and the state
+    of the generator are written to `checkpoint` every `checkpoint_every`
+    replicates. With `resume`, a run continues from its checkpoint and gives
+    the same replicates as an uninterrupted run. On KeyboardInterrupt the 
+    replicates finished so far are saved and returned.
+    """
+    
+    fits = [[], [], [], []]
+    
+    # Picking up where a previous run stopped
+    if checkpoint is not None and resume:
+        saved = _load_checkpoint(checkpoint).get(checkpoint_key)
+        
+        if saved is not None:
+            saved_meta = {k : saved["meta"].get(k) for k in meta}
+            if saved_meta != meta:
+                raise ValueError("Checkpoint " + checkpoint_key + " in " + checkpoint 
+                                 + " was written by a different bootstrap.")
+            
+            fits = saved["fits"]
+            samplers.rg.bit_generator.state = saved["meta"]["rng_state"]
+    
+    n_done = len(fits[0])
+    n_saved = n_done
+    rng_state = samplers.rg.bit_generator.state
+    
+    # Whether or not to display the progress bar
+    if progress_bar:
+        pbar = tqdm.tqdm(total = size, initial = n_done)
+    
+    try:
+        while n_done < size:
+            
+            # Number of replicates in this chunk
+            n_chunk = min(chunk_size, size - n_done)
+            
+            chunk_fits = run_chunk(n_chunk)
+            for column, chunk_column in zip(fits, chunk_fits):
+                column.extend(chunk_column)
+            
+            n_done = n_done + n_chunk
+            rng_state = samplers.rg.bit_generator.state
+            
+            if progress_bar:
+                pbar.update(n_chunk)
+            
+            # Periodic checkpoint, and one at the end
+            if checkpoint is not None and (n_done - n_saved >= checkpoint_every 
+                                           or n_done == size):
+                _save_checkpoint(checkpoint, checkpoint_key, fits, 
+                                 dict(meta, rng_state = rng_state, n_done = n_done))
+                n_saved = n_done
+    
+    except KeyboardInterrupt:
+        
+        # Dropping the chunk that was cut off, and its random numbers
+        fits = [column[:n_done] for column in fits]
+        samplers.rg.bit_generator.state = rng_state
+        
+        if checkpoint is not None:
+            _save_checkpoint(checkpoint, checkpoint_key, fits, 
+                             dict(meta, rng_state = rng_state, n_done = n_done))
+        
+        warnings.warn("Bootstrap interrupted, returning the " + str(n_done) + " of " 
+                      + str(size) + " replicates completed.")
+    
+    finally:
+        if progress_bar:
+            pbar.close()
+    
+    return fits
@@ -8,8 +8,11 @@ Created on Thu Dec  3 23:43:29 2020
 
 # Importing required packages
 
+import numpy as np
 import pandas as pd
 
+import warnings
+
 
 def column_names(df):
     """
@@ -124,7 +127,7 @@ def data_cleanup(data_path, save_name, filetype = "csv"):
 # Since we have previously saved the Tidy DataFrame, we might just want to read
 # this in the future
 
-def tidy_reader(data_path):
+def tidy_reader(data_path, compress = False):
     """
     Function to read the tidy DataFrame
 
@@ -132,6 +135,11 @@ def tidy_reader(data_path):
     ----------
     data_path : STRING
         Path to the tidy xlsx file
+    
+    compress : BOOLEAN
+        Whether to return the tie-compressed DataFrame of `compress_tidy`
+        instead of one row per measurement.
+        Default : False
         
     Returns
     -------
@@ -141,7 +149,129 @@ def tidy_reader(data_path):
     
     df_tidy = pd.read_excel(data_path)
     
+    if compress:
+        return compress_tidy(df_tidy)
+    
     return df_tidy
+
+
+# The times to catastrophe are recorded at a coarse resolution, so every
+# concentration only has a few distinct values
+
+def compress_ties(data):
+    """
+    Function to compress a data set into its distinct values and how often
+    each of them appears.
+
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+
+    Returns
+    -------
+    values : numpy array
+        Sorted distinct values of the data.
+    
+    counts : numpy array
+        Number of times every value appears, summing to len(data).
+    """
+    
+    values, counts = np.unique(np.asarray(data), return_counts = True)
+    
+    return values, counts
+
+
+def compress_tidy(df_tidy):
+    """
+    Function to compress a tidy DataFrame into one row per distinct time to
+    catastrophe and concentration.
+
+    Parameters
+    ----------
+    df_tidy : Pandas DataFrame
+        Tidy DataFrame containing the data from the experiments
+
+    Returns
+    -------
+    df_compressed : Pandas DataFrame
+        DataFrame with the columns "Concentration (uM)", "Time to 
+        Catastrophe (s)" and "Count", sorted by concentration and time. The
+        values and counts of a concentration are the output of 
+        `compress_ties` on its times.
+    """
+    
+    df_compressed = (
+        df_tidy.groupby(["Concentration (uM)", "Time to Catastrophe (s)"])
+        .size()
+        .reset_index(name = "Count")
+        )
+    
+    return df_compressed
+
+
+# As the times are only known to the recording resolution, they can also be
+# treated as bins of that width
+
+def bin_times(data, bin_width, counts = None, tol = 1e-6):
+    """
+    Function to assign the times to catastrophe to bins of the recording 
+    resolution. Only the occupied bins are kept: every run of empty bins 
+    between two of them becomes a single gap with a count of 0, so the 
+    bins stay contiguous and the likelihoods evaluate the model at the 
+    edges of the occupied bins only.
+
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    bin_width : float
+        Resolution of the times, e.g. 5 for times recorded every 5 s. Bin k
+        holds the times rounded to k * bin_width, i.e. it spans
+        [(k - 1/2) * bin_width, (k + 1/2) * bin_width], starting at 0.
+    
+    counts : array, default None
+        Number of times every value of `data` appears, e.g. the output of
+        `compress_ties`. If None, every value is counted once.
+    
+    tol : float, default 1e-6
+        Largest distance to a multiple of `bin_width`, in units of 
+        `bin_width`, of a time on the grid. A warning is issued if some 
+        times are further off, they are then rounded to the closest bin.
+
+    Returns
+    -------
+    edges : numpy array
+        Edges of the contiguous occupied bins and gaps, from the lowest to
+        the highest occupied bin, one more than the number of bins.
+    
+    bin_counts : numpy array
+        Number of times in every bin, 0 for the gaps.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    counts = np.ones(len(data), dtype = int) if counts is None else np.asarray(counts)
+    
+    # Index of the closest multiple of the bin width
+    k = np.rint(data / bin_width)
+    
+    off_grid = np.abs(data / bin_width - k) > tol
+    if np.any(off_grid):
+        warnings.warn(str(np.sum(counts[off_grid])) + " of the times (e.g. " 
+                      + str(data[off_grid][0]) + ") are not multiples of " 
+                      + str(bin_width) + " and were rounded to the closest one.")
+    
+    k_occupied, inverse = np.unique(k.astype(int), return_inverse = True)
+    occupied_counts = np.bincount(inverse.ravel(), weights = counts).astype(int)
+    
+    # Edges of the occupied bins, a gap being left between non-adjacent ones
+    lower = (k_occupied - 0.5) * bin_width
+    edges = np.union1d(lower, lower + bin_width)
+    
+    bin_counts = np.zeros(len(edges) - 1, dtype = int)
+    bin_counts[np.searchsorted(edges, lower)] = occupied_counts
     
+    edges[0] = max(edges[0], 0)
     
-    
\ No newline at end of file
+    return edges, bin_counts
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitting of bootstrap replicates: calling an MLE function on every resample
+with its starting point and failure policy, and the chunk runners of the 
+samplers that feed it.
+
+The registries below are keyed by the name of the MLE function, so that 
+they also work for functions sent to a process pool. `modeling` fills in 
+the ones that refer to its functions.
+"""
+
+# Importing required packages
+import numpy as np
+
+import tqdm
+
+import os
+import concurrent.futures
+import inspect
+
+from . import samplers
+from .samplers import (draw_bs_indices, draw_bs_indices_counter, draw_bs_indices_balanced, 
+                       draw_bs_indices_antithetic, _counts_from_indices)
+
+
+# Batched counterparts of the MLE functions, used for blocks of replicates
+_batch_mle_functions = {}
+
+# Fits of blocks of count replicates from sufficient statistics, used for
+# `sufficient_stats`
+_sufficient_stats_fitters = {}
+
+# Optimizers to retry failed fits with
+_fallback_methods = {
+    "mle_iid_gamma" : "trust-exact",
+    "mle_model" : "trust-exact",
+    "mle_model_profile" : "trust-exact",
+    "mle_model_multistart" : "Powell",
+    "mle_iid_gamma_binned" : "Powell",
+    "mle_model_binned" : "Powell",
+    }
+
+# Method of moments estimates of the MLE functions, used for warm starts
+_mom_functions = {}
+
+
+def _has_full_output(mle_fun):
+    """
+    Whether an MLE function reports its own diagnostics through a 
+    `full_output` argument. Inspecting the signature costs about as much as
+    a gamma fit, so the bootstraps look it up once and pass it down.
+    """
+    
+    return "full_output" in inspect.signature(mle_fun).parameters
+
+
+def _call_mle(mle_fun, bs_sample, args, kwargs, full_output):
+    """
+    Call an MLE function and report (estimates, success, nfev, message).
+    Functions with a `full_output` argument (`full_output` True) hand over 
+    their OptimizeResult, for the others a RuntimeError is taken as a 
+    failed fit.
+    """
+    
+    try:
+        
+        # Our MLE functions report their own diagnostics
+        if full_output:
+            estimates, res = mle_fun(bs_sample, *args, full_output = True, **kwargs)
+            return estimates, bool(res.success), int(res.get("nfev", -1)), str(res.message)
+        
+        estimates = mle_fun(bs_sample, *args, **kwargs)
+    
+    except RuntimeError as error:
+        return None, False, -1, str(error.args[-1])
+    
+    return estimates, True, -1, ""
+
+
+def _fit_one(mle_fun, bs_sample, args, warm_start = None, x0 = None, on_failure = "raise",
+             full_output = False, counts = None):
+    """
+    Fit a single bootstrap sample, passing the starting point requested by
+    `warm_start` to the MLE function and handling a failed fit according to
+    `on_failure`. `full_output` is `_has_full_output(mle_fun)`. Returns 
+    (estimates, status, nfev, message), the estimates are None if the fit
+    failed. With `counts`, the sample is given as distinct values and their
+    counts.
+    """
+    
+    kwargs = {}
+    
+    # Same starting point for every replicate
+    if warm_start == "mle":
+        kwargs["x0"] = x0
+    
+    # Method of moments estimate of this replicate
+    elif warm_start == "mom":
+        kwargs["x0"] = _mom_functions[mle_fun.__name__](
+            bs_sample if counts is None else np.repeat(bs_sample, counts)
+            )
+    
+    if counts is not None:
+        kwargs["counts"] = counts
+    
+    estimates, success, nfev, message = _call_mle(mle_fun, bs_sample, args, kwargs, 
+                                                  full_output)
+    
+    if success:
+        return estimates, 0, nfev, message
+    
+    if on_failure == "raise":
+        raise RuntimeError('Convergence failed with message', message)
+    
+    # Second attempt with the fallback optimizer
+    if on_failure == "retry":
+        kwargs["method"] = _fallback_methods[mle_fun.__name__]
+        estimates, success, nfev_retry, message = _call_mle(mle_fun, bs_sample, args, kwargs,
+                                                            full_output)
+        nfev = nfev + nfev_retry
+        
+        if success:
+            return estimates, 2, nfev, message
+    
+    return None, 1, nfev, message
+
+
+def _fit_block(mle_fun, bs_block, args, warm_start = None, x0 = None, on_failure = "raise",
+               fitter = "scalar", full_output = None, counts = None):
+    """
+    Fit every row of a block of bootstrap samples. With `fitter` "batched"
+    the batched version of the MLE function fits the whole block at once, 
+    with "scalar" the rows are fit one by one with `mle_fun`, see 
+    `draw_bs_reps_mle`. `full_output` is `_has_full_output(mle_fun)`, 
+    looked up here if not given. Returns lists of estimates, status codes, 
+    nfev and messages.
+    
+    With `counts`, `bs_block` is a 1D array of distinct values and every 
+    row of the (size, number of values) `counts` is one sample. Both 
+    `mle_fun` and its batched version then have to take a `counts` 
+    argument, see `draw_bs_reps_compressed`.
+    """
+    
+    batch_fun = _batch_mle_functions.get(mle_fun.__name__) if fitter == "batched" else None
+    
+    if full_output is None:
+        full_output = _has_full_output(mle_fun)
+    
+    # Rows of the block, and the count keyword of each
+    if counts is None:
+        samples = [(bs_sample, {}) for bs_sample in bs_block]
+        batch_kwargs = {}
+    else:
+        samples = [(bs_block, {"counts" : row}) for row in counts]
+        batch_kwargs = {"counts" : counts}
+    
+    # Fitting all the rows at once, the batched fitters already start every
+    # row from its own closed-form estimate
+    if batch_fun is not None and len(args) == 0:
+    
+        res_mles, info = batch_fun(
+            bs_block,
+            x0 = x0 if warm_start == "mle" else None,
+            return_status = True,
+            **batch_kwargs
+            )
+        
+        fits = [
+            (estimates, 0, nfev, "Converged.")
+            for estimates, nfev in zip(res_mles, info["nfev"])
+            ]
+        
+        # Rows the batched fitter could not handle
+        for i in np.flatnonzero(~info["success"]):
+        
+            if on_failure == "raise":
+                raise RuntimeError('Convergence failed with message',
+                                   'No convergence of the batched fit.')
+            
+            if on_failure == "retry":
+                fits[i] = _fit_one(mle_fun, samples[i][0], args, warm_start, x0, "retry",
+                                   full_output, **samples[i][1])
+                
+                # Counting the batched attempt as the first one
+                if fits[i][1] == 0:
+                    fits[i] = (fits[i][0], 2) + fits[i][2:]
+            
+            else:
+                fits[i] = (None, 1, info["nfev"][i], "No convergence of the batched fit.")
+    
+    else:
+        fits = [
+            _fit_one(mle_fun, bs_sample, args, warm_start, x0, on_failure, full_output,
+                     **sample_kwargs)
+            for bs_sample, sample_kwargs in samples
+            ]
+    
+    return [list(column) for column in zip(*fits)]
+
+
+def _collect_fits(estimates, status, nfev, messages):
+    """
+    Stack the estimates of the replicates into an array, with NaN rows for
+    failed fits, and gather the diagnostics.
+    """
+    
+    # Width of a row from the successful fits
+    widths = [len(row) for row in estimates if row is not None]
+    width = widths[0] if len(widths) > 0 else 3
+    
+    res_mles = np.array([
+        np.full(width, np.nan) if row is None else np.asarray(row, dtype = float)
+        for row in estimates
+        ]).reshape(len(estimates), width)
+    
+    diagnostics = {
+        "status" : np.array(status, dtype = int),
+        "nfev" : np.array(nfev, dtype = int),
+        "message" : np.array(messages, dtype = object),
+        }
+    
+    return res_mles, diagnostics
+
+
+def _warm_start_x0(mle_fun, data, args, warm_start):
+    """
+    Starting point shared by all the replicates for `warm_start`.
+    """
+    
+    if warm_start is None:
+        return None
+    
+    if warm_start == "mle":
+        # Fitting the original data once, everything but the log likelihood
+        return np.asarray(mle_fun(data, *args)[:-1], dtype = float)
+    
+    if warm_start == "mom":
+        if mle_fun.__name__ not in _mom_functions:
+            raise ValueError("No method of moments estimate for " + mle_fun.__name__)
+        return None
+    
+    raise ValueError("warm_start must be None, 'mle' or 'mom'.")
+
+
+def _check_on_failure(mle_fun, on_failure):
+    """
+    Validate the failure policy of a bootstrap.
+    """
+    
+    if on_failure not in ("raise", "retry", "nan"):
+        raise ValueError("on_failure must be 'raise', 'retry' or 'nan'.")
+    
+    if on_failure == "retry" and mle_fun.__name__ not in _fallback_methods:
+        raise ValueError("No fallback optimizer for " + mle_fun.__name__)
+
+
+def _check_fitter(mle_fun, fitter, args = ()):
+    """
+    Validate the fitter of a bootstrap, see `draw_bs_reps_mle`.
+    """
+    
+    if fitter not in ("scalar", "batched"):
+        raise ValueError("fitter must be 'scalar' or 'batched'.")
+    
+    if fitter == "batched" and mle_fun.__name__ not in _batch_mle_functions:
+        raise ValueError("No batched version of " + mle_fun.__name__)
+    
+    if fitter == "batched" and len(args) > 0:
+        raise ValueError("The batched fitters do not take extra arguments.")
+
+
+def _check_n_jobs(n_jobs):
+    """
+    Validate a number of worker processes: None, a positive integer, or -1
+    for all the cores.
+    """
+    
+    if n_jobs is None or n_jobs == -1:
+        return
+    
+    if not isinstance(n_jobs, (int, np.integer)) or n_jobs < 1:
+        raise ValueError("n_jobs must be None, a positive integer or -1, got " 
+                         + repr(n_jobs))
+
+
+def _resample_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure, 
+                           fitter = "scalar"):
+    """
+    Return `run_chunk(n_chunk)`, which resamples `n_chunk` replicates of 
+    `data` as one index matrix and fits them with `_fit_block`.
+    """
+    
+    data = np.asarray(data)
+    n = len(data)
+    full_output = _has_full_output(mle_fun)
+    
+    def run_chunk(n_chunk):
+        
+        # Resampled data for the whole chunk
+        bs_block = data[draw_bs_indices(n, n_chunk)]
+        
+        # Feeding the rows to the MLE function
+        return _fit_block(mle_fun, bs_block, args, warm_start, x0, on_failure, fitter,
+                          full_output)
+    
+    return run_chunk
+
+
+def _bs_block_worker(mle_fun, data, args, seed_seq, n_reps, warm_start = None, x0 = None,
+                     on_failure = "raise", fitter = "scalar"):
+    """
+    Compute a block of bootstrap replicates with its own random number stream.
+    Module level so it can be sent to a process pool.
+    """
+    
+    # Independent generator for this block
+    rng = np.random.default_rng(seed_seq)
+    
+    # Resampled data for the whole block
+    bs_block = data[rng.integers(0, len(data), size = (n_reps, len(data)))]
+    
+    return _fit_block(mle_fun, bs_block, args, warm_start, x0, on_failure, fitter)
+
+
+def _fit_indices(mle_fun, data, inds, args, warm_start, x0, on_failure, 
+                 sufficient_stats = False, fitter = "scalar", full_output = None):
+    """
+    Fit the resamples data[inds] of a block of replicates. With 
+    `sufficient_stats`, the gamma model is fit from their counts instead.
+    """
+    
+    if sufficient_stats:
+        return _sufficient_stats_fitters[mle_fun.__name__](
+            data, _counts_from_indices(inds, len(data)), x0, on_failure
+            )
+    
+    return _fit_block(mle_fun, data[inds], args, warm_start, x0, on_failure, fitter,
+                      full_output)
+
+
+def _counter_block(mle_fun, data, args, counter_seed, labels, start, n_reps, 
+                   warm_start = None, x0 = None, on_failure = "raise", 
+                   sufficient_stats = False, fitter = "scalar"):
+    """
+    Compute the replicates start, ..., start + n_reps - 1 of a counter-based
+    bootstrap. Module level so it can be sent to a process pool.
+    """
+    
+    inds = draw_bs_indices_counter(len(data), counter_seed, 
+                                   range(start, start + n_reps), labels)
+    
+    return _fit_indices(mle_fun, data, inds, args, warm_start, x0, on_failure, 
+                        sufficient_stats, fitter)
+
+
+def _counter_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure, 
+                          counter_seed, labels, start = 0, sufficient_stats = False,
+                          fitter = "scalar"):
+    """
+    Return `run_chunk(n_chunk)`, which computes the next `n_chunk` replicates
+    of a counter-based bootstrap, starting from replicate `start`.
+    """
+    
+    data = np.asarray(data)
+    next_replicate = [start]
+    
+    def run_chunk(n_chunk):
+        fits = _counter_block(mle_fun, data, args, counter_seed, labels, 
+                              next_replicate[0], n_chunk, warm_start, x0, on_failure,
+                              sufficient_stats, fitter)
+        next_replicate[0] = next_replicate[0] + n_chunk
+        return fits
+    
+    return run_chunk
+
+
+def _sampler_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure, sampler, 
+                          size, sufficient_stats = False, fitter = "scalar"):
+    """
+    Return `run_chunk(n_chunk)`, which computes the next `n_chunk` replicates
+    of a balanced or antithetic bootstrap of `size` replicates. Antithetic 
+    pairs are rows 2k and 2k + 1 of the whole run, whatever the chunks.
+    """
+    
+    data = np.asarray(data)
+    n = len(data)
+    next_replicate = [0]
+    full_output = False if sufficient_stats else _has_full_output(mle_fun)
+    
+    if sampler == "antithetic" and size % 2 == 1:
+        raise ValueError("The antithetic sampler draws pairs of replicates, size must "
+                         "be even.")
+    
+    # Balancing is over the whole run, so all the indices are drawn up front
+    if sampler == "balanced":
+        all_inds = draw_bs_indices_balanced(n, size)
+    else:
+        order = np.argsort(data, kind = "stable")
+        
+        # Second member of a pair cut off by the end of the previous chunk
+        pending = [np.empty((0, n), dtype = int)]
+    
+    def run_chunk(n_chunk):
+        
+        start = next_replicate[0]
+        
+        if sampler == "balanced":
+            inds = all_inds[start : start + n_chunk]
+        else:
+            n_new = n_chunk - len(pending[0])
+            inds = np.concatenate((
+                pending[0], 
+                draw_bs_indices_antithetic(n, n_new + n_new % 2, order)
+                ))
+            pending[0] = inds[n_chunk :]
+            inds = inds[: n_chunk]
+        
+        next_replicate[0] = start + n_chunk
+        
+        return _fit_indices(mle_fun, data, inds, args, warm_start, x0, on_failure,
+                            sufficient_stats, fitter, full_output)
+    
+    return run_chunk
+
+
+def _draw_bs_reps_parallel(mle_fun, data, args, size, progress_bar, block_size,
+                           n_jobs, executor, seed, warm_start = None, x0 = None,
+                           on_failure = "raise", counter_seed = None, rng_labels = (),
+                           replicate_offset = 0, fitter = "scalar"):
+    """
+    Draw bootstrap replicates of the MLE in blocks spread over a process pool.
+    
+    Every block gets its own stream spawned from a `numpy.random.SeedSequence`,
+    or with `counter_seed` every replicate gets its own counter-based stream.
+    The blocks do not depend on the number of workers, so neither do the
+    results. Returns the same lists as `_fit_block`.
+    """
+    
+    data = np.asarray(data)
+    
+    # Splitting the replicates into blocks
+    starts = list(range(0, size, block_size))
+    n_reps = [min(block_size, size - start) for start in starts]
+    
+    # Arguments of the worker computing every block
+    if counter_seed is not None:
+        worker = _counter_block
+        block_args = [
+            (mle_fun, data, args, counter_seed, rng_labels, replicate_offset + start, 
+             n_block, warm_start, x0, on_failure, False, fitter)
+            for start, n_block in zip(starts, n_reps)
+            ]
+    
+    else:
+        
+        # Taking the entropy from the module generator keeps runs reproducible
+        if seed is None:
+            seed = int(samplers.rg.integers(2**63))
+        
+        seed_seqs = np.random.SeedSequence(seed).spawn(len(starts))
+        worker = _bs_block_worker
+        block_args = [
+            (mle_fun, data, args, seed_seq, n_block, warm_start, x0, on_failure, fitter)
+            for seed_seq, n_block in zip(seed_seqs, n_reps)
+            ]
+    
+    # Aggregate progress bar over all the workers
+    if progress_bar:
+        pbar = tqdm.tqdm(total = size)
+    
+    # Running in this process
+    if executor is None and n_jobs == 1:
+        blocks = []
+        for task, n_block in zip(block_args, n_reps):
+            blocks.append(worker(*task))
+            if progress_bar:
+                pbar.update(n_block)
+    
+    # Running on a process pool
+    else:
+    
+        # Pool owned by this call
+        own_executor = executor is None
+        if own_executor:
+            if n_jobs == -1:
+                n_jobs = os.cpu_count()
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers = n_jobs)
+        
+        try:
+            futures = {
+                executor.submit(worker, *task) : i
+                for i, task in enumerate(block_args)
+                }
+            
+            blocks = [None] * len(starts)
+            
+            # Collecting the blocks as they finish
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                blocks[i] = future.result()
+                if progress_bar:
+                    pbar.update(n_reps[i])
+        
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures = True)
+    
+    if progress_bar:
+        pbar.close()
+    
+    # Blocks are put back in their original order
+    fits = [[item for block in blocks for item in block[k]] for k in range(4)]
+    
+    return fits
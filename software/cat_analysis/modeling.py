@@ -25,41 +25,499 @@ import holoviews as hv
 import bokeh
 
 import os
+import sys
+import types
+import concurrent.futures
+import inspect
+import time
 
+from .results import BootstrapResult
+from . import samplers
+from .samplers import (draw_bs_sample, draw_bs_indices, replicate_rng, 
+                       draw_bs_indices_counter, draw_bs_indices_balanced, 
+                       draw_bs_indices_antithetic, draw_bs_counts, _check_sampler)
+from .fitting import (_batch_mle_functions, _sufficient_stats_fitters, 
+                      _fallback_methods, _mom_functions, _has_full_output, _fit_block, 
+                      _collect_fits, _warm_start_x0, _check_on_failure, _check_fitter, 
+                      _check_n_jobs, _resample_chunk_runner, _fit_indices, 
+                      _counter_block, _counter_chunk_runner, _sampler_chunk_runner, 
+                      _draw_bs_reps_parallel)
+from .checkpoint import _load_checkpoint, _save_runs, _checkpoint_meta, _run_chunks
 
-# Specifying random number generator
-global rg
 
-rg = np.random.default_rng(3252)
+# Specifying random number generator. There is a single one, 
+# `samplers.rg`, which `modeling.rg` reads and replaces, so that reseeding
+# it here reaches the samplers and the chunk runners as well
+class _ModelingModule(types.ModuleType):
     
+    @property
+    def rg(self):
+        return samplers.rg
     
-     
-def draw_bs_sample(data):
+    @rg.setter
+    def rg(self, value):
+        samplers.rg = value
+
+
+sys.modules[__name__].__class__ = _ModelingModule
+
+
+def draw_bs_reps_mle(mle_fun, data, args=(), size = 1, progress_bar = False,
+                     batch_size = None, n_jobs = None, executor = None, seed = None,
+                     warm_start = None, on_failure = "raise", return_diagnostics = False,
+                     checkpoint = None, checkpoint_every = 1000, resume = False,
+                     checkpoint_key = "bootstrap", counter_seed = None, rng_labels = (),
+                     replicate_offset = 0, sampler = "ordinary", fitter = "scalar"):
     """
-    Draw a bootstrap sample from a 1D data set.
+    Draw nonparametric bootstrap replicates of maximum likelihood estimator.
     
     Parameters
     ----------
-    data : array
-        1D array containing the data.
+    mle_fun : function
+        Function with call signature mle_fun(data, *args) that computes
+        a MLE for the parameters
+    
+    data : one-dimemsional Numpy array
+        Array of measurements
+    
+    args : tuple, default ()
+        Arguments to be passed to `mle_fun()`.
+    
+    size : int, default 1
+        Number of bootstrap replicates to draw.
+    
+    progress_bar : bool, default False
+        Whether or not to display progress bar.
+    
+    batch_size : int or None, default None
+        If given, the resampling indices are drawn as a (batch_size, n)
+        matrix in one call per chunk instead of one `draw_bs_sample` call
+        per replicate. This bounds the memory used by the index matrix 
+        while removing the per-replicate resampling overhead. The 
+        resamples are identical (and in the same order) to the default
+        path for a given seed. The chunks are fit with `fitter`, so 
+        `batch_size` does not change the estimates.
+    
+    n_jobs : int or None, default None
+        Number of worker processes. If given, the replicates are computed
+        in blocks of `batch_size` (default 100), each with an independent
+        random number stream spawned from a `numpy.random.SeedSequence`.
+        The output only depends on `seed` and `batch_size`, not on the
+        number of workers. -1 uses all the cores, 1 runs the blocks in
+        this process. `mle_fun` must be picklable (defined at module level).
+    
+    executor : concurrent.futures.Executor or None, default None
+        Executor to run the blocks on instead of creating a process pool.
+        Implies the blocked scheme described under `n_jobs`.
+    
+    seed : int or None, default None
+        Seed of the `SeedSequence` for the blocked scheme. If None, it is
+        drawn from the module random number generator.
+    
+    warm_start : None, "mle" or "mom", default None
+        Starting point of the optimizer for every replicate. None uses the
+        hard-coded guess of `mle_fun`. "mle" fits the original data once and
+        starts every replicate from that estimate. "mom" starts every
+        replicate from its own method of moments estimate (available for
+        `mle_iid_gamma` and `mle_model`). Both require `mle_fun` to accept
+        an `x0` keyword argument.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        What to do with a replicate whose fit does not converge. "raise"
+        stops the bootstrap with a RuntimeError. "nan" records the replicate
+        as a row of NaN. "retry" fits it again with a fallback optimizer
+        (trust-exact for `mle_iid_gamma` and `mle_model`) and records NaN
+        only if that fails as well.
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+    
+    checkpoint : string or None, default None
+        Path of a .npz file to which the completed replicates and the state
+        of the random number generator are saved periodically. Not 
+        available together with `n_jobs` / `executor`.
+    
+    checkpoint_every : int, default 1000
+        Minimum number of new replicates between two checkpoints.
+    
+    resume : bool, default False
+        If True and `checkpoint` holds replicates of this bootstrap, the run
+        continues from there. The result is identical to an uninterrupted 
+        run. A finished bootstrap is simply read back.
+    
+    checkpoint_key : string, default "bootstrap"
+        Name of the bootstrap inside the checkpoint file, so that several 
+        bootstraps can share one file.
+    
+    counter_seed : int or None, default None
+        If given, replicate k is resampled with its own counter-based 
+        generator `replicate_rng(counter_seed, k, rng_labels)` instead of
+        the module random number generator. The replicates then do not
+        depend on `batch_size`, `n_jobs` or on how the run is split, and 
+        any of them can be recomputed with `draw_bs_replicate`. Not 
+        available with `checkpoint`.
+    
+    rng_labels : tuple, default ()
+        Labels of the counter-based streams, e.g. (model, concentration),
+        see `replicate_rng`.
+    
+    replicate_offset : int, default 0
+        Index of the first replicate with `counter_seed`. Splitting a run
+        into pieces with consecutive offsets gives the replicates of the 
+        whole run.
+    
+    sampler : "ordinary", "balanced" or "antithetic", default "ordinary"
+        Resampling scheme. "balanced" uses every measurement exactly `size`
+        times over the whole run (`draw_bs_indices_balanced`, which holds
+        all the (size, n) indices in memory). It removes most of the Monte
+        Carlo error of the bootstrap mean and bias, but changes that of the
+        percentiles little. "antithetic" draws pairs of replicates (rows
+        2k and 2k + 1, so `size` must be even) with mirrored ranks 
+        (`draw_bs_indices_antithetic`), which only helps statistics 
+        increasing in the data such as the mean. It does not reduce the 
+        Monte Carlo error of the MLEs of this module, whose parameters are
+        not monotone in the data, see `benchmark_samplers.py`. Both are 
+        only available in this process without `counter_seed` or 
+        `checkpoint`. Replicates are fit `batch_size` (default 100) at a 
+        time.
+    
+    fitter : "scalar" or "batched", default "scalar"
+        How the replicates are fit, the same on every path. "scalar" calls
+        `mle_fun` on every replicate. "batched" fits whole chunks at once 
+        with the vectorized version of `mle_fun` (`mle_iid_gamma_batch` 
+        for `mle_iid_gamma`, `mle_model_batch` for `mle_model`), which is 
+        much faster. Both gamma fitters solve the same likelihood equation
+        and agree to rounding. `mle_model_batch` uses Levenberg-Marquardt 
+        steps instead of Powell and converges more tightly: on resamples 
+        of the catastrophe data Powell stops up to about 1 below its log
+        likelihood, so the story model estimates differ between the two.
+        Both return the rates ordered as beta1 <= beta2.
+
+    Returns
+    -------
+    output : numpy array
+        Bootstrap replicates of MLEs. If the run is stopped with Ctrl-C, 
+        only the replicates completed so far.
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True. Arrays with one entry
+        per replicate: "status" (0 converged, 1 failed and recorded as NaN,
+        2 converged with the fallback optimizer), "nfev" (number of function
+        evaluations, -1 if unknown) and "message" (optimizer message).
+    """
+    
+    _check_n_jobs(n_jobs)
+    _check_fitter(mle_fun, fitter, args)
+    _check_on_failure(mle_fun, on_failure)
+    
+    # Shared starting point of the replicates
+    x0 = _warm_start_x0(mle_fun, data, args, warm_start)
+    
+    # Looked up once rather than for every replicate
+    full_output = _has_full_output(mle_fun)
+    
+    parallel = n_jobs is not None or executor is not None
+    if parallel and checkpoint is not None:
+        raise ValueError("checkpoint is not available with n_jobs or executor.")
+    if counter_seed is not None and checkpoint is not None:
+        raise ValueError("checkpoint is not available with counter_seed.")
+    _check_sampler(sampler, counter_seed, parallel, checkpoint)
+    
+    # Blocked path with independent streams, possibly in parallel
+    if parallel:
+        fits = _draw_bs_reps_parallel(
+            mle_fun,
+            data,
+            args,
+            size,
+            progress_bar,
+            block_size = 100 if batch_size is None else batch_size,
+            n_jobs = 1 if n_jobs is None else n_jobs,
+            executor = executor,
+            seed = seed,
+            warm_start = warm_start,
+            x0 = x0,
+            on_failure = on_failure,
+            counter_seed = counter_seed,
+            rng_labels = rng_labels,
+            replicate_offset = replicate_offset,
+            fitter = fitter
+            )
+    
+    # Variance-reduced resampling schemes
+    elif sampler != "ordinary":
+        
+        run_chunk = _sampler_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure,
+                                          sampler, size, fitter = fitter)
+        
+        fits = _run_chunks(
+            run_chunk, size, 100 if batch_size is None else batch_size, progress_bar, 
+            meta = {}
+            )
+    
+    # Replicate-addressable streams, in this process
+    elif counter_seed is not None:
+        
+        run_chunk = _counter_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure,
+                                          counter_seed, rng_labels, replicate_offset,
+                                          fitter = fitter)
+        
+        fits = _run_chunks(
+            run_chunk, size, 100 if batch_size is None else batch_size, progress_bar, 
+            meta = {}
+            )
+    
+    # Default path, one bootstrap sample per replicate
+    elif batch_size is None:
+        
+        def run_chunk(n_chunk):
+            bs_block = np.array([draw_bs_sample(data) for _ in range(n_chunk)])
+            return _fit_block(mle_fun, bs_block, args, warm_start, x0, on_failure, fitter,
+                              full_output)
+        
+        fits = _run_chunks(
+            run_chunk, size, 1, progress_bar,
+            meta = _checkpoint_meta(mle_fun, data, size, 1, "resample", args, warm_start,
+                                    on_failure, fitter),
+            checkpoint = checkpoint,
+            checkpoint_key = checkpoint_key,
+            checkpoint_every = checkpoint_every,
+            resume = resume
+            )
+    
+    # Batched path, drawing the index matrix chunk by chunk
+    else:
+        data = np.asarray(data)
+        
+        run_chunk = _resample_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure,
+                                           fitter)
+        
+        fits = _run_chunks(
+            run_chunk, size, batch_size, progress_bar,
+            meta = _checkpoint_meta(mle_fun, data, size, batch_size, "resample", args, 
+                                    warm_start, on_failure, fitter),
+            checkpoint = checkpoint,
+            checkpoint_key = checkpoint_key,
+            checkpoint_every = checkpoint_every,
+            resume = resume
+            )
+    
+    res_mles, diagnostics = _collect_fits(*fits)
+    
+    if return_diagnostics:
+        return res_mles, diagnostics
+    
+    return res_mles
+
+
+
+def draw_bs_replicate(mle_fun, data, replicate, counter_seed, rng_labels = (), args=(),
+                      warm_start = None, on_failure = "raise", fitter = "scalar",
+                      sufficient_stats = False):
+    """
+    Recompute a single replicate of a counter-based bootstrap.
+    
+    The replicate is resampled from its own stream and fit exactly as the 
+    bootstrap fits it, so with the settings of the run the output equals
+    row `replicate` of the bootstrap.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        Function with call signature mle_fun(data, *args) that computes
+        a MLE for the parameters
+    
+    data : one-dimemsional Numpy array
+        Array of measurements
+    
+    replicate : int
+        Index of the replicate.
+    
+    counter_seed : int
+        `counter_seed` of the bootstrap.
+    
+    rng_labels : tuple, default ()
+        `rng_labels` of the bootstrap.
+    
+    args : tuple, default ()
+        Arguments to be passed to `mle_fun()`.
+    
+    warm_start, on_failure, fitter
+        Settings of the bootstrap, see `draw_bs_reps_mle`.
+    
+    sufficient_stats : bool, default False
+        Whether the bootstrap was `draw_bs_reps_gamma_suff`.
     
     Returns
     -------
-    bs : array
-        1D array containing the bootstrapped data.
+    bs_sample : numpy array
+        Resampled data of the replicate.
+    
+    output : numpy array
+        MLE of the resampled data, NaN if the fit failed and `on_failure`
+        is not "raise".
     """
     
+    data = np.asarray(data)
+    
+    _check_on_failure(mle_fun, on_failure)
+    _check_fitter(mle_fun, fitter, args)
+    
+    # Same starting point as the bootstrap
+    x0 = _warm_start_x0(mle_fun, data, args, warm_start)
+    
+    inds = draw_bs_indices_counter(len(data), counter_seed, [replicate], rng_labels)
+    bs_sample = data[inds[0]]
+    
+    fits = _counter_block(mle_fun, data, args, counter_seed, rng_labels, replicate, 1,
+                          warm_start, x0, on_failure, sufficient_stats, fitter)
+    
+    return bs_sample, _collect_fits(*fits)[0][0]
+
 
-    # Drawing a bootstrap replicate
-    bs = rg.choice(data, size = len(data))
+def _percentile_mc_se(bs_reps, percentiles):
+    """
+    Percentiles of the bootstrap replicates, column by column, with their
+    Monte Carlo standard errors and the bootstrap standard deviations.
+    
+    The standard error of the p-th sample quantile is estimated without 
+    assumptions on the distribution from the order statistics one binomial
+    standard deviation, sqrt(N p (1 - p)) ranks, below and above it. Rows
+    with failed fits (NaN) are left out.
+    """
+    
+    bs_reps = np.asarray(bs_reps, dtype = float)
+    bs_reps = bs_reps[np.all(np.isfinite(bs_reps), axis = 1)]
+    n = len(bs_reps)
+    
+    p = np.asarray(percentiles, dtype = float) / 100
+    
+    # Not enough replicates to say anything yet
+    if n < 2:
+        shape = (len(p), bs_reps.shape[1])
+        return np.full(shape, np.nan), np.full(shape, np.inf), np.full(shape[1], np.nan)
+    
+    values = np.percentile(bs_reps, 100 * p, axis = 0)
+    
+    # Order statistics one standard deviation of the rank away
+    half_width = np.sqrt(n * p * (1 - p))
+    lower = np.clip(np.floor(n * p - half_width).astype(int) - 1, 0, n - 1)
+    upper = np.clip(np.ceil(n * p + half_width).astype(int) - 1, 0, n - 1)
     
-    return bs
+    sorted_reps = np.sort(bs_reps, axis = 0)
+    mc_se = (sorted_reps[upper] - sorted_reps[lower]) / 2
+    
+    scale = np.std(bs_reps, axis = 0, ddof = 1)
+    
+    return values, mc_se, scale
 
 
-def draw_bs_reps_mle(mle_fun, data, args=(), size = 1, progress_bar = False):
+def _adaptive_bootstrap(draw_batch, max_size, batch_size, percentiles, tol, 
+                        max_time = None, progress_bar = False):
     """
-    Draw nonparametric bootstrap replicates of maximum likelihood estimator.
+    Draw bootstrap replicates batch by batch until the Monte Carlo standard
+    error of every requested percentile is at most `tol` times the bootstrap
+    standard deviation of its column, or the budget is exhausted.
+    
+    `draw_batch(n_batch, i)` returns the replicates and diagnostics of the
+    i-th batch. Returns the replicates, their diagnostics and the report
+    described in `draw_bs_reps_mle_adaptive`.
+    """
+    
+    if tol <= 0:
+        raise ValueError("tol must be positive.")
+    
+    bs_reps = []
+    diagnostics = []
+    n_done = 0
+    reason = "max_size"
+    start_time = time.perf_counter()
+    
+    # Whether or not to display the progress bar
+    if progress_bar:
+        pbar = tqdm.tqdm(total = max_size)
+    
+    try:
+        while n_done < max_size:
+            
+            # Number of replicates in this batch
+            n_batch = min(batch_size, max_size - n_done)
+            
+            batch_reps, batch_diagnostics = draw_batch(n_batch, len(bs_reps))
+            bs_reps.append(batch_reps)
+            diagnostics.append(batch_diagnostics)
+            n_done = n_done + len(batch_reps)
+            
+            if progress_bar:
+                pbar.update(len(batch_reps))
+            
+            # The batch was cut off with Ctrl-C
+            if len(batch_reps) < n_batch:
+                reason = "interrupted"
+                break
+            
+            values, mc_se, scale = _percentile_mc_se(np.concatenate(bs_reps), percentiles)
+            
+            if np.all(mc_se <= tol * scale):
+                reason = "tol"
+                break
+            
+            if max_time is not None and time.perf_counter() - start_time >= max_time:
+                reason = "max_time"
+                break
+    
+    finally:
+        if progress_bar:
+            pbar.close()
+    
+    bs_reps = np.concatenate(bs_reps)
+    diagnostics = {
+        key : np.concatenate([batch[key] for batch in diagnostics])
+        for key in diagnostics[0]
+        }
+    
+    # Precision actually achieved
+    values, mc_se, scale = _percentile_mc_se(bs_reps, percentiles)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        rel_mc_se = mc_se / scale
+    
+    report = {
+        "size" : len(bs_reps),
+        "percentiles" : np.asarray(percentiles, dtype = float),
+        "values" : values,
+        "mc_se" : mc_se,
+        "rel_mc_se" : rel_mc_se,
+        "tol" : tol,
+        "converged" : reason == "tol",
+        "reason" : reason,
+        "elapsed" : time.perf_counter() - start_time,
+        }
+    
+    if reason != "tol":
+        warnings.warn("Bootstrap stopped (" + reason + ") after " + str(len(bs_reps)) 
+                      + " replicates with a relative Monte Carlo standard error of "
+                      + str(np.nanmax(rel_mc_se)) + " > tol = " + str(tol) + ".")
+    
+    return bs_reps, diagnostics, report
 
+
+def draw_bs_reps_mle_adaptive(mle_fun, data, args=(), tol = 0.05, percentiles = (2.5, 97.5),
+                              max_size = 100000, max_time = None, batch_size = 1000, 
+                              progress_bar = False, n_jobs = None, executor = None, 
+                              seed = None, warm_start = None, on_failure = "raise", 
+                              return_diagnostics = False, counter_seed = None, 
+                              rng_labels = (), fitter = "scalar"):
+    """
+    Draw nonparametric bootstrap replicates of maximum likelihood estimator
+    until the requested percentiles are precise enough.
+    
+    The replicates are drawn in batches with `draw_bs_reps_mle`. After every
+    batch, the Monte Carlo standard error of each requested percentile of 
+    each column is estimated from the order statistics, and the bootstrap 
+    stops once all of them are at most `tol` times the bootstrap standard 
+    deviation of their column, or when `max_size` replicates were drawn or
+    `max_time` seconds have passed.
+    
     Parameters
     ----------
     mle_fun : function
@@ -72,31 +530,87 @@ def draw_bs_reps_mle(mle_fun, data, args=(), size = 1, progress_bar = False):
     args : tuple, default ()
         Arguments to be passed to `mle_fun()`.
     
-    size : int, default 1
-        Number of bootstrap replicates to draw.
+    tol : float, default 0.05
+        Target Monte Carlo standard error of the percentiles, relative to
+        the bootstrap standard deviation of the estimates.
+    
+    percentiles : array_like, default (2.5, 97.5)
+        Percentiles (between 0 and 100) whose precision is tracked, e.g. the
+        bounds of the confidence interval to report.
+    
+    max_size : int, default 100000
+        Maximum number of bootstrap replicates.
+    
+    max_time : float or None, default None
+        Time budget in seconds. Checked after every batch, so a run can 
+        overshoot it by up to one batch.
+    
+    batch_size : int, default 1000
+        Number of replicates between two precision checks. Also passed to
+        `draw_bs_reps_mle`.
     
     progress_bar : bool, default False
         Whether or not to display progress bar.
-
+    
+    n_jobs, executor, seed, warm_start, on_failure, fitter
+        See `draw_bs_reps_mle`. With a `seed`, batch i uses the seed 
+        sequence [seed, i].
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+    
+    counter_seed, rng_labels
+        Counter-based random number streams, see `draw_bs_reps_mle`. The 
+        replicates are then those of a fixed-size run with the same seed.
+    
     Returns
     -------
     output : numpy array
         Bootstrap replicates of MLEs.
+    
+    report : dict
+        Precision achieved: "size" (number of replicates), "percentiles",
+        "values" (the percentiles, one row per percentile and one column 
+        per estimate), "mc_se" (their Monte Carlo standard errors), 
+        "rel_mc_se" (relative to the bootstrap standard deviations), "tol",
+        "converged", "reason" ("tol", "max_size", "max_time" or 
+        "interrupted") and "elapsed" (seconds).
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True, see `draw_bs_reps_mle`.
     """
     
-    # Whether or not to display the progress bar
-    if progress_bar:
-        iterator = tqdm.tqdm(range(size))
-    else:
-        iterator = range(size)
-        
-    res_mles = np.array([mle_fun(draw_bs_sample(data), *args) for _ in iterator])
-
-    return res_mles
+    def draw_batch(n_batch, i):
+        return draw_bs_reps_mle(
+            mle_fun,
+            data,
+            args,
+            size = n_batch,
+            batch_size = batch_size,
+            n_jobs = n_jobs,
+            executor = executor,
+            seed = None if seed is None else [seed, i],
+            warm_start = warm_start,
+            on_failure = on_failure,
+            return_diagnostics = True,
+            counter_seed = counter_seed,
+            rng_labels = rng_labels,
+            replicate_offset = i * batch_size,
+            fitter = fitter
+            )
+    
+    res_mles, diagnostics, report = _adaptive_bootstrap(
+        draw_batch, max_size, batch_size, percentiles, tol, max_time, progress_bar
+        )
+    
+    if return_diagnostics:
+        return res_mles, report, diagnostics
+    
+    return res_mles, report
 
 
 
-def log_likelihood_gamma(data, params):
+def log_likelihood_gamma(data, params, counts = None):
     """
     Calculate the log likelihood for gamma distribution given the parameter values.
     
@@ -109,6 +623,11 @@ def log_likelihood_gamma(data, params):
     data : array 
         numpy array containing the data values
     
+    counts : array, default None
+        Number of times every value of `data` appears, e.g. the output of 
+        `compress_ties`, so the log density is evaluated once per distinct
+        value. If None, every value is counted once.
+    
     
     Returns 
     -------
@@ -128,117 +647,91 @@ def log_likelihood_gamma(data, params):
         return -np.inf
     
     # Otherwise calculating the log likelihood
-    log_likelihood = np.sum(scipy.stats.gamma.logpdf(data, alpha, loc = 0, scale = 1 / beta))
+    log_pdf = scipy.stats.gamma.logpdf(data, alpha, loc = 0, scale = 1 / beta)
+    
+    if counts is None:
+        log_likelihood = np.sum(log_pdf)
+    else:
+        log_likelihood = np.sum(counts * log_pdf)
     
     return log_likelihood
 
 
 
 
-def mle_iid_gamma(data):
+def log_likelihood_gamma_score(data, params):
     """
-    Function to calculate the MLE values (and log likelihood) for the parameter. 
+    Calculate the gradient of `log_likelihood_gamma` with respect to the
+    parameters.
     
     Parameters
     ----------
-    data : array
-        Array containing the data.
+    data : array 
+        numpy array containing the data values
     
-    Returns
+    params : tuple of floats 
+        Format (alpha, beta)
+        Tuple containing the parameter values
+    
+    Returns 
     -------
-    return_array : array 
-        Array containing [0, 3] arrays of the MLE values for the parameters from each 
-        bootstrap sample and the log likelihood.
-        
+    score : array
+        [d/d alpha, d/d beta] of the log likelihood.
     """
-    # Warnings
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-
-        # scipy minimize function on the negative log likelihood
-        # which we previously defined
-        res = scipy.optimize.minimize(
-            fun = lambda params, data: -log_likelihood_gamma(data, params),
-
-            # Guess values
-            x0 = np.array([2.5, 0.01]),
-            args = (data),
-            method = 'Powell'
-        )
-
-    # If it converges
-    if res.success:
-        alpha_mle, beta_mle = res.x
-        log_likelihood = -res.fun
-        
-        
-        return_array = alpha_mle, beta_mle, log_likelihood
-        
-        return return_array
-
-    # If it does not converge
-    else:
-        raise RuntimeError('Convergence failed with message', res.message)   
-
-
-
+    
+    _, grad, _ = _gamma_derivs(np.atleast_2d(params), gamma_sufficient_stats(data))
+    
+    return grad[0]
 
 
-def model_log_likelihood(params, data):
+def log_likelihood_gamma_hessian(data, params):
     """
-    Function to determine the log likelihood of the data given the parameters of the model.
+    Calculate the Hessian of `log_likelihood_gamma` with respect to the
+    parameters.
     
     Parameters
     ----------
-    params : tuple of floats 
-        Format (alpha, beta)
-        Tuple containing the parameter values
-    
     data : array 
         numpy array containing the data values
     
+    params : tuple of floats 
+        Format (alpha, beta)
+        Tuple containing the parameter values
     
     Returns 
     -------
-    model_log_likelihood : float
-        Value of the log likelihood for the model given the parameter values.
-        
+    hessian : array
+        2x2 array of second derivatives of the log likelihood.
     """
     
-    # First extracting the individual parameter values
-    beta1, beta2 = params   
-    
-    # Setting constrains on the alpha and beta 
-    # They cannot be zero
-    # They cannot be equal to each other (due to subtraction in the denominator)
-    if beta1 <= 0 or beta2 <= 0 or beta1 == beta2:
-        
-        # return negative infinity if either is zero
-        return -np.inf
-    
-    # Writing out the terms of the model
-    term_1 = (beta1 * beta2) / (beta2 - beta1)
-    
-    term_2 = np.exp(-beta1 * data) - np.exp(-beta2 * data)
+    _, _, hess = _gamma_derivs(np.atleast_2d(params), gamma_sufficient_stats(data))
     
-    # Calculating the log of the model
-    log_terms = np.log(term_1 * term_2)
-    
-    # Calculating the log likelihood
-    model_log_likelihood = np.sum(log_terms)
-    
-    return model_log_likelihood
+    return hess[0]
 
 
-def mle_model(data):
+def mle_iid_gamma(data, method = "newton", x0 = None, full_output = False, counts = None):
     """
-    Function to calculate the MLE values for the parameter. 
+    Function to calculate the MLE values (and log likelihood) for the parameter. 
     
     Parameters
     ----------
     data : array
         Array containing the data.
     
+    method : string, default "newton"
+        Optimizer, see `mle_iid_gamma_suff`.
+    
+    x0 : tuple of floats, default None
+        Starting point (alpha, beta), see `mle_iid_gamma_suff`.
+    
+    full_output : bool, default False
+        If True, also return the OptimizeResult instead of raising on 
+        failure, see `mle_iid_gamma_suff`.
+    
+    counts : array, default None
+        Number of times every value of `data` appears, see 
+        `log_likelihood_gamma`.
+    
     Returns
     -------
     return_array : array 
@@ -246,66 +739,2718 @@ def mle_model(data):
         bootstrap sample and the log likelihood.
         
     """
-    # Warnings
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-
-        # scipy minimize function on the negative log likelihood
-        # which we previously defined
-        res = scipy.optimize.minimize(
-            fun = lambda params, data: -model_log_likelihood(params, data),
-
-            # Guess values
-            x0 = np.array([0.005, 0.004]),
-            args = (data),
-            method = 'Powell'
+    
+    # The gamma likelihood only depends on the sufficient statistics
+    return_array = mle_iid_gamma_suff(
+        gamma_sufficient_stats(data, counts), 
+        method = method, 
+        x0 = x0, 
+        full_output = full_output
         )
+    
+    return return_array
 
-    # If it converges
-    if res.success:
-        beta1_mle, beta2_mle = res.x
-        log_likelihood = -res.fun
-        
-        
-        return_array = [beta1_mle, beta2_mle, log_likelihood]
-        
-        return return_array
 
-    # If it does not converge
-    else:
-        raise RuntimeError('Convergence failed with message', res.message)   
 
 
 
-def akaike_information_criterion(log_likelihood, num_params):
+def gamma_sufficient_stats(data, counts = None):
     """
-    Calculate the Akaike Information Criterion for a log-likelihood for a given number of parameters.
+    Calculate the sufficient statistics of the gamma likelihood.
     
     Parameters
     ----------
-    log_likelihood : float 
-        log-likelihood evaluated for a particular set of parameter values
-        
-    num_params : int
-        Number of parameters in the model.
+    data : array
+        1D array containing the data.
+    
+    counts : array, default None
+        Multiplicity of every data point. Either 1D with the same length as
+        the data, or 2D with one row of counts per bootstrap replicate.
+        If None, every data point is counted once.
     
     Returns
     -------
-    akaike_information_criterion : float
-        The Akaike Information Criterion
-        
-        Calculated as:
-        
-        ((log-likelihood) * (- 2)) + (2 * num_params)
+    suff_stats : array
+        Array in the format [n, sum(x), sum(log x)]. If `counts` is 2D the
+        output is a (size, 3) array with one row per replicate.
     """
     
-    aic = ((log_likelihood) * (- 2)) + (2 * num_params)
+    data = np.asarray(data, dtype = float)
     
-    return aic
-
+    # The statistics are linear in the counts
+    stat_matrix = np.column_stack([np.ones_like(data), data, np.log(data)])
+    
+    # Every data point counted once
+    if counts is None:
+        return stat_matrix.sum(axis = 0)
+    
+    # Single counts-by-stats matrix product
+    suff_stats = np.asarray(counts) @ stat_matrix
+    
+    return suff_stats
+
+
+def log_likelihood_gamma_suff(suff_stats, params):
+    """
+    Calculate the log likelihood for gamma distribution from the sufficient 
+    statistics of the data.
+    
+    Parameters
+    ----------
+    suff_stats : array
+        Format [n, sum(x), sum(log x)], as returned by `gamma_sufficient_stats`.
+    
+    params : tuple of floats 
+        Format (alpha, beta)
+        Tuple containing the parameter values
+    
+    Returns 
+    -------
+    log_likelihood : float
+        Value of the log likelihood for the gamma distribution given the 
+        parameter values. Identical to `log_likelihood_gamma` on the data.
+    """
+    
+    # First extracting the individual parameter values
+    alpha, beta = params 
+    n, sum_x, sum_log_x = suff_stats
+    
+    # They cannot be zero
+    if alpha <= 0 or beta <= 0:
+        
+        # return negative infinity if either is zero
+        return -np.inf
+    
+    # Gamma log likelihood written in terms of the sufficient statistics
+    log_likelihood = (
+        n * (alpha * np.log(beta) - scipy.special.gammaln(alpha))
+        + (alpha - 1) * sum_log_x
+        - beta * sum_x
+        )
+    
+    return log_likelihood
+
+
+def _gamma_derivs(params, suff_stats):
+    """
+    Gamma log likelihood with its gradient and Hessian with respect to 
+    (alpha, beta), for (size, 2) parameters and sufficient statistics in the
+    format [n, sum(x), sum(log x)].
+    """
+    
+    alpha, beta = params[:, 0], params[:, 1]
+    n, sum_x, sum_log_x = np.asarray(suff_stats, dtype = float).T
+    
+    log_likelihood = (
+        n * (alpha * np.log(beta) - scipy.special.gammaln(alpha))
+        + (alpha - 1) * sum_log_x
+        - beta * sum_x
+        )
+    
+    grad = np.column_stack([
+        n * (np.log(beta) - scipy.special.digamma(alpha)) + sum_log_x,
+        n * alpha / beta - sum_x
+        ])
+    
+    hess = np.empty((len(params), 2, 2))
+    hess[:, 0, 0] = -n * scipy.special.polygamma(1, alpha)
+    hess[:, 0, 1] = n / beta
+    hess[:, 1, 0] = n / beta
+    hess[:, 1, 1] = -n * alpha / beta**2
+    
+    return log_likelihood, grad, hess
+
+
+# Optimizers that use no derivatives, and the ones that use the Hessian
+_derivative_free_methods = ("Nelder-Mead", "Powell", "COBYLA")
+_hessian_methods = ("trust-exact", "trust-krylov", "trust-ncg", "trust-constr",
+                    "Newton-CG", "dogleg")
+
+
+def _minimize_log_space(derivs, x0, method):
+    """
+    Minimize a negative log likelihood over the logs of its parameters with
+    `scipy.optimize.minimize`, handing over the analytic gradient and Hessian
+    to the methods that use them.
+    
+    `derivs` maps (1, 2) parameters to the log likelihood, gradient and 
+    Hessian. The returned OptimizeResult has `x` back in parameter space 
+    and `fun` is the negative log likelihood.
+    """
+    
+    # The three quantities come from one evaluation, keeping the last one
+    cache = {}
+    
+    def evaluate(log_params):
+        key = tuple(log_params)
+        if key not in cache:
+            params = np.exp(log_params)[None, :]
+            log_likelihood, grad, hess = derivs(params)
+            grad, hess = _log_space_derivs(params, grad, hess)
+            cache.clear()
+            cache[key] = -log_likelihood[0], -grad[0], -hess[0]
+        return cache[key]
+    
+    options = {}
+    if method not in _derivative_free_methods:
+        options["jac"] = lambda log_params: evaluate(log_params)[1]
+    if method in _hessian_methods:
+        options["hess"] = lambda log_params: evaluate(log_params)[2]
+    
+    # Warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        
+        res = scipy.optimize.minimize(
+            fun = lambda log_params: evaluate(log_params)[0],
+            x0 = np.log(x0),
+            method = method,
+            **options
+        )
+    
+    res.x = np.exp(res.x)
+    
+    return res
+
+
+def _gamma_alpha_start(s):
+    """
+    Minka's closed-form approximation of the gamma MLE of alpha, given
+    s = log(mean(x)) - mean(log x). Works elementwise on arrays.
+    """
+    
+    return (3 - s + np.sqrt((s - 3)**2 + 24 * s)) / (12 * s)
+
+
+def _gamma_newton_step(alpha, s):
+    """
+    One generalized Newton step (on 1 / alpha) for the equation 
+    log(alpha) - digamma(alpha) = s. Works elementwise on arrays.
+    """
+    
+    f = np.log(alpha) - scipy.special.digamma(alpha) - s
+    f_prime = 1 / alpha - scipy.special.polygamma(1, alpha)
+    
+    return 1 / (1 / alpha + f / (alpha**2 * f_prime))
+
+
+def mle_iid_gamma_suff(suff_stats, tol = 1e-12, max_iter = 50, method = "newton",
+                       x0 = None, full_output = False):
+    """
+    Function to calculate the MLE values (and log likelihood) for the gamma 
+    parameters from the sufficient statistics of the data.
+    
+    The gamma MLE satisfies beta = alpha / mean(x), which leaves the one 
+    dimensional equation
+    
+        log(alpha) - digamma(alpha) = log(mean(x)) - mean(log x)
+    
+    for alpha. It is solved with Minka's closed-form starting point and 
+    generalized Newton steps using the trigamma function, which converge 
+    in a handful of iterations.
+    
+    Parameters
+    ----------
+    suff_stats : array
+        Format [n, sum(x), sum(log x)], as returned by `gamma_sufficient_stats`.
+    
+    tol : float, default 1e-12
+        Relative tolerance on alpha to stop the Newton iterations.
+    
+    max_iter : int, default 50
+        Maximum number of Newton iterations.
+    
+    method : string, default "newton"
+        "newton" for the dedicated solver above. Any other value is passed
+        to `scipy.optimize.minimize` (e.g. "trust-exact", "L-BFGS-B"), 
+        which then works on (log alpha, log beta) with the analytic 
+        gradient and Hessian.
+    
+    x0 : tuple of floats, default None
+        Starting point (alpha, beta). If None, the Newton solver starts from
+        Minka's approximation and the other optimizers from (2.5, 0.01). 
+        The Newton solver only uses alpha, since beta follows from it.
+    
+    full_output : bool, default False
+        If True, a failed fit does not raise an error and the 
+        `scipy.optimize.OptimizeResult` of the fit (with `success`, `nfev` 
+        and `message`) is returned as well.
+    
+    Returns
+    -------
+    return_array : tuple
+        (alpha, beta, log likelihood), same as `mle_iid_gamma`.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+    """
+    
+    # General purpose optimizer
+    if method != "newton":
+        
+        res = _minimize_log_space(
+            lambda params: _gamma_derivs(params, suff_stats),
+            x0 = np.array([2.5, 0.01]) if x0 is None else np.asarray(x0, dtype = float),
+            method = method
+            )
+    
+    else:
+        res = _gamma_newton(suff_stats, tol, max_iter, x0)
+    
+    # If it does not converge
+    if not res.success and not full_output:
+        raise RuntimeError('Convergence failed with message', res.message)
+    
+    alpha_mle, beta_mle = res.x
+    log_likelihood = -res.fun
+    
+    return_array = alpha_mle, beta_mle, log_likelihood
+    
+    if full_output:
+        return return_array, res
+    
+    return return_array
+
+
+def _gamma_newton(suff_stats, tol, max_iter, x0):
+    """
+    Newton solver of `mle_iid_gamma_suff`, reporting like scipy's optimizers.
+    """
+    
+    n, sum_x, sum_log_x = suff_stats
+    
+    # Right hand side of the equation for alpha
+    mean_x = sum_x / n
+    s = np.log(mean_x) - sum_log_x / n
+    
+    # s is zero only if all the data are equal, then there is no finite MLE
+    if not s > 0:
+        return scipy.optimize.OptimizeResult(
+            x = np.array([np.nan, np.nan]), fun = np.nan, success = False, 
+            status = 2, nfev = 0, nit = 0,
+            message = 'Data have no spread, the gamma MLE does not exist.'
+            )
+    
+    # Minka's approximate solution as the starting point
+    if x0 is None:
+        alpha = _gamma_alpha_start(s)
+    else:
+        alpha = x0[0]
+    
+    for nit in range(1, max_iter + 1):
+        
+        alpha_new = _gamma_newton_step(alpha, s)
+        
+        # Checking for convergence
+        converged = abs(alpha_new - alpha) <= tol * alpha_new
+        alpha = alpha_new
+        
+        if converged:
+            break
+    
+    beta = alpha / mean_x
+    
+    return scipy.optimize.OptimizeResult(
+        x = np.array([alpha, beta]),
+        fun = -log_likelihood_gamma_suff(suff_stats, (alpha, beta)),
+        success = bool(converged), 
+        status = 0 if converged else 1,
+        nfev = nit,
+        nit = nit,
+        message = ('Converged.' if converged 
+                   else 'Maximum number of Newton iterations reached.')
+        )
+
+
+def mle_iid_gamma_suff_batch(suff_stats, tol = 1e-12, max_iter = 50, x0 = None,
+                             return_status = False):
+    """
+    Function to calculate the gamma MLE values (and log likelihood) for many
+    data sets at once from their sufficient statistics.
+    
+    The Newton iterations of `mle_iid_gamma_suff` run vectorized over all the
+    rows. Rows that have converged are masked out and no longer updated, so
+    every row gets exactly the iterations it would have had on its own.
+    
+    Parameters
+    ----------
+    suff_stats : array
+        (size, 3) array, every row in the format [n, sum(x), sum(log x)].
+    
+    tol : float, default 1e-12
+        Relative tolerance on alpha to stop the Newton iterations.
+    
+    max_iter : int, default 50
+        Maximum number of Newton iterations.
+    
+    x0 : array, default None
+        Starting point (alpha, beta), either shared by all the rows or one
+        per row. If None, every row starts from Minka's approximation.
+    
+    return_status : bool, default False
+        If True, data sets that fail do not raise an error (their row is 
+        NaN) and a dictionary of per-row diagnostics is returned as well.
+    
+    Returns
+    -------
+    return_array : array
+        (size, 3) array with the columns alpha, beta and log likelihood, in
+        the same layout as the output of `draw_bs_reps_mle`.
+    
+    info : dict
+        Only returned if `return_status` is True. "success" is a boolean 
+        array of convergence flags and "nfev" the number of Newton 
+        iterations of every row.
+    """
+    
+    suff_stats = np.atleast_2d(np.asarray(suff_stats, dtype = float))
+    n, sum_x, sum_log_x = suff_stats.T
+    
+    # Right hand side of the equation for alpha
+    mean_x = sum_x / n
+    s = np.log(mean_x) - sum_log_x / n
+    
+    # s is zero only if all the data are equal, then there is no finite MLE
+    has_spread = s > 0
+    if not has_spread.all() and not return_status:
+        raise RuntimeError('Convergence failed with message', 
+                           'Data have no spread, the gamma MLE does not exist.')
+    
+    # Minka's approximate solution as the starting point
+    if x0 is None:
+        alpha = _gamma_alpha_start(np.where(has_spread, s, np.nan))
+    else:
+        alpha = np.broadcast_to(np.asarray(x0, dtype = float), (len(s), 2))[:, 0].copy()
+    
+    # Rows still being iterated
+    active = has_spread.copy()
+    nfev = np.zeros(len(alpha), dtype = int)
+    
+    for _ in range(max_iter):
+        
+        if not active.any():
+            break
+        
+        alpha_new = _gamma_newton_step(alpha[active], s[active])
+        nfev[active] += 1
+        
+        # Checking for convergence of the active rows
+        converged = np.abs(alpha_new - alpha[active]) <= tol * alpha_new
+        alpha[active] = alpha_new
+        active[active] = ~converged
+    
+    success = has_spread & ~active
+    
+    # If some rows do not converge
+    if not return_status and not success.all():
+        raise RuntimeError('Convergence failed with message', 
+                           'Maximum number of Newton iterations reached for '
+                           + str((~success).sum()) + ' data sets.')
+    
+    alpha[~success] = np.nan
+    beta = alpha / mean_x
+    
+    # Gamma log likelihood written in terms of the sufficient statistics
+    log_likelihood = (
+        n * (alpha * np.log(beta) - scipy.special.gammaln(alpha))
+        + (alpha - 1) * sum_log_x
+        - beta * sum_x
+        )
+    
+    return_array = np.column_stack([alpha, beta, log_likelihood])
+    
+    if return_status:
+        return return_array, {"success" : success, "nfev" : nfev}
+    
+    return return_array
+
+
+def mle_iid_gamma_batch(data_block, tol = 1e-12, max_iter = 50, x0 = None,
+                        return_status = False):
+    """
+    Function to calculate the gamma MLE values (and log likelihood) for every
+    row of a 2D array of data sets, e.g. bootstrap replicates.
+    
+    Parameters
+    ----------
+    data_block : array
+        (size, n) array, one data set per row.
+    
+    tol : float, default 1e-12
+        Relative tolerance on alpha to stop the Newton iterations.
+    
+    max_iter : int, default 50
+        Maximum number of Newton iterations.
+    
+    x0 : array, default None
+        Starting point, see `mle_iid_gamma_suff_batch`.
+    
+    return_status : bool, default False
+        If True, also return per-row diagnostics instead of raising on 
+        failure, see `mle_iid_gamma_suff_batch`.
+    
+    Returns
+    -------
+    return_array : array
+        (size, 3) array with the columns alpha, beta and log likelihood.
+    """
+    
+    data_block = np.atleast_2d(np.asarray(data_block, dtype = float))
+    
+    # Sufficient statistics of every row
+    suff_stats = np.column_stack([
+        np.full(len(data_block), data_block.shape[1]),
+        data_block.sum(axis = 1),
+        np.log(data_block).sum(axis = 1)
+        ])
+    
+    return_array = mle_iid_gamma_suff_batch(
+        suff_stats, 
+        tol = tol, 
+        max_iter = max_iter, 
+        x0 = x0,
+        return_status = return_status
+        )
+    
+    return return_array
+
+
+def _fit_counts_block(data, counts, x0, on_failure):
+    """
+    Fit the gamma model to a block of count replicates of `data` from their
+    sufficient statistics in one batched call. Returns the same lists as
+    `_fit_block`.
+    """
+    
+    fits = [[], [], [], []]
+    
+    # Sufficient statistics of every replicate in the block
+    suff_stats = gamma_sufficient_stats(data, counts)
+    
+    # Fitting all of them at once
+    res_mles, info = mle_iid_gamma_suff_batch(suff_stats, x0 = x0, return_status = True)
+    
+    for stats, estimates, success, nfev in zip(suff_stats, res_mles, 
+                                               info["success"], info["nfev"]):
+        
+        fit = (estimates, 0, nfev, "Converged.")
+        
+        if not success:
+            
+            if on_failure == "raise":
+                raise RuntimeError('Convergence failed with message', 
+                                   'No convergence of the batched fit.')
+            
+            fit = (None, 1, nfev, "No convergence of the batched fit.")
+            
+            # Second attempt with the fallback optimizer
+            if on_failure == "retry":
+                estimates, res = mle_iid_gamma_suff(
+                    stats, 
+                    method = _fallback_methods["mle_iid_gamma"], 
+                    full_output = True
+                    )
+                if res.success:
+                    fit = (estimates, 2, nfev + res.nfev, res.message)
+        
+        for column, value in zip(fits, fit):
+            column.append(value)
+    
+    return fits
+
+
+def _counts_chunk_runner(data, x0, on_failure):
+    """
+    Return `run_chunk(n_chunk)`, which draws `n_chunk` multinomial count
+    replicates of `data` and fits them with `_fit_counts_block`.
+    """
+    
+    n = len(data)
+    
+    def run_chunk(n_chunk):
+        return _fit_counts_block(data, draw_bs_counts(n, n_chunk), x0, on_failure)
+    
+    return run_chunk
+
+
+def draw_bs_reps_gamma_suff(data, size = 1, progress_bar = False, batch_size = 1000,
+                            warm_start = None, on_failure = "raise", 
+                            return_diagnostics = False, checkpoint = None, 
+                            checkpoint_every = 1000, resume = False,
+                            checkpoint_key = "bootstrap", counter_seed = None, 
+                            rng_labels = (), replicate_offset = 0, sampler = "ordinary"):
+    """
+    Draw nonparametric bootstrap replicates of the gamma MLE using the 
+    sufficient statistics of the data.
+    
+    Instead of building every resampled array, the replicates are drawn as
+    multinomial counts and their sufficient statistics follow from one 
+    counts-by-stats matrix product per chunk. The optimizer then only ever 
+    sees the three numbers [n, sum(x), sum(log x)] of every replicate.
+    
+    Parameters
+    ----------
+    data : one-dimemsional Numpy array
+        Array of measurements
+    
+    size : int, default 1
+        Number of bootstrap replicates to draw.
+    
+    progress_bar : bool, default False
+        Whether or not to display progress bar.
+    
+    batch_size : int, default 1000
+        Number of replicates whose counts are held in memory at once.
+    
+    warm_start : None, "mle" or "mom", default None
+        If "mle", every replicate starts from the MLE of the original data.
+        Otherwise every replicate starts from its own closed-form estimate.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        Failure policy, see `draw_bs_reps_mle`.
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+    
+    checkpoint, checkpoint_every, resume, checkpoint_key
+        Periodic checkpoints and resuming, see `draw_bs_reps_mle`.
+    
+    counter_seed, rng_labels, replicate_offset
+        Counter-based random number streams, see `draw_bs_reps_mle`. The 
+        counts are those of the resamples `draw_bs_reps_mle` draws with the
+        same arguments, so both give the same replicates.
+    
+    sampler : "ordinary", "balanced" or "antithetic", default "ordinary"
+        Resampling scheme, see `draw_bs_reps_mle`. The counts are those of 
+        the balanced or antithetic resamples.
+
+    Returns
+    -------
+    output : numpy array
+        (size, 3) array of bootstrap replicates of (alpha, beta, log likelihood).
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True, see `draw_bs_reps_mle`.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    # Shared starting point of the replicates
+    x0 = _warm_start_x0(mle_iid_gamma, data, (), warm_start)
+    _check_on_failure(mle_iid_gamma, on_failure)
+    
+    _check_sampler(sampler, counter_seed, checkpoint = checkpoint)
+    
+    if sampler != "ordinary":
+        run_chunk = _sampler_chunk_runner(mle_iid_gamma, data, (), warm_start, x0, 
+                                          on_failure, sampler, size, 
+                                          sufficient_stats = True)
+    
+    elif counter_seed is None:
+        run_chunk = _counts_chunk_runner(data, x0, on_failure)
+    
+    # Replicate-addressable streams
+    else:
+        if checkpoint is not None:
+            raise ValueError("checkpoint is not available with counter_seed.")
+        
+        run_chunk = _counter_chunk_runner(mle_iid_gamma, data, (), warm_start, x0, 
+                                          on_failure, counter_seed, rng_labels, 
+                                          replicate_offset, sufficient_stats = True)
+    
+    fits = _run_chunks(
+        run_chunk, size, batch_size, progress_bar,
+        meta = _checkpoint_meta(mle_iid_gamma, data, size, batch_size, "counts", 
+                                warm_start = warm_start, on_failure = on_failure,
+                                fitter = "batched"),
+        checkpoint = checkpoint,
+        checkpoint_key = checkpoint_key,
+        checkpoint_every = checkpoint_every,
+        resume = resume
+        )
+    
+    res_mles, diagnostics = _collect_fits(*fits)
+    
+    if return_diagnostics:
+        return res_mles, diagnostics
+    
+    return res_mles
+
+
+def draw_bs_reps_compressed(mle_fun, values, counts, size = 1, progress_bar = False, 
+                            batch_size = 1000, warm_start = None, on_failure = "raise",
+                            return_diagnostics = False, fitter = "scalar"):
+    """
+    Draw nonparametric bootstrap replicates of a MLE from tie-compressed 
+    data, e.g. the output of `compress_ties`.
+    
+    A resample of the n measurements is the same as multinomial counts of 
+    n draws over the distinct values with probabilities counts / n, so 
+    every replicate is drawn as a count vector over the distinct values. 
+    Functions with a `counts` argument are called with the distinct values
+    and their counts, evaluating the logs and exponentials once per 
+    distinct value, other functions get the resamples expanded. With 
+    `fitter = "batched"` the gamma model is fit from the sufficient 
+    statistics of the counts and the story model with `mle_model_batch`.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        Function to use to calculate the MLE of the data.
+    
+    values : array
+        Distinct values of the data.
+    
+    counts : array
+        Number of times every value appears in the data.
+    
+    size : int, default 1
+        Number of bootstrap replicates to draw.
+    
+    progress_bar : bool, default False
+        Whether or not to display progress bar.
+    
+    batch_size : int, default 1000
+        Number of replicates whose counts are held in memory at once.
+    
+    warm_start : None, "mle" or "mom", default None
+        Starting point of every replicate fit, see `draw_bs_reps_mle`.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        Failure policy, see `draw_bs_reps_mle`.
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+    
+    fitter : "scalar" or "batched", default "scalar"
+        How the replicates are fit, see `draw_bs_reps_mle`.
+    
+    Returns
+    -------
+    output : numpy array
+        (size, number of estimates) array of bootstrap replicates, in the 
+        same layout as `draw_bs_reps_mle`.
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True, see `draw_bs_reps_mle`.
+    """
+    
+    values = np.asarray(values, dtype = float)
+    counts = np.asarray(counts)
+    
+    n = np.sum(counts)
+    probs = counts / n
+    
+    # Shared starting point of the replicates
+    x0 = _warm_start_x0(mle_fun, np.repeat(values, counts), (), warm_start)
+    _check_on_failure(mle_fun, on_failure)
+    _check_fitter(mle_fun, fitter)
+    
+    # Looked up once for the whole run
+    full_output = _has_full_output(mle_fun)
+    takes_counts = "counts" in inspect.signature(mle_fun).parameters
+    
+    def run_chunk(n_chunk):
+        
+        # Resampled counts of every distinct value
+        counts_block = samplers.rg.multinomial(n, probs, size = n_chunk)
+        
+        if fitter == "batched" and mle_fun.__name__ == mle_iid_gamma.__name__:
+            return _fit_counts_block(values, counts_block, x0, on_failure)
+        
+        if takes_counts:
+            return _fit_block(mle_fun, values, (), warm_start, x0, on_failure, fitter, 
+                              full_output, counts = counts_block)
+        
+        # Fitters that only take whole samples get the resamples expanded
+        bs_block = np.array([np.repeat(values, row) for row in counts_block])
+        
+        return _fit_block(mle_fun, bs_block, (), warm_start, x0, on_failure, fitter, 
+                          full_output)
+    
+    fits = _run_chunks(run_chunk, size, batch_size, progress_bar, meta = {})
+    
+    res_mles, diagnostics = _collect_fits(*fits)
+    
+    if return_diagnostics:
+        return res_mles, diagnostics
+    
+    return res_mles
+
+
+def iter_bs_reps_mle(mle_fun, data, args=(), size = None, batch_size = 1000,
+                     sufficient_stats = False, warm_start = None, on_failure = "raise",
+                     return_diagnostics = False, counter_seed = None, rng_labels = (),
+                     replicate_offset = 0, fitter = "scalar"):
+    """
+    Generate nonparametric bootstrap replicates of maximum likelihood 
+    estimator batch by batch.
+    
+    Every batch is yielded as soon as it is fit, so only one batch is ever
+    held in memory. Combined with the accumulators of `cat_analysis.online`
+    this gives confidence intervals of arbitrarily long runs in constant 
+    memory. The concatenated batches are identical to the output of 
+    `draw_bs_reps_mle` (or `draw_bs_reps_gamma_suff`) with the same 
+    `batch_size` from the same state of the random number generator.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        Function with call signature mle_fun(data, *args) that computes
+        a MLE for the parameters
+    
+    data : one-dimemsional Numpy array
+        Array of measurements
+    
+    args : tuple, default ()
+        Arguments to be passed to `mle_fun()`.
+    
+    size : int or None, default None
+        Total number of bootstrap replicates. If None, batches are generated
+        until the caller stops iterating.
+    
+    batch_size : int, default 1000
+        Number of replicates per batch.
+    
+    sufficient_stats : bool, default False
+        Only used with `mle_iid_gamma`. If True the replicates are drawn as
+        multinomial counts and fit from their sufficient statistics, see
+        `draw_bs_reps_gamma_suff`.
+    
+    warm_start : None, "mle" or "mom", default None
+        Starting point of every replicate fit, see `draw_bs_reps_mle`.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        Failure policy, see `draw_bs_reps_mle`.
+    
+    return_diagnostics : bool, default False
+        Whether or not to yield the diagnostics of every batch as well.
+    
+    counter_seed, rng_labels, replicate_offset
+        Counter-based random number streams, see `draw_bs_reps_mle`.
+    
+    fitter : "scalar" or "batched", default "scalar"
+        How the replicates are fit, see `draw_bs_reps_mle`.
+    
+    Yields
+    ------
+    output : numpy array
+        (batch_size, number of estimates) array of bootstrap replicates of 
+        MLEs. The last batch may be shorter.
+    
+    diagnostics : dict
+        Only yielded if `return_diagnostics` is True, see `draw_bs_reps_mle`.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    _check_on_failure(mle_fun, on_failure)
+    _check_fitter(mle_fun, fitter, args)
+    
+    # Shared starting point of the replicates
+    x0 = _warm_start_x0(mle_fun, data, args, warm_start)
+    
+    # Only the gamma model is described by these sufficient statistics
+    if sufficient_stats and mle_fun.__name__ != mle_iid_gamma.__name__:
+        raise ValueError("sufficient_stats is only available for mle_iid_gamma.")
+    
+    if counter_seed is not None:
+        run_chunk = _counter_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure,
+                                          counter_seed, rng_labels, replicate_offset,
+                                          sufficient_stats, fitter)
+    
+    elif sufficient_stats:
+        run_chunk = _counts_chunk_runner(data, x0, on_failure)
+    
+    else:
+        run_chunk = _resample_chunk_runner(mle_fun, data, args, warm_start, x0, on_failure,
+                                           fitter)
+    
+    n_done = 0
+    while size is None or n_done < size:
+        
+        # Number of replicates in this batch
+        n_chunk = batch_size if size is None else min(batch_size, size - n_done)
+        
+        res_mles, diagnostics = _collect_fits(*run_chunk(n_chunk))
+        n_done = n_done + n_chunk
+        
+        if return_diagnostics:
+            yield res_mles, diagnostics
+        else:
+            yield res_mles
+
+
+def model_log_likelihood(params, data, counts = None):
+    """
+    Function to determine the log likelihood of the data given the parameters of the model.
+    
+    The density is evaluated in log space, symmetric in the two rates, as
+    
+        log f(t) = log(lo hi) - lo t + log(t) + log((1 - exp(-x)) / x)
+    
+    with lo <= hi the ordered rates and x = (hi - lo) t, so it neither 
+    underflows for long times nor breaks down for equal rates, where it 
+    takes its Gamma(2, beta) limit.
+    
+    Parameters
+    ----------
+    params : tuple of floats 
+        Format (beta1, beta2)
+        Tuple containing the parameter values
+    
+    data : array 
+        numpy array containing the data values
+    
+    counts : array, default None
+        Number of times every value of `data` appears, see 
+        `log_likelihood_gamma`.
+    
+    
+    Returns 
+    -------
+    model_log_likelihood : float
+        Value of the log likelihood for the model given the parameter values.
+        
+    """
+    
+    # First extracting the individual parameter values
+    beta1, beta2 = params   
+    
+    # Setting constrains on the betas 
+    # They cannot be zero
+    if beta1 <= 0 or beta2 <= 0:
+        
+        # return negative infinity if either is zero
+        return -np.inf
+    
+    # Ordering the rates, the density is symmetric in them
+    lo, hi = min(beta1, beta2), max(beta1, beta2)
+    
+    t = np.asarray(data)
+    
+    # Number of measurements and weighted sums
+    if counts is None:
+        n, weighted_sum = len(t), np.sum
+    else:
+        n = np.sum(counts)
+        weighted_sum = lambda terms: np.sum(counts * terms)
+    
+    # Equal rates, Gamma(2, beta) density beta^2 t exp(-beta t)
+    if hi == lo:
+        return n * 2 * np.log(lo) + weighted_sum(np.log(t)) - lo * weighted_sum(t)
+    
+    # log(t) - log(x) reduces to -log(hi - lo), leaving a single expm1 and
+    # log per point
+    log_terms = np.log(-np.expm1(-(hi - lo) * t))
+    
+    # Calculating the log likelihood
+    model_log_likelihood = (n * np.log(lo * hi / (hi - lo)) - lo * weighted_sum(t)
+                            + weighted_sum(log_terms))
+    
+    return model_log_likelihood
+
+
+def model_log_likelihood_score(params, data):
+    """
+    Calculate the gradient of `model_log_likelihood` with respect to the 
+    parameters.
+    
+    Parameters
+    ----------
+    params : tuple of floats 
+        Format (beta1, beta2)
+        Tuple containing the parameter values
+    
+    data : array 
+        numpy array containing the data values
+    
+    Returns 
+    -------
+    score : array
+        [d/d beta1, d/d beta2] of the log likelihood.
+    """
+    
+    _, grad, _ = _model_derivs(np.atleast_2d(np.asarray(params, dtype = float)), data)
+    
+    return grad[0]
+
+
+def model_log_likelihood_hessian(params, data):
+    """
+    Calculate the Hessian of `model_log_likelihood` with respect to the 
+    parameters.
+    
+    Parameters
+    ----------
+    params : tuple of floats 
+        Format (beta1, beta2)
+        Tuple containing the parameter values
+    
+    data : array 
+        numpy array containing the data values
+    
+    Returns 
+    -------
+    hessian : array
+        2x2 array of second derivatives of the log likelihood.
+    """
+    
+    _, _, hess = _model_derivs(np.atleast_2d(np.asarray(params, dtype = float)), data)
+    
+    return hess[0]
+
+
+def mle_model(data, method = "Powell", x0 = None, full_output = False, n_starts = 1,
+              n_refine = 1, counts = None):
+    """
+    Function to calculate the MLE values for the parameter. 
+    
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    method : string, default "Powell"
+        Optimizer passed to `scipy.optimize.minimize`. "Powell" works on the
+        rates without derivatives. Any other method (e.g. "trust-exact", 
+        "L-BFGS-B") works on (log beta1, log beta2) with the analytic 
+        gradient and Hessian. "profile" eliminates the scale of the rates
+        in closed form and searches their ratio, see `_mle_model_profile`.
+        It returns beta1 <= beta2 and is selected in the bootstrap 
+        functions with `mle_model_profile`.
+    
+    x0 : tuple of floats, default None
+        Starting point (beta1, beta2). Default is (0.005, 0.004). As the 
+        likelihood is symmetric in the rates, (nearly) equal rates are 
+        split so the optimizer does not stay on the beta1 = beta2 line.
+        Not used by "profile".
+    
+    full_output : bool, default False
+        If True, a failed fit does not raise an error and the 
+        `scipy.optimize.OptimizeResult` of the fit (with `success`, `nfev` 
+        and `message`) is returned as well.
+    
+    n_starts : int, default 1
+        Number of starting points. If more than 1, candidates spread over
+        the ratio of the rates (plus `x0` and the method of moments 
+        estimate) are scored with one vectorized likelihood evaluation and
+        only the `n_refine` best are optimized. The best fit is returned 
+        with beta1 <= beta2. In the bootstrap functions it is selected 
+        with `mle_model_multistart`.
+    
+    n_refine : int, default 1
+        Number of candidates optimized when `n_starts` > 1.
+    
+    counts : array, default None
+        Number of times every value of `data` appears, see 
+        `log_likelihood_gamma`.
+    
+    Returns
+    -------
+    return_array : array 
+        Array containing [0, 3] arrays of the MLE values for the parameters from each 
+        bootstrap sample and the log likelihood. The rates are ordered as 
+        beta1 <= beta2.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+        
+    """
+    
+    # Refining the best of many starting points
+    if n_starts > 1 and method != "profile":
+        
+        starts = _model_candidates(data, n_starts, x0, counts)[: n_refine]
+        
+        fits = [mle_model(data, method = method, x0 = start, full_output = True, 
+                          counts = counts) 
+                for start in starts]
+        
+        # Keeping the best converged fit, or the best fit if none converged
+        converged = [res.success for _, res in fits]
+        return_array, res = max(
+            fits, key = lambda fit: (fit[1].success or not any(converged), fit[0][2])
+            )
+        
+        res.nfev = sum(fit_res.get("nfev", 0) for _, fit_res in fits) + 1
+        return_array = list(np.sort(return_array[:2])) + [return_array[2]]
+        
+        if res.success or full_output:
+            return (return_array, res) if full_output else return_array
+        
+        raise RuntimeError('Convergence failed with message', res.message)
+    
+    # Starting point off the equal-rate line, where the gradient is 
+    # symmetric and optimizers would stay
+    if x0 is None:
+        x0 = np.array([0.005, 0.004])
+    elif method == "Powell":
+        x0 = _split_rates(np.atleast_2d(np.asarray(x0, dtype = float)), min_ratio = 1.001)[0]
+    else:
+        x0 = _split_rates(np.atleast_2d(np.asarray(x0, dtype = float)))[0]
+    
+    # One-dimensional search over the ratio of the rates
+    if method == "profile":
+        
+        res = _mle_model_profile(data, counts)
+    
+    # Gradient based optimizers on the log rates
+    elif method != "Powell":
+        
+        res = _minimize_log_space(
+            lambda params: _model_derivs(params, data, counts),
+            x0 = x0,
+            method = method
+            )
+    
+    else:
+        
+        # Warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            
+            # scipy minimize function on the negative log likelihood
+            # which we previously defined
+            res = scipy.optimize.minimize(
+                fun = lambda params, data: -model_log_likelihood(params, data, counts),
+                
+                # Guess values
+                x0 = x0,
+                args = (data),
+                method = 'Powell'
+            )
+
+    # If it converges, with the rates in the order of `mle_model_batch`
+    if res.success or full_output:
+        beta1_mle, beta2_mle = np.sort(res.x)
+        log_likelihood = -res.fun
+        
+        
+        return_array = [beta1_mle, beta2_mle, log_likelihood]
+        
+        if full_output:
+            return return_array, res
+        
+        return return_array
+
+    # If it does not converge
+    else:
+        raise RuntimeError('Convergence failed with message', res.message)   
+
+
+
+def _model_candidates(data, n_starts, x0 = None, counts = None):
+    """
+    Starting points of a multi-start story model fit, best first.
+    
+    The candidates are the method of moments estimate, `x0` if given, and 
+    rates with ratios lo / hi spread geometrically over [0.01, 0.95], all 
+    with the mean of the data (1 / lo + 1 / hi). They are scored together
+    with one (n_starts, 2) evaluation of `_model_derivs`. Returns an 
+    (n_starts, 2) array with beta1 <= beta2.
+    """
+    
+    t = np.asarray(data, dtype = float)
+    
+    if counts is not None:
+        counts = np.asarray(counts, dtype = float)
+    
+    mean = np.mean(t) if counts is None else np.sum(counts * t) / np.sum(counts)
+    
+    fixed = [_model_start(t[None, :], None if counts is None else counts[None, :])[0]]
+    if x0 is not None:
+        fixed.append(np.sort(np.asarray(x0, dtype = float)))
+    
+    # Rates with ratio r and the mean of the data
+    ratios = np.geomspace(0.01, 0.95, max(n_starts - len(fixed), 0))
+    hi = (1 + 1 / ratios) / mean
+    
+    betas = np.concatenate((fixed, np.column_stack([ratios * hi, hi])))[: n_starts]
+    
+    # Best starting points first
+    log_likelihood = _model_derivs(betas, t, counts)[0]
+    order = np.argsort(-np.where(np.isnan(log_likelihood), -np.inf, log_likelihood), 
+                       kind = "stable")
+    
+    return betas[order]
+
+
+def mle_model_multistart(data, method = "trust-exact", x0 = None, full_output = False, 
+                         n_starts = 16, n_refine = 2, counts = None):
+    """
+    Function to calculate the MLE values for the parameters of the story 
+    model from several starting points, see `mle_model`. Being its own 
+    function, it can be handed to the bootstrap functions in place of 
+    `mle_model`.
+    
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    method : string, default "trust-exact"
+        Optimizer used to refine the best starting points, see `mle_model`.
+        Powell stops short of the maximum on the flat likelihood around
+        beta1 = beta2.
+    
+    x0 : tuple of floats, default None
+        Extra starting point, e.g. the estimate of the original data.
+    
+    full_output : bool, default False
+        If True, the `scipy.optimize.OptimizeResult` of the best fit is 
+        returned as well.
+    
+    n_starts : int, default 16
+        Number of starting points scored.
+    
+    n_refine : int, default 2
+        Number of the best starting points optimized.
+    
+    counts : array, default None
+        Number of times every value of `data` appears, see 
+        `log_likelihood_gamma`.
+    
+    Returns
+    -------
+    return_array : array 
+        [beta1, beta2, log likelihood], with beta1 <= beta2.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+    """
+    
+    return mle_model(data, method = method, x0 = x0, full_output = full_output, 
+                     n_starts = n_starts, n_refine = n_refine, counts = counts)
+
+
+def mle_model_profile(data, method = "profile", x0 = None, full_output = False, 
+                      counts = None):
+    """
+    Function to calculate the MLE values for the parameters of the story 
+    model by profile likelihood, see `mle_model`. Being its own function, 
+    it can be handed to `bootstrap_aic`, `compare_concentrations` and the 
+    other bootstrap functions in place of `mle_model`.
+    
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    method : string, default "profile"
+        Optimizer, see `mle_model`. Only changed by the fallback of 
+        `on_failure = "retry"`.
+    
+    x0 : tuple of floats, default None
+        Starting point, only used if `method` is not "profile".
+    
+    full_output : bool, default False
+        If True, the `scipy.optimize.OptimizeResult` of the fit is returned
+        as well.
+    
+    counts : array, default None
+        Number of times every value of `data` appears, see 
+        `log_likelihood_gamma`.
+    
+    Returns
+    -------
+    return_array : array 
+        [beta1, beta2, log likelihood], with beta1 <= beta2.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+    """
+    
+    return mle_model(data, method = method, x0 = x0, full_output = full_output, 
+                     counts = counts)
+
+
+def _story_g1(x):
+    """
+    g1(x) = 1 / x - 1 / (exp(x) - 1) for x >= 0, with its series close to 0.
+    """
+    
+    x_safe = np.where(x < 1e-2, 1, x)
+    
+    return np.where(
+        x < 1e-2,
+        1 / 2 - x / 12 + x**3 / 720,
+        1 / x_safe - 1 / np.expm1(x_safe)
+        )
+
+
+def _story_g2(x):
+    """
+    g2(x) = -g1'(x) = 1 / x^2 - exp(x) / (exp(x) - 1)^2 for x >= 0, with its 
+    series close to 0.
+    """
+    
+    x_safe = np.where(x < 1e-2, 1, x)
+    q = 1 / np.expm1(x_safe)
+    
+    return np.where(
+        x < 1e-2,
+        1 / 12 - x**2 / 240 + x**4 / 6048,
+        1 / x_safe**2 - q * (1 + q)
+        )
+
+
+def _story_terms(x):
+    """
+    log h(x) = log((1 - exp(-x)) / x), g1(x) and g2(x) of `_story_g1` and 
+    `_story_g2` together, from one exponential per element and their 
+    series for the few elements close to 0.
+    """
+    
+    small = x < 1e-2
+    x_safe = np.where(small, 1, x)
+    inv = 1 / x_safe
+    
+    # 1 - exp(-x), and 1 / (exp(x) - 1) from it
+    one_m_exp = -np.expm1(-x_safe)
+    q = np.exp(-x_safe)
+    q /= one_m_exp
+    
+    log_h = np.log(one_m_exp * inv)
+    g1 = inv - q
+    g2 = inv * inv - q * (1 + q)
+    
+    if np.any(small):
+        x_small = x[small]
+        log_h[small] = x_small * (-1 / 2 + x_small * (1 / 24 - x_small**2 / 2880))
+        g1[small] = 1 / 2 - x_small / 12 + x_small**3 / 720
+        g2[small] = 1 / 12 - x_small**2 / 240 + x_small**4 / 6048
+    
+    return log_h, g1, g2
+
+
+def _log_space_derivs(params, grad, hess):
+    """
+    Chain rule from the derivatives with respect to positive parameters to
+    the derivatives with respect to their logs. Works on (size, 2) gradients
+    and (size, 2, 2) Hessians.
+    """
+    
+    grad_log = params * grad
+    hess_log = params[:, :, None] * params[:, None, :] * hess
+    
+    # Extra diagonal term from d^2 p / d(log p)^2 = p
+    hess_log[:, 0, 0] += grad_log[:, 0]
+    hess_log[:, 1, 1] += grad_log[:, 1]
+    
+    return grad_log, hess_log
+
+
+def _model_derivs(betas, data, counts = None):
+    """
+    Log likelihood of the story model with its gradient and Hessian with 
+    respect to (beta1, beta2), for many parameter sets at once.
+    
+    Parameters
+    ----------
+    betas : array
+        (size, 2) array of rates.
+    
+    data : array
+        (size, n) array of data sets, or 1D array shared by all rows.
+    
+    counts : array, default None
+        Weights of the data points, broadcastable against `data`.
+    
+    Returns
+    -------
+    log_likelihood : array
+        (size,) array of log likelihoods.
+    
+    grad : array
+        (size, 2) array of gradients.
+    
+    hess : array
+        (size, 2, 2) array of Hessians.
+    """
+    
+    # Working with the ordered rates, the density is symmetric in them
+    swap = betas[:, 0] > betas[:, 1]
+    lo = np.where(swap, betas[:, 1], betas[:, 0])
+    hi = np.where(swap, betas[:, 0], betas[:, 1])
+    
+    t = np.atleast_2d(data)
+    
+    def row_sum(terms):
+        # Weighted sum over the data points of every row
+        return np.sum(terms if counts is None else counts * terms, axis = 1)
+    
+    # Scaled difference of the rates, the only term mixing rates and data
+    log_h, g1, g2 = _story_terms((hi - lo)[:, None] * t)
+    
+    if counts is None:
+        n_w = np.full(len(betas), t.shape[1])
+    else:
+        n_w = row_sum(np.ones_like(t))
+    sum_t = row_sum(t)
+    
+    # log f = log(lo hi) - lo t + log(t) + log((1 - exp(-x)) / x), summed
+    log_likelihood = (n_w * np.log(lo * hi) - lo * sum_t + row_sum(np.log(t)) 
+                      + row_sum(log_h))
+    
+    # Derivatives with respect to the ordered rates, with g1 -> t g1 and 
+    # g2 -> t^2 g2 in place
+    g1 *= t
+    g2 *= t**2
+    tg1 = row_sum(g1)
+    t2g2 = row_sum(g2)
+    
+    d_lo = n_w / lo - sum_t + tg1
+    d_hi = n_w / hi - tg1
+    
+    h_lo_lo = -n_w / lo**2 + t2g2
+    h_hi_hi = -n_w / hi**2 + t2g2
+    
+    # Back to the original order of the rates
+    grad = np.column_stack([
+        np.where(swap, d_hi, d_lo),
+        np.where(swap, d_lo, d_hi)
+        ])
+    
+    hess = np.empty((len(betas), 2, 2))
+    hess[:, 0, 0] = np.where(swap, h_hi_hi, h_lo_lo)
+    hess[:, 1, 1] = np.where(swap, h_lo_lo, h_hi_hi)
+    hess[:, 0, 1] = -t2g2
+    hess[:, 1, 0] = -t2g2
+    
+    return log_likelihood, grad, hess
+
+
+def _model_log_likelihood_derivs(log_betas, data, counts = None):
+    """
+    Same as `_model_derivs`, with the gradient and Hessian taken with 
+    respect to (log beta1, log beta2).
+    """
+    
+    betas = np.exp(log_betas)
+    
+    log_likelihood, grad, hess = _model_derivs(betas, data, counts)
+    grad, hess = _log_space_derivs(betas, grad, hess)
+    
+    return log_likelihood, grad, hess
+
+
+def _model_start(data, counts = None):
+    """
+    Method of moments starting rates for the story model, for every row of 
+    a (size, n) data block. The mean is 1 / beta1 + 1 / beta2 and the 
+    variance 1 / beta1^2 + 1 / beta2^2; if the variance is out of reach of
+    the model the rates are split around the equal-rate solution.
+    """
+    
+    t = np.atleast_2d(data)
+    w = np.ones_like(t) if counts is None else counts
+    
+    # Weighted moments of every row
+    n_w = np.sum(w * np.ones_like(t), axis = 1)
+    mean = np.sum(w * t, axis = 1) / n_w
+    var = np.sum(w * (t - mean[:, None])**2, axis = 1) / n_w
+    
+    # Half the spread between 1 / beta1 and 1 / beta2
+    half_diff = np.sqrt(np.clip(2 * var - mean**2, 0, None)) / 2
+    
+    # Keeping away from both the equal-rate line and infinite rates
+    half_diff = np.clip(half_diff, 0.1 * mean / 2, 0.9 * mean / 2)
+    
+    betas = np.column_stack([1 / (mean / 2 + half_diff), 1 / (mean / 2 - half_diff)])
+    
+    return betas
+
+
+def _split_rates(betas, min_ratio = 1.2):
+    """
+    Move (size, 2) starting rates apart so that the larger is at least 
+    `min_ratio` times the smaller, keeping their geometric mean. The 
+    symmetric story likelihood has a stationary point on beta1 = beta2 
+    which an optimizer started there cannot leave.
+    """
+    
+    lo = np.min(betas, axis = 1)
+    hi = np.max(betas, axis = 1)
+    
+    # Rates already far enough apart are left alone
+    ratio = np.maximum(hi / lo, min_ratio)
+    geo_mean = np.sqrt(lo * hi)
+    
+    split = np.column_stack([geo_mean / np.sqrt(ratio), geo_mean * np.sqrt(ratio)])
+    
+    # Keeping the original order of the two rates
+    swap = betas[:, 0] > betas[:, 1]
+    split[swap] = split[swap, ::-1]
+    
+    return split
+
+
+def _mle_model_profile(data, counts = None, n_grid = 40, min_ratio = 1e-8):
+    """
+    Profile likelihood fit of the story model.
+    
+    Adding the two score equations gives 1 / lo + 1 / hi = mean(t) at 
+    every stationary point of the likelihood, the maximum included. Along
+    that curve the rates follow in closed form from their ratio 
+    r = lo / hi in (0, 1],
+    
+        lo = (1 + r) / mean(t),    hi = lo / r,
+    
+    so the fit is a one-dimensional search in r. The profile log 
+    likelihood is evaluated on a geometric grid of `n_grid` ratios from 
+    `min_ratio` to 1 in one vectorized call, and the best grid point is 
+    refined by a bounded scalar search between its neighbours. The 
+    result is an OptimizeResult with `x` = (lo, hi) and `fun` the negative
+    log likelihood.
+    """
+    
+    t = np.asarray(data, dtype = float)
+    w = np.ones_like(t) if counts is None else np.asarray(counts, dtype = float)
+    
+    n = np.sum(w)
+    sum_t = np.sum(w * t)
+    sum_log_t = np.sum(w * np.log(t))
+    
+    def rates(log_r):
+        ratio = np.exp(log_r)
+        lo = (1 + ratio) * n / sum_t
+        return lo, lo / ratio
+    
+    def profile(log_r):
+        lo, hi = rates(np.atleast_1d(log_r))
+        
+        # Equal rates take the Gamma(2) limit of the density
+        equal = hi <= lo
+        gap = np.where(equal, 1, hi - lo)
+        
+        log_1m_exp = np.sum(w * np.log(-np.expm1(-gap[:, None] * t)), axis = 1)
+        
+        return np.where(
+            equal,
+            2 * n * np.log(lo) + sum_log_t - lo * sum_t,
+            n * np.log(lo * hi / gap) - lo * sum_t + log_1m_exp
+            )
+    
+    # Coarse search over the whole range of ratios at once
+    log_grid = np.linspace(np.log(min_ratio), 0, n_grid)
+    best = np.argmax(profile(log_grid))
+    
+    # Refining between the neighbours of the best grid point
+    res = scipy.optimize.minimize_scalar(
+        lambda log_r: -profile(log_r)[0],
+        bounds = (log_grid[max(best - 1, 0)], log_grid[min(best + 1, n_grid - 1)]),
+        method = "bounded",
+        options = {"xatol" : 1e-10}
+        )
+    
+    return scipy.optimize.OptimizeResult(
+        x = np.concatenate(rates(np.atleast_1d(res.x))),
+        fun = res.fun,
+        success = res.success,
+        nfev = n_grid + res.nfev,
+        message = res.message
+        )
+
+
+def mom_model(data):
+    """
+    Method of moments estimate of the story model rates, used as a starting
+    point for `mle_model`.
+    
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    Returns
+    -------
+    betas : array
+        [beta1, beta2], with beta1 <= beta2. If the variance of the data is 
+        out of reach of the model, the rates are split around the equal-rate
+        solution.
+    """
+    
+    betas = _model_start(np.asarray(data, dtype = float))[0]
+    
+    return betas
+
+
+def mom_iid_gamma(data):
+    """
+    Method of moments estimate of the gamma parameters, used as a starting
+    point for `mle_iid_gamma`.
+    
+    Parameters
+    ----------
+    data : array
+        Array containing the data.
+    
+    Returns
+    -------
+    params : array
+        [alpha, beta] = [mean^2 / var, mean / var].
+    """
+    
+    mean = np.mean(data)
+    var = np.var(data)
+    
+    params = np.array([mean**2 / var, mean / var])
+    
+    return params
+
+
+def mle_model_batch(data, counts = None, tol = 1e-10, max_iter = 200, 
+                    return_status = False, x0 = None):
+    """
+    Function to calculate the MLE values for the story model for many data
+    sets at once, e.g. all the replicates of a bootstrap.
+    
+    The log likelihood is maximized over (log beta1, log beta2) with 
+    Levenberg-Marquardt damped Newton steps that use the analytic gradient
+    and Hessian, vectorized over all the data sets. Each data set has its 
+    own damping, and converged data sets are masked out. The equal-rate 
+    case is handled as the limit of the density, so data sets whose 
+    maximum lies on beta1 = beta2 converge as well.
+    
+    Parameters
+    ----------
+    data : array
+        (size, n) array with one data set per row. If `counts` is given, 
+        `data` may also be a 1D array of values shared by all the rows.
+    
+    counts : array, default None
+        (size, n) array with the number of times every value appears in 
+        every data set (e.g. multinomial bootstrap counts).
+    
+    tol : float, default 1e-10
+        Tolerance on the step in log rates to stop the iterations.
+    
+    max_iter : int, default 200
+        Maximum number of iterations.
+    
+    return_status : bool, default False
+        If True, data sets that fail to converge do not raise an error 
+        (their row is NaN) and a dictionary of per-row diagnostics is 
+        returned as well.
+    
+    x0 : array, default None
+        Starting rates (beta1, beta2), either shared by all the rows or one
+        per row. Equal rates are split slightly, see `mle_model`. If None, 
+        every row starts from its own method of moments estimate.
+    
+    Returns
+    -------
+    return_array : array
+        (size, 3) array with the columns beta1, beta2 (ordered so that 
+        beta1 <= beta2) and log likelihood, in the same layout as the 
+        output of `draw_bs_reps_mle`.
+    
+    info : dict
+        Only returned if `return_status` is True. "success" is a boolean 
+        array of convergence flags and "nfev" the number of likelihood 
+        evaluations of every row.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    # Every row needs its own data and counts
+    if counts is not None:
+        counts = np.atleast_2d(counts)
+        data = np.broadcast_to(data, counts.shape)
+    data = np.atleast_2d(data)
+    
+    def rows(active):
+        # Data and counts of the rows still being iterated
+        return data[active], None if counts is None else counts[active]
+    
+    # Starting from the method of moments
+    if x0 is None:
+        log_betas = np.log(_model_start(data, counts))
+    else:
+        x0 = np.broadcast_to(np.asarray(x0, dtype = float), (len(data), 2))
+        log_betas = np.log(_split_rates(x0))
+    log_likelihood, grad, hess = _model_log_likelihood_derivs(log_betas, data, counts)
+    
+    # Damping of every row
+    lam = np.full(len(data), 1e-3)
+    
+    active = np.ones(len(data), dtype = bool)
+    converged = np.zeros(len(data), dtype = bool)
+    nfev = np.ones(len(data), dtype = int)
+    
+    for _ in range(max_iter):
+        
+        idx = np.flatnonzero(active)
+        nfev[idx] += 1
+        
+        # Damped system (-H + lambda * scale * I) step = grad, for 2x2 matrices
+        scale = np.max(np.abs(np.diagonal(hess[idx], axis1 = 1, axis2 = 2)), axis = 1)
+        a = -hess[idx, 0, 0] + lam[idx] * scale
+        b = -hess[idx, 0, 1]
+        c = -hess[idx, 1, 1] + lam[idx] * scale
+        det = a * c - b**2
+        
+        # Only positive definite systems give ascent directions
+        pos_def = (a > 0) & (det > 0)
+        det_safe = np.where(pos_def, det, 1)
+        step = np.column_stack([
+            (c * grad[idx, 0] - b * grad[idx, 1]) / det_safe,
+            (a * grad[idx, 1] - b * grad[idx, 0]) / det_safe
+            ])
+        
+        # Not moving more than a factor of e in the rates per iteration
+        step = step / np.maximum(1, np.max(np.abs(step), axis = 1))[:, None]
+        step[~pos_def] = 0
+        
+        # Trying the step
+        trial = log_betas[idx] + step
+        trial_ll, trial_grad, trial_hess = _model_log_likelihood_derivs(
+            trial, *rows(idx)
+            )
+        
+        accept = pos_def & (trial_ll >= log_likelihood[idx])
+        
+        # Updating the accepted rows and relaxing their damping
+        acc = idx[accept]
+        log_betas[acc] = trial[accept]
+        log_likelihood[acc] = trial_ll[accept]
+        grad[acc] = trial_grad[accept]
+        hess[acc] = trial_hess[accept]
+        lam[acc] = lam[acc] / 10
+        
+        # Rejected rows get more damping
+        rej = idx[~accept]
+        lam[rej] = lam[rej] * 10
+        
+        # Converged once the accepted step is negligible
+        done = accept & (np.max(np.abs(step), axis = 1) < tol)
+        converged[idx[done]] = True
+        
+        # Rows that can no longer make progress
+        stuck = ~accept & (lam[idx] > 1e16)
+        active[idx[done | stuck]] = False
+        
+        if not active.any():
+            break
+    
+    # If some rows do not converge
+    if not return_status and not converged.all():
+        raise RuntimeError('Convergence failed with message', 
+                           'No convergence for ' + str((~converged).sum()) 
+                           + ' data sets.')
+    
+    # Reporting the rates in order
+    betas = np.sort(np.exp(log_betas), axis = 1)
+    return_array = np.column_stack([betas, log_likelihood])
+    return_array[~converged] = np.nan
+    
+    if return_status:
+        return return_array, {"success" : converged, "nfev" : nfev}
+    
+    return return_array
+
+
+def _draw_gamma_block(params, n, size):
+    """
+    (size, n) block of gamma distributed times with parameters (alpha, beta).
+    """
+    
+    alpha, beta = params
+    
+    return samplers.rg.gamma(alpha, 1 / beta, size = (size, n))
+
+
+def _draw_model_block(params, n, size):
+    """
+    (size, n) block of times to catastrophe of the story model, the sum of 
+    two exponential waiting times with rates (beta1, beta2).
+    """
+    
+    beta1, beta2 = params
+    
+    return (samplers.rg.exponential(1 / beta1, size = (size, n)) 
+            + samplers.rg.exponential(1 / beta2, size = (size, n)))
+
+
+def draw_parametric_samples(mle_fun, params, n, size):
+    """
+    Draw parametric bootstrap samples from a fitted model in one call.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        `mle_iid_gamma` or `mle_model`, selecting the model.
+    
+    params : array
+        Parameters of the model, (alpha, beta) or (beta1, beta2).
+    
+    n : int
+        Number of measurements per sample.
+    
+    size : int
+        Number of samples (rows) to draw.
+    
+    Returns
+    -------
+    samples : array
+        (size, n) array with one simulated data set per row.
+    """
+    
+    if mle_fun.__name__ not in _parametric_samplers:
+        raise ValueError("No parametric sampler for " + mle_fun.__name__)
+    
+    return _parametric_samplers[mle_fun.__name__](params, n, size)
+
+
+def draw_parametric_bs_reps_mle(mle_fun, data, size = 1, params = None, progress_bar = False,
+                                batch_size = 1000, warm_start = None, on_failure = "raise", 
+                                return_diagnostics = False, checkpoint = None, 
+                                checkpoint_every = 1000, resume = False,
+                                checkpoint_key = "bootstrap", fitter = "scalar"):
+    """
+    Draw parametric bootstrap replicates of maximum likelihood estimator.
+    
+    The model is fit to the data once, then whole (batch_size, n) blocks of
+    data sets are simulated from the fit in one call and refit, with the 
+    batched MLE function (`mle_iid_gamma_batch` or `mle_model_batch`) if 
+    `fitter` is "batched".
+    
+    Parameters
+    ----------
+    mle_fun : function
+        `mle_iid_gamma` or `mle_model`.
+    
+    data : one-dimemsional Numpy array
+        Array of measurements
+    
+    size : int, default 1
+        Number of bootstrap replicates to draw.
+    
+    params : array or None, default None
+        Parameters to simulate from. If None, the MLE of `data`.
+    
+    progress_bar : bool, default False
+        Whether or not to display progress bar.
+    
+    batch_size : int, default 1000
+        Number of data sets simulated and fit at once.
+    
+    warm_start : None, "mle" or "mom", default None
+        Starting point of every replicate fit. "mle" starts from `params`, 
+        see `draw_bs_reps_mle` for the others.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        Failure policy, see `draw_bs_reps_mle`.
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+    
+    checkpoint, checkpoint_every, resume, checkpoint_key
+        Periodic checkpoints and resuming, see `draw_bs_reps_mle`.
+    
+    fitter : "scalar" or "batched", default "scalar"
+        How the simulated data sets are fit, see `draw_bs_reps_mle`. 
+        "batched" is what makes 10^5 replicates affordable.
+    
+    Returns
+    -------
+    output : numpy array
+        (size, 3) array of bootstrap replicates of the parameters and the 
+        log likelihood.
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True, see `draw_bs_reps_mle`.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    n = len(data)
+    
+    if mle_fun.__name__ not in _parametric_samplers:
+        raise ValueError("No parametric sampler for " + mle_fun.__name__)
+    
+    _check_on_failure(mle_fun, on_failure)
+    _check_fitter(mle_fun, fitter)
+    
+    # Fitted model to simulate from
+    if params is None:
+        params = mle_fun(data)[:-1]
+    params = np.asarray(params, dtype = float)
+    
+    # Shared starting point of the replicates
+    if warm_start == "mle":
+        x0 = params
+    else:
+        x0 = _warm_start_x0(mle_fun, data, (), warm_start)
+    
+    def run_chunk(n_chunk):
+        
+        # Simulated data for the whole chunk
+        sim_block = draw_parametric_samples(mle_fun, params, n, n_chunk)
+        
+        return _fit_block(mle_fun, sim_block, (), warm_start, x0, on_failure,
+                          fitter = fitter)
+    
+    # The simulated data depend on the parameters as well as on the data
+    meta = _checkpoint_meta(mle_fun, data, size, batch_size, "parametric",
+                            warm_start = warm_start, on_failure = on_failure,
+                            fitter = fitter)
+    meta["params"] = params.tolist()
+    
+    fits = _run_chunks(
+        run_chunk, size, batch_size, progress_bar,
+        meta = meta,
+        checkpoint = checkpoint,
+        checkpoint_key = checkpoint_key,
+        checkpoint_every = checkpoint_every,
+        resume = resume
+        )
+    
+    res_mles, diagnostics = _collect_fits(*fits)
+    
+    if return_diagnostics:
+        return res_mles, diagnostics
+    
+    return res_mles
+
+
+def jackknife_gamma(data):
+    """
+    Leave-one-out MLEs of the gamma distribution.
+    
+    The sufficient statistics of the data set without measurement i are
+    those of the full data set minus [1, x_i, log x_i], so all the n 
+    leave-one-out data sets are described in O(n) and fit in a single 
+    batched call.
+    
+    Parameters
+    ----------
+    data : array
+        1D array containing the data.
+    
+    Returns
+    -------
+    output : numpy array
+        (n, 3) array, row i holding (alpha, beta, log likelihood) of the 
+        data without measurement i.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    # Removing one measurement at a time from the statistics
+    suff_stats = gamma_sufficient_stats(data)
+    loo_stats = suff_stats - np.column_stack((np.ones(len(data)), data, np.log(data)))
+    
+    return mle_iid_gamma_suff_batch(loo_stats)
+
+
+def jackknife_model(data):
+    """
+    Leave-one-out MLEs of the story model.
+    
+    Each leave-one-out data set is the unique values of the data with their
+    counts, one of them decremented, so all the fits run in one call of 
+    `mle_model_batch` on a (number of unique values)^2 count matrix. Equal
+    measurements share their fit.
+    
+    Parameters
+    ----------
+    data : array
+        1D array containing the data.
+    
+    Returns
+    -------
+    output : numpy array
+        (n, 3) array, row i holding (beta1, beta2, log likelihood) of the 
+        data without measurement i, with beta1 <= beta2.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    values, inverse, counts = np.unique(data, return_inverse = True, return_counts = True)
+    
+    # One row per unique value, leaving out one copy of it
+    loo_counts = counts - np.eye(len(values))
+    
+    loo_mles = mle_model_batch(values, counts = loo_counts)
+    
+    return loo_mles[inverse]
+
+
+def jackknife_mle(mle_fun, data, args=()):
+    """
+    Leave-one-out MLEs of a model.
+    
+    Uses the batched leave-one-out fits of `jackknife_gamma` and 
+    `jackknife_model`, and n calls of `mle_fun` on the reduced data sets 
+    for any other MLE function.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        Function with call signature mle_fun(data, *args) that computes
+        a MLE for the parameters
+    
+    data : array
+        1D array containing the data.
+    
+    args : tuple, default ()
+        Arguments to be passed to `mle_fun()`.
+    
+    Returns
+    -------
+    output : numpy array
+        (n, number of estimates) array of the leave-one-out MLEs.
+    """
+    
+    if mle_fun.__name__ in _jackknife_functions and len(args) == 0:
+        return _jackknife_functions[mle_fun.__name__](data)
+    
+    data = np.asarray(data)
+    
+    return np.array([
+        mle_fun(np.delete(data, i), *args) for i in range(len(data))
+        ], dtype = float)
+
+
+def _canonical_params(mle_fun, params):
+    """
+    Order the rates of the story model as beta1 <= beta2, the order of the
+    batched fits, so that estimates of different fitters can be compared.
+    """
+    
+    params = np.array(params, dtype = float)
+    
+    if mle_fun.__name__ in (mle_model.__name__, mle_model_profile.__name__, 
+                            mle_model_multistart.__name__):
+        params[..., :2] = np.sort(params[..., :2], axis = -1)
+    
+    return params
+
+
+def bca_conf_int(mle_fun, data, bs_reps, percentiles = (2.5, 97.5), args=()):
+    """
+    Bias-corrected and accelerated (BCa) bootstrap confidence intervals of 
+    the MLE parameters.
+    
+    The bias correction z0 follows from the fraction of replicates below the
+    MLE, and the acceleration from the skewness of the leave-one-out 
+    estimates of `jackknife_mle`. The requested percentiles are then moved
+    to Phi(z0 + (z0 + z) / (1 - a (z0 + z))) with z = Phi^-1(percentile).
+    
+    Parameters
+    ----------
+    mle_fun : function
+        Function with call signature mle_fun(data, *args) that computes
+        a MLE for the parameters
+    
+    data : array
+        1D array containing the data.
+    
+    bs_reps : array
+        (size, number of estimates) array of bootstrap replicates of 
+        `mle_fun`, the last column being the log likelihood (e.g. the output
+        of `draw_bs_reps_mle`). Rows with NaN are left out.
+    
+    percentiles : array_like, default (2.5, 97.5)
+        Percentiles of the interval, between 0 and 100.
+    
+    args : tuple, default ()
+        Arguments to be passed to `mle_fun()`.
+    
+    Returns
+    -------
+    output : numpy array
+        (len(percentiles), number of parameters) array of the interval 
+        bounds. For `mle_model` the rates are in the order beta1 <= beta2.
+    """
+    
+    data = np.asarray(data, dtype = float)
+    
+    # Parameters only, without the log likelihood
+    bs_reps = _canonical_params(mle_fun, np.asarray(bs_reps, dtype = float)[:, :-1])
+    bs_reps = bs_reps[np.all(np.isfinite(bs_reps), axis = 1)]
+    
+    mle = _canonical_params(mle_fun, mle_fun(data, *args)[:-1])
+    jack = _canonical_params(mle_fun, jackknife_mle(mle_fun, data, args)[:, :-1])
+    
+    # Bias correction, counting ties as one half
+    below = np.mean(bs_reps < mle, axis = 0) + 0.5 * np.mean(bs_reps == mle, axis = 0)
+    z0 = scipy.stats.norm.ppf(below)
+    
+    # Acceleration from the jackknife
+    deviation = np.mean(jack, axis = 0) - jack
+    a = np.sum(deviation**3, axis = 0) / (6 * np.sum(deviation**2, axis = 0)**1.5)
+    
+    # Adjusted percentiles of every parameter
+    z = scipy.stats.norm.ppf(np.asarray(percentiles, dtype = float) / 100)[:, np.newaxis]
+    adjusted = 100 * scipy.stats.norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    
+    return np.array([
+        np.percentile(bs_reps[:, i], adjusted[:, i]) for i in range(bs_reps.shape[1])
+        ]).T
+
+
+def _binned_probs(cdf, sf):
+    """
+    Probabilities of the bins from the CDF and survival function of the 
+    model at the bin edges: the difference of the CDF in the lower half of
+    the distribution and of the survival function in the upper half, so 
+    that they keep their precision in both tails.
+    """
+    
+    return np.where(cdf[1:] <= 0.5, cdf[1:] - cdf[:-1], sf[:-1] - sf[1:])
+
+
+def _binned_derivs(probs, d_probs, counts):
+    """
+    Log likelihood of binned data and its gradient, from the probabilities
+    of the bins and their (number of parameters, number of bins) 
+    derivatives. Gaps and other empty bins do not contribute.
+    """
+    
+    counts = np.asarray(counts)
+    occupied = counts > 0
+    
+    counts = counts[occupied]
+    probs = probs[occupied]
+    
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        log_likelihood = np.sum(counts * np.log(probs))
+        grad = np.sum(counts * d_probs[:, occupied] / probs, axis = 1)
+    
+    return log_likelihood, grad
+
+
+def _gamma_binned_derivs(params, edges, counts, step = 1e-6):
+    """
+    Binned log likelihood of the gamma distribution and its gradient with 
+    respect to (log alpha, log beta). The derivative of the CDF in 
+    log beta is the density times beta t. The regularized incomplete gamma
+    function has no closed-form derivative in alpha, so the one in log 
+    alpha is a central difference of the bin probabilities.
+    """
+    
+    alpha, beta = params
+    x = beta * np.asarray(edges, dtype = float)
+    
+    def probs(a):
+        return _binned_probs(scipy.special.gammainc(a, x), scipy.special.gammaincc(a, x))
+    
+    # x^alpha exp(-x) / Gamma(alpha), 0 at the edge t = 0
+    with np.errstate(divide = "ignore"):
+        d_cdf_beta = np.exp(scipy.special.xlogy(alpha, x) - x - scipy.special.gammaln(alpha))
+    
+    d_probs = np.array([
+        (probs(alpha * np.exp(step)) - probs(alpha * np.exp(-step))) / (2 * step),
+        np.diff(d_cdf_beta)
+        ])
+    
+    return _binned_derivs(probs(alpha), d_probs, counts)
+
+
+def _model_binned_derivs(params, edges, counts):
+    """
+    Binned log likelihood of the story model and its gradient with respect
+    to (log beta1, log beta2). With x = (hi - lo) t, h = (1 - exp(-x)) / x 
+    and h' = -h g1, the survival function S = exp(-lo t) (1 + lo t h) has
+    
+        lo dS/dlo = lo t exp(-lo t) (h - 1 - lo t h (1 - g1)),
+        hi dS/dhi = -hi lo t^2 exp(-lo t) h g1.
+    """
+    
+    swap = params[0] > params[1]
+    lo, hi = np.sort(params)
+    t = np.asarray(edges, dtype = float)
+    
+    log_h, g1, _ = _story_terms((hi - lo) * t)
+    h = np.exp(log_h)
+    
+    log_sf = -lo * t + np.log1p(lo * t * h)
+    
+    exp_t = np.exp(-lo * t)
+    d_sf = np.array([
+        lo * t * exp_t * (h - 1 - lo * t * h * (1 - g1)),
+        -hi * lo * t**2 * exp_t * h * g1
+        ])
+    
+    # Bin probabilities are differences of S, derivatives back in the 
+    # order of the parameters
+    d_probs = -np.diff(d_sf, axis = 1)
+    if swap:
+        d_probs = d_probs[::-1]
+    
+    return _binned_derivs(_binned_probs(-np.expm1(log_sf), np.exp(log_sf)), d_probs, 
+                          counts)
+
+
+def log_likelihood_gamma_binned(edges, counts, params):
+    """
+    Calculate the log likelihood of the gamma distribution for binned 
+    (interval-censored) data, e.g. the output of `bin_times`.
+    
+    Parameters
+    ----------
+    edges : array
+        Edges of the contiguous bins, one more than the number of bins.
+    
+    counts : array
+        Number of measurements in every bin.
+    
+    params : tuple of floats 
+        Format (alpha, beta)
+        Tuple containing the parameter values
+    
+    Returns 
+    -------
+    log_likelihood : float
+        Sum over the occupied bins of the counts times the log of the 
+        probability of the bin, with the CDF evaluated once per bin edge.
+    """
+    
+    alpha, beta = params
+    
+    if alpha <= 0 or beta <= 0:
+        return -np.inf
+    
+    x = beta * np.asarray(edges, dtype = float)
+    probs = _binned_probs(scipy.special.gammainc(alpha, x), 
+                          scipy.special.gammaincc(alpha, x))
+    
+    return _binned_derivs(probs, np.empty((0, len(probs))), counts)[0]
+
+
+def model_log_likelihood_binned(params, edges, counts):
+    """
+    Calculate the log likelihood of the story model for binned 
+    (interval-censored) data, e.g. the output of `bin_times`.
+    
+    The survival function is evaluated in the form
+    
+        S(t) = exp(-lo t) (1 + lo t (1 - exp(-x)) / x),    x = (hi - lo) t
+    
+    which is symmetric in the rates and takes its Gamma(2) limit for equal
+    rates.
+    
+    Parameters
+    ----------
+    params : tuple of floats 
+        Format (beta1, beta2)
+        Tuple containing the parameter values
+    
+    edges : array
+        Edges of the contiguous bins, one more than the number of bins.
+    
+    counts : array
+        Number of measurements in every bin.
+    
+    Returns 
+    -------
+    log_likelihood : float
+        Sum over the occupied bins of the counts times the log of the 
+        probability of the bin, with the CDF evaluated once per bin edge.
+    """
+    
+    beta1, beta2 = params
+    
+    if beta1 <= 0 or beta2 <= 0:
+        return -np.inf
+    
+    return _model_binned_derivs(np.asarray(params, dtype = float), edges, counts)[0]
+
+
+def _mle_binned(derivs, edges, counts, x0, method):
+    """
+    Maximize a binned log likelihood over the logs of the two parameters 
+    with `scipy.optimize.minimize`. `derivs(params, edges, counts)` returns
+    the log likelihood and its gradient in the log parameters, the 
+    gradient being handed over to all but the derivative-free methods. The
+    OptimizeResult has `x` back in parameter space and `fun` is the 
+    negative log likelihood.
+    """
+    
+    # Both quantities come from one evaluation, keeping the last one
+    cache = {}
+    
+    def evaluate(log_params):
+        key = tuple(log_params)
+        if key not in cache:
+            log_likelihood, grad = derivs(np.exp(log_params), edges, counts)
+            cache.clear()
+            cache[key] = -log_likelihood, -grad
+        return cache[key]
+    
+    options = {"options" : {"xatol" : 1e-8, "fatol" : 1e-8}} if method == "Nelder-Mead" else {}
+    if method not in _derivative_free_methods:
+        options["jac"] = lambda log_params: evaluate(log_params)[1]
+    
+    # Warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        
+        res = scipy.optimize.minimize(
+            fun = lambda log_params: evaluate(log_params)[0],
+            x0 = np.log(x0),
+            method = method,
+            **options
+        )
+    
+    res.x = np.exp(res.x)
+    
+    return res
+
+
+def _bin_midpoints(edges, counts):
+    """
+    Midpoints of the occupied bins and their counts, to start the binned 
+    fits from the fit that treats the times as exact.
+    """
+    
+    edges = np.asarray(edges, dtype = float)
+    counts = np.asarray(counts)
+    occupied = counts > 0
+    
+    return ((edges[:-1] + edges[1:]) / 2)[occupied], counts[occupied]
+
+
+def mle_iid_gamma_binned(edges, counts, method = "L-BFGS-B", x0 = None, full_output = False):
+    """
+    Function to calculate the MLE values of the gamma distribution for 
+    binned (interval-censored) data.
+    
+    Parameters
+    ----------
+    edges : array
+        Edges of the contiguous bins, see `bin_times`.
+    
+    counts : array
+        Number of measurements in every bin.
+    
+    method : string, default "L-BFGS-B"
+        Optimizer passed to `scipy.optimize.minimize`, working on 
+        (log alpha, log beta) with the gradient of `_gamma_binned_derivs`
+        unless it is derivative-free.
+    
+    x0 : tuple of floats, default None
+        Starting point (alpha, beta). Default is the MLE of the bin 
+        midpoints treated as exact times.
+    
+    full_output : bool, default False
+        If True, a failed fit does not raise an error and the 
+        `scipy.optimize.OptimizeResult` of the fit is returned as well.
+    
+    Returns
+    -------
+    return_array : array 
+        [alpha, beta, log likelihood], the log likelihood being the binned
+        one.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+    """
+    
+    if x0 is None:
+        midpoints, occupied_counts = _bin_midpoints(edges, counts)
+        x0 = mle_iid_gamma(midpoints, counts = occupied_counts)[:2]
+    
+    res = _mle_binned(_gamma_binned_derivs, edges, counts, x0, method)
+    
+    return _binned_output(res, full_output)
+
+
+def mle_model_binned(edges, counts, method = "L-BFGS-B", x0 = None, full_output = False):
+    """
+    Function to calculate the MLE values of the story model for binned 
+    (interval-censored) data.
+    
+    Parameters
+    ----------
+    edges : array
+        Edges of the contiguous bins, see `bin_times`.
+    
+    counts : array
+        Number of measurements in every bin.
+    
+    method : string, default "L-BFGS-B"
+        Optimizer passed to `scipy.optimize.minimize`, working on 
+        (log beta1, log beta2) with the gradient of `_model_binned_derivs`
+        unless it is derivative-free.
+    
+    x0 : tuple of floats, default None
+        Starting point (beta1, beta2). Default is the method of moments 
+        estimate of the bin midpoints treated as exact times.
+    
+    full_output : bool, default False
+        If True, a failed fit does not raise an error and the 
+        `scipy.optimize.OptimizeResult` of the fit is returned as well.
+    
+    Returns
+    -------
+    return_array : array 
+        [beta1, beta2, log likelihood] with beta1 <= beta2, the log 
+        likelihood being the binned one.
+    
+    res : scipy.optimize.OptimizeResult
+        Only returned if `full_output` is True.
+    """
+    
+    if x0 is None:
+        midpoints, occupied_counts = _bin_midpoints(edges, counts)
+        x0 = _model_start(midpoints[None, :], occupied_counts[None, :])[0]
+    
+    # Off the equal-rate line, where the gradient is symmetric
+    x0 = _split_rates(np.atleast_2d(np.asarray(x0, dtype = float)))[0]
+    
+    res = _mle_binned(_model_binned_derivs, edges, counts, x0, method)
+    res.x = np.sort(res.x)
+    
+    return _binned_output(res, full_output)
+
+
+def _binned_output(res, full_output):
+    """
+    Output of the binned MLE functions, raising on a failed fit like 
+    `mle_model`.
+    """
+    
+    if res.success or full_output:
+        return_array = [res.x[0], res.x[1], -res.fun]
+        
+        if full_output:
+            return return_array, res
+        
+        return return_array
+    
+    raise RuntimeError('Convergence failed with message', res.message)
+
+
+def draw_bs_reps_binned(mle_fun, edges, counts, size = 1, progress_bar = False, 
+                        batch_size = 1000, warm_start = None, on_failure = "raise",
+                        return_diagnostics = False):
+    """
+    Draw nonparametric bootstrap replicates of a binned MLE.
+    
+    Every replicate is drawn as multinomial counts of the measurements 
+    over the bins, so a fit only ever sees the bin counts and its cost is 
+    proportional to the number of bins.
+    
+    Parameters
+    ----------
+    mle_fun : function
+        `mle_iid_gamma_binned` or `mle_model_binned`, or any function 
+        taking (edges, counts).
+    
+    edges : array
+        Edges of the contiguous bins, see `bin_times`.
+    
+    counts : array
+        Number of measurements in every bin.
+    
+    size : int, default 1
+        Number of bootstrap replicates to draw.
+    
+    progress_bar : bool, default False
+        Whether or not to display progress bar.
+    
+    batch_size : int, default 1000
+        Number of replicates whose counts are held in memory at once.
+    
+    warm_start : None or "mle", default None
+        If "mle", every replicate starts from the binned MLE of the 
+        original counts. Otherwise from the fit of its bin midpoints.
+    
+    on_failure : "raise", "retry" or "nan", default "raise"
+        Failure policy, see `draw_bs_reps_mle`.
+    
+    return_diagnostics : bool, default False
+        Whether or not to also return the per-replicate diagnostics.
+
+    Returns
+    -------
+    output : numpy array
+        (size, 3) array of bootstrap replicates of the parameters and the 
+        binned log likelihood.
+    
+    diagnostics : dict
+        Only returned if `return_diagnostics` is True, see `draw_bs_reps_mle`.
+    """
+    
+    edges = np.asarray(edges, dtype = float)
+    counts = np.asarray(counts)
+    
+    n = np.sum(counts)
+    probs = counts / n
+    
+    if warm_start not in (None, "mle"):
+        raise ValueError("warm_start must be None or 'mle' for binned data.")
+    
+    # Shared starting point of the replicates
+    x0 = None if warm_start is None else np.asarray(mle_fun(edges, counts)[:-1], dtype = float)
+    _check_on_failure(mle_fun, on_failure)
+    
+    # Looked up once for the whole run
+    full_output = _has_full_output(mle_fun)
+    
+    def run_chunk(n_chunk):
+        
+        # Resampled counts of every bin
+        counts_block = samplers.rg.multinomial(n, probs, size = n_chunk)
+        
+        return _fit_block(mle_fun, edges, (), warm_start, x0, on_failure, 
+                          full_output = full_output, counts = counts_block)
+    
+    fits = _run_chunks(run_chunk, size, batch_size, progress_bar, meta = {})
+    
+    res_mles, diagnostics = _collect_fits(*fits)
+    
+    if return_diagnostics:
+        return res_mles, diagnostics
+    
+    return res_mles
+
+
+def akaike_information_criterion(log_likelihood, num_params):
+    """
+    Calculate the Akaike Information Criterion for a log-likelihood for a given number of parameters.
+    
+    Parameters
+    ----------
+    log_likelihood : float or array_like
+        log-likelihood evaluated for a particular set of parameter values,
+        or an array of them, e.g. one per bootstrap replicate
+        
+    num_params : int or array_like
+        Number of parameters in the model, broadcast against `log_likelihood`.
+    
+    Returns
+    -------
+    akaike_information_criterion : float or numpy array
+        The Akaike Information Criterion
+        
+        Calculated as:
+        
+        ((log-likelihood) * (- 2)) + (2 * num_params)
+    """
+    
+    aic = ((np.asarray(log_likelihood)) * (- 2)) + (2 * np.asarray(num_params))
+    
+    return aic
+
+
+def akaike_weights(aic, axis = 0):
+    """
+    Calculate the Akaike weights of competing models from their AIC values.
+    
+    Parameters
+    ----------
+    aic : array_like
+        AIC values, with the models along `axis`. Any other axes, e.g. 
+        bootstrap replicates or concentrations, are handled independently.
+        
+    axis : int
+        Axis of the models.
+        Default : 0
+    
+    Returns
+    -------
+    weights : numpy array
+        Array of the shape of `aic`, summing to 1 along `axis`. Calculated 
+        as exp(-ΔAIC / 2) normalized over the models, with ΔAIC the 
+        difference to the smallest AIC. Models with a NaN AIC (failed fits) 
+        get a NaN weight and are left out of the others' normalization.
+    """
+    
+    aic = np.asarray(aic, dtype = float)
+    
+    # Differences to the best model, ignoring the failed fits
+    best = np.min(np.where(np.isnan(aic), np.inf, aic), axis = axis, keepdims = True)
+    
+    with np.errstate(invalid = "ignore"):
+        weights = np.exp(- (aic - best) / 2)
+        weights = weights / np.nansum(weights, axis = axis, keepdims = True)
+    
+    return weights
+
+
+
+
+# Batched counterparts of the MLE functions, used for blocks of replicates
+_batch_mle_functions.update({
+    "mle_iid_gamma" : mle_iid_gamma_batch,
+    "mle_model" : mle_model_batch,
+    })
+
+# Sufficient statistics fits of blocks of count replicates
+_sufficient_stats_fitters.update({
+    "mle_iid_gamma" : _fit_counts_block,
+    })
+
+# Method of moments estimates of the MLE functions, used for warm starts
+_mom_functions.update({
+    "mle_iid_gamma" : mom_iid_gamma,
+    "mle_model" : mom_model,
+    "mle_model_profile" : mom_model,
+    "mle_model_multistart" : mom_model,
+    })
+
+# Batched leave-one-out fits of the MLE functions
+_jackknife_functions = {
+    "mle_iid_gamma" : jackknife_gamma,
+    "mle_model" : jackknife_model,
+    "mle_model_profile" : jackknife_model,
+    "mle_model_multistart" : jackknife_model,
+    }
+
+# Simulators of the models, used for the parametric bootstrap
+_parametric_samplers = {
+    "mle_iid_gamma" : _draw_gamma_block,
+    "mle_model" : _draw_model_block,
+    "mle_model_profile" : _draw_model_block,
+    "mle_model_multistart" : _draw_model_block,
+    }
+
+# Number of free parameters of the models, used for the AIC
+_num_params = {
+    "mle_iid_gamma" : 2,
+    "mle_model" : 2,
+    "mle_model_profile" : 2,
+    "mle_model_multistart" : 2,
+    "mle_iid_gamma_binned" : 2,
+    "mle_model_binned" : 2,
+    }
+
+
+def _draw_bs_reps(mle_function, data, size, progress_bar, batch_size, sufficient_stats,
+                  n_jobs, seed, warm_start, on_failure, checkpoint = None, 
+                  checkpoint_every = 1000, resume = False, checkpoint_key = "bootstrap",
+                  counter_seed = None, rng_labels = (), replicate_offset = 0,
+                  parametric = False, sampler = "ordinary", fitter = "scalar"):
+    """
+    Dispatch the bootstrap to the sufficient statistics or parametric path 
+    if requested. Returns the replicates and their diagnostics.
+    """
+    
+    if parametric:
+        
+        if (sufficient_stats or n_jobs is not None or counter_seed is not None
+                or sampler != "ordinary"):
+            raise ValueError("sufficient_stats, n_jobs, counter_seed and sampler are "
+                             "not available with parametric.")
+        
+        return draw_parametric_bs_reps_mle(
+            mle_function, 
+            data, 
+            size = size, 
+            progress_bar = progress_bar,
+            batch_size = 1000 if batch_size is None else batch_size,
+            warm_start = warm_start,
+            on_failure = on_failure,
+            return_diagnostics = True,
+            checkpoint = checkpoint,
+            checkpoint_every = checkpoint_every,
+            resume = resume,
+            checkpoint_key = checkpoint_key,
+            fitter = fitter
+            )
+    
+    if sufficient_stats:
+        
+        # Only the gamma model is described by these sufficient statistics
+        if mle_function.__name__ != mle_iid_gamma.__name__:
+            raise ValueError("sufficient_stats is only available for mle_iid_gamma.")
+        
+        return draw_bs_reps_gamma_suff(
+            data, 
+            size = size, 
+            progress_bar = progress_bar,
+            batch_size = 1000 if batch_size is None else batch_size,
+            warm_start = warm_start,
+            on_failure = on_failure,
+            return_diagnostics = True,
+            checkpoint = checkpoint,
+            checkpoint_every = checkpoint_every,
+            resume = resume,
+            checkpoint_key = checkpoint_key,
+            counter_seed = counter_seed,
+            rng_labels = rng_labels,
+            replicate_offset = replicate_offset,
+            sampler = sampler
+            )
+    
+    return draw_bs_reps_mle(
+        mle_function, 
+        data,
+        size = size, 
+        progress_bar = progress_bar,
+        batch_size = batch_size,
+        n_jobs = n_jobs,
+        seed = seed,
+        warm_start = warm_start,
+        on_failure = on_failure,
+        return_diagnostics = True,
+        checkpoint = checkpoint,
+        checkpoint_every = checkpoint_every,
+        resume = resume,
+        checkpoint_key = checkpoint_key,
+        counter_seed = counter_seed,
+        rng_labels = rng_labels,
+        replicate_offset = replicate_offset,
+        sampler = sampler,
+        fitter = fitter
+        )
+
+
+      
+def _aic_result(function_name, bs_reps, diagnostics, on_failure):
+    """
+    Result container of the replicates returned by `bootstrap_aic`.
+    """
+    
+    bs_reps = np.asarray(bs_reps, dtype = float).reshape(-1, 3)
+    
+    # Calculating the AIC values for all these bootstrapped log likelihoods
+    aic_values = akaike_information_criterion(
+        bs_reps[:, 2], _num_params.get(function_name, bs_reps.shape[1] - 1)
+        )
+    
+    result = BootstrapResult(
+        len(bs_reps), 
+        ["Param1_MLE", "Param2_MLE", "Log-Likelihood", "AIC Value"],
+        diagnostics = on_failure != "raise"
+        )
+    
+    result.append(np.column_stack((bs_reps, aic_values)), {"MLE Function" : function_name}, 
+                  diagnostics)
+    
+    return result
+
+
+def _concentration_result(function_name, n_rows, on_failure):
+    """
+    Empty result container for `n_rows` replicates of 
+    `compare_concentrations`.
+    """
+    
+    # If it is our Gamma Distribution we use Alpha and Beta as parameter names
+    if function_name == mle_iid_gamma.__name__:
+        float_columns = ["Alpha_MLE", "Beta_MLE", "Log-Likelihood"]
+    else:
+        float_columns = ["Param1_MLE", "Param2_MLE", "Log-Likelihood"]
+    
+    return BootstrapResult(
+        n_rows, 
+        float_columns, 
+        categorical_columns = ["Concentration (uM)", "MLE Function"],
+        diagnostics = on_failure != "raise"
+        )
 
       
-def bootstrap_aic(mle_function, data, size, progress_bar = True):
+def bootstrap_aic(mle_function, data, size, progress_bar = True, batch_size = None,
+                  sufficient_stats = False, n_jobs = None, seed = None, warm_start = None,
+                  on_failure = "raise", checkpoint = None, checkpoint_every = 1000, 
+                  resume = False, tol = None, percentiles = (2.5, 97.5), max_time = None,
+                  counter_seed = None, parametric = False, sampler = "ordinary",
+                  as_frame = True, fitter = "scalar"):
     """
     Function to calculate the MLE parameters for bootstrapped data and calculate the AIC.
     
@@ -323,12 +3468,103 @@ def bootstrap_aic(mle_function, data, size, progress_bar = True):
     progress_bar : Boolean
         Whether or not to show the progress bar.
         Default : True
+    
+    batch_size : int or None
+        Number of replicates resampled per chunk, see `draw_bs_reps_mle`.
+        Default : None (one resample per replicate)
+    
+    sufficient_stats : Boolean
+        Only used with `mle_iid_gamma`. If True the replicates are drawn as
+        multinomial counts and fit from their sufficient statistics, see
+        `draw_bs_reps_gamma_suff`.
+        Default : False
+    
+    n_jobs : int or None
+        Number of worker processes, see `draw_bs_reps_mle`.
+        Default : None (serial)
+    
+    seed : int or None
+        Seed for the parallel bootstrap, see `draw_bs_reps_mle`.
+        Default : None
+    
+    warm_start : None, "mle" or "mom"
+        Starting point of every replicate fit, see `draw_bs_reps_mle`.
+        Default : None
+    
+    on_failure : "raise", "retry" or "nan"
+        What to do with replicates that fail to converge, see 
+        `draw_bs_reps_mle`. Unless "raise", the DataFrame gets the 
+        per-replicate "Status", "nfev" and "Message" columns.
+        Default : "raise"
+    
+    checkpoint : string or None
+        Path of a .npz file to periodically save the completed replicates 
+        and the random number generator state to, see `draw_bs_reps_mle`.
+        Default : None
+    
+    checkpoint_every : int
+        Minimum number of new replicates between two checkpoints.
+        Default : 1000
+    
+    resume : Boolean
+        Whether or not to continue from the replicates in `checkpoint`. The
+        result is identical to an uninterrupted run.
+        Default : False
+    
+    tol : float or None
+        If given, the bootstrap is adaptive: replicates are drawn in batches
+        of `batch_size` (1000 if None) until the Monte Carlo standard error 
+        of every one of `percentiles` is at most `tol` times the bootstrap 
+        standard deviation, and `size` is the maximum number of replicates,
+        see `draw_bs_reps_mle_adaptive`. Not available with `checkpoint`.
+        Default : None
+    
+    percentiles : array_like
+        Percentiles whose precision is tracked in the adaptive bootstrap.
+        Default : (2.5, 97.5)
+    
+    max_time : float or None
+        Time budget in seconds of the adaptive bootstrap.
+        Default : None
+    
+    counter_seed : int or None
+        If given, every replicate is drawn from its own counter-based stream
+        keyed by the seed and the name of `mle_function`, see 
+        `draw_bs_reps_mle`. Replicate k can then be recomputed with
+        `draw_bs_replicate(mle_function, data, k, counter_seed, 
+        (mle_function.__name__,))`, passing the same `warm_start`, 
+        `on_failure`, `fitter` and `sufficient_stats`.
+        Default : None
+    
+    parametric : Boolean
+        If True, the replicates are data sets simulated from the model 
+        fitted to `data` instead of resamples of it, see 
+        `draw_parametric_bs_reps_mle`. Available for `mle_iid_gamma` and 
+        `mle_model`, with a default `batch_size` of 1000.
+        Default : False
+    
+    sampler : "ordinary", "balanced" or "antithetic"
+        Resampling scheme, see `draw_bs_reps_mle`. Not available with `tol`.
+        Default : "ordinary"
+    
+    as_frame : Boolean
+        Whether to return a pandas DataFrame or the columnar 
+        `BootstrapResult` it is made from, which uses less memory and can be
+        converted later with `.to_pandas()`.
+        Default : True
+    
+    fitter : "scalar" or "batched"
+        Whether every replicate is fit with `mle_function` or whole chunks 
+        with its batched version, see `draw_bs_reps_mle`.
+        Default : "scalar"
         
     Returns
     -------
-    df_mle : pandas DataFrame
+    df_mle : pandas DataFrame or BootstrapResult
         DataFrame containing the parameters, log-likelihood, and AIC for 
-        every bootstrapped sample.
+        every bootstrapped sample. If the run is stopped with Ctrl-C, only 
+        the replicates completed so far. For an adaptive bootstrap, the 
+        precision achieved is reported in `df_mle.attrs["precision"]`.
         
     """
     
@@ -336,38 +3572,109 @@ def bootstrap_aic(mle_function, data, size, progress_bar = True):
     function_name = mle_function.__name__
     
     # Get all the MLE information
-    bs_reps = draw_bs_reps_mle(
-        mle_function, 
-        data,
-        size = size, 
-        progress_bar = progress_bar
-    )
+    if tol is None:
+        bs_reps, diagnostics = _draw_bs_reps(
+            mle_function, 
+            data,
+            size = size, 
+            progress_bar = progress_bar,
+            batch_size = batch_size,
+            sufficient_stats = sufficient_stats,
+            n_jobs = n_jobs,
+            seed = seed,
+            warm_start = warm_start,
+            on_failure = on_failure,
+            checkpoint = checkpoint,
+            checkpoint_every = checkpoint_every,
+            resume = resume,
+            checkpoint_key = function_name,
+            counter_seed = counter_seed,
+            rng_labels = (function_name,),
+            parametric = parametric,
+            sampler = sampler,
+            fitter = fitter
+        )
     
+    # Adaptive bootstrap, stopping when the percentiles are precise enough
+    else:
+        if checkpoint is not None or sampler != "ordinary":
+            raise ValueError("checkpoint and sampler are not available with tol.")
+        
+        def draw_batch(n_batch, i):
+            return _draw_bs_reps(
+                mle_function, 
+                data,
+                size = n_batch, 
+                progress_bar = False,
+                batch_size = batch_size,
+                sufficient_stats = sufficient_stats,
+                n_jobs = n_jobs,
+                seed = None if seed is None else [seed, i],
+                warm_start = warm_start,
+                on_failure = on_failure,
+                counter_seed = counter_seed,
+                rng_labels = (function_name,),
+                replicate_offset = i * adaptive_batch,
+                parametric = parametric,
+                fitter = fitter
+            )
+        
+        adaptive_batch = 1000 if batch_size is None else batch_size
+        
+        bs_reps, diagnostics, precision = _adaptive_bootstrap(
+            draw_batch, 
+            size, 
+            adaptive_batch, 
+            percentiles, 
+            tol, 
+            max_time, 
+            progress_bar
+        )
     
-    # Creating a DataFrame to store all these values
-    df_mle = pd.DataFrame(bs_reps)
-    df_mle.columns = ["Param1_MLE", "Param2_MLE", "Log-Likelihood"]
     
-    # Extracting the log likelihood values 
-    log_likelihood = df_mle["Log-Likelihood"].values
+    result = _aic_result(function_name, bs_reps, diagnostics, on_failure)
     
-    # Calculating the AIC values for all these bootstrapped log likelihoods
-    aic_values = akaike_information_criterion(log_likelihood, 2)
+    # Reporting the precision of the adaptive bootstrap
+    if tol is not None:
+        result.attrs["precision"] = precision
+    
+    if as_frame:
+        return result.to_pandas()
+    
+    return result
+        
+
+def _split_concentrations(df_tidy):
+    """
+    Split the times to catastrophe of a tidy DataFrame by concentration in 
+    one pass. Returns the sorted concentrations and a list with the times 
+    of each, in their order in the DataFrame. The rows of a tie-compressed
+    DataFrame (see `compress_tidy`) are repeated by their "Count", so it 
+    gives the same times as the full DataFrame sorted by time.
+    """
     
-    # Adding this to the DataFrame
-    df_mle["AIC Value"] = aic_values
+    conc = df_tidy["Concentration (uM)"].values
+    times = df_tidy["Time to Catastrophe (s)"].values
     
-    # Just for good measure we will add the name of the MLE Function to the DataFrame as well
-    df_mle["MLE Function"] = [function_name] * size
+    # Expanding the distinct times of a compressed DataFrame
+    if "Count" in df_tidy.columns:
+        counts = df_tidy["Count"].values
+        conc, times = np.repeat(conc, counts), np.repeat(times, counts)
     
-    # Moving the position of the MLE Function Column 
-    col = df_mle.pop("MLE Function")
-    df_mle.insert(0, col.name, col)
+    # A stable sort makes every concentration a contiguous block
+    order = np.argsort(conc, kind = "stable")
+    unique_conc, starts = np.unique(conc[order], return_index = True)
     
-    return df_mle
-        
+    conc_data = np.split(times[order], starts[1:])
+    
+    return unique_conc.tolist(), conc_data
 
-def compare_concentrations(mle_function, df_tidy, size, progress_bar = True):
+
+def compare_concentrations(mle_function, df_tidy, size, progress_bar = True,
+                           batch_size = None, sufficient_stats = False, warm_start = None,
+                           on_failure = "raise", checkpoint = None, checkpoint_every = 1000,
+                           resume = False, counter_seed = None, sampler = "ordinary",
+                           as_frame = True, n_jobs = None, fitter = "scalar"):
     """
     Function to calculate the MLE parameters for bootstrapped data and calculate the AIC.
     Does so for every concentration value provided in the tidy DataFrame. 
@@ -380,6 +3687,8 @@ def compare_concentrations(mle_function, df_tidy, size, progress_bar = True):
         
     df_tidy : pandas DataFrame
         DataFrame containing the concentration vs time to catastrophe data.
+        A tie-compressed DataFrame (see `compress_tidy`) is expanded by its
+        "Count" column.
     
     size : int
         The number of bootstrap samples to draw
@@ -387,65 +3696,623 @@ def compare_concentrations(mle_function, df_tidy, size, progress_bar = True):
     progress_bar : Boolean
         Whether or not to show the progress bar.
         Default : True
+    
+    batch_size : int or None
+        Number of replicates resampled per chunk, see `draw_bs_reps_mle`.
+        Default : None (one resample per replicate)
+    
+    sufficient_stats : Boolean
+        Only used with `mle_iid_gamma`. If True the replicates are drawn as
+        multinomial counts and fit from their sufficient statistics, see
+        `draw_bs_reps_gamma_suff`.
+        Default : False
+    
+    warm_start : None, "mle" or "mom"
+        Starting point of every replicate fit, see `draw_bs_reps_mle`. With
+        "mle" every concentration is warm-started from its own MLE.
+        Default : None
+    
+    on_failure : "raise", "retry" or "nan"
+        What to do with replicates that fail to converge, see 
+        `bootstrap_aic`.
+        Default : "raise"
+    
+    checkpoint : string or None
+        Path of a .npz file to periodically save the completed replicates 
+        of all the concentrations and the random number generator state to.
+        Default : None
+    
+    checkpoint_every : int
+        Minimum number of new replicates between two checkpoints.
+        Default : 1000
+    
+    resume : Boolean
+        Whether or not to continue from the replicates in `checkpoint`. The
+        result is identical to an uninterrupted run.
+        Default : False
+    
+    counter_seed : int or None
+        If given, every replicate is drawn from its own counter-based stream
+        keyed by the seed, the name of `mle_function` and the concentration,
+        see `draw_bs_reps_mle`. Each concentration then gets the same 
+        replicates whatever the other concentrations are.
+        Default : None
+    
+    sampler : "ordinary", "balanced" or "antithetic"
+        Resampling scheme, see `draw_bs_reps_mle`.
+        Default : "ordinary"
+    
+    as_frame : Boolean
+        Whether to return a pandas DataFrame or a `BootstrapResult`, see 
+        `bootstrap_aic`.
+        Default : True
+    
+    n_jobs : int or None
+        If given, the concentrations are bootstrapped in parallel on a pool
+        of `n_jobs` worker processes (-1 for all the cores). Every 
+        concentration then uses the counter-based streams of `counter_seed`
+        (drawn from the module random number generator if None), so the
+        output does not depend on the number of workers and equals a serial
+        run with the same `counter_seed`. Not available with `checkpoint`.
+        Default : None (serial)
+    
+    fitter : "scalar" or "batched"
+        Whether every replicate is fit with `mle_function` or whole chunks 
+        with its batched version, see `draw_bs_reps_mle`.
+        Default : "scalar"
         
     Returns
     -------
-    df_mle : pandas DataFrame
+    df_mle : pandas DataFrame or BootstrapResult
         DataFrame containing the parameters, log-likelihood, and AIC for 
-        every bootstrapped sample for every concentration.
+        every bootstrapped sample for every concentration. If the run is 
+        stopped with Ctrl-C, only the replicates completed so far.
         
     """
     
-    # Finding the number of unique concentrations
-    unique_conc = (np.unique(df_tidy["Concentration (uM)"])).tolist()
+    _check_n_jobs(n_jobs)
+    if n_jobs is not None and checkpoint is not None:
+        raise ValueError("checkpoint is not available with n_jobs.")
+    
+    function_name = mle_function.__name__
+    
+    # Splitting the data by concentration in one pass
+    unique_conc, conc_data = _split_concentrations(df_tidy)
     
-    # Creating a large DataFrame to save all the values
-    df_mle = pd.DataFrame()
+    # Allocating the results of all the concentrations at once
+    result = _concentration_result(function_name, size * len(unique_conc), on_failure)
+    
+    # Settings shared by the bootstraps of all the concentrations
+    bs_kwargs = dict(
+        size = size, 
+        batch_size = batch_size,
+        sufficient_stats = sufficient_stats,
+        n_jobs = None,
+        seed = None,
+        warm_start = warm_start,
+        on_failure = on_failure,
+        sampler = sampler,
+        fitter = fitter
+        )
     
     # Looping over every concentration
-    for i, j in enumerate(unique_conc):
+    if n_jobs is None:
+        for j, data in zip(unique_conc, conc_data):
+            
+            # Drawing bootstrap replicates and calculating MLEs for parameters    
+            bs_reps, diagnostics = _draw_bs_reps(
+                mle_function, 
+                data,
+                progress_bar = progress_bar,
+                checkpoint = checkpoint,
+                checkpoint_every = checkpoint_every,
+                resume = resume,
+                checkpoint_key = function_name + "_" + str(j),
+                counter_seed = counter_seed,
+                rng_labels = (function_name, j),
+                **bs_kwargs
+            )
+            
+            # Filling in the rows of this concentration
+            result.append(bs_reps, {"Concentration (uM)" : j, 
+                                    "MLE Function" : function_name}, diagnostics)
+            
+            # The run was interrupted
+            if len(bs_reps) < size:
+                break
+    
+    # One job per concentration on a process pool
+    else:
         
-        # Getting all the data values for said concentration
-        conc_data = (
-            df_tidy.loc[df_tidy["Concentration (uM)"] == j, "Time to Catastrophe (s)"]
-            ).values
+        # Taking the entropy from the module generator keeps runs reproducible
+        if counter_seed is None:
+            counter_seed = int(samplers.rg.integers(2**63))
         
-        # Drawing bootstrap replicates and calculating MLEs for parameters    
-        bs_reps = draw_bs_reps_mle(
-            mle_function, 
-            conc_data,
-            size = size, 
-            progress_bar = True
-        )
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
         
-        # Creating a DataFrame to store all these values
-        df_rep = pd.DataFrame(bs_reps)
+        fits = [None] * len(unique_conc)
         
-        # If it is our Gamma Distribution
-        if mle_function.__name__ == mle_iid_gamma.__name__:
-            # We use Alpha and Beta as parameter names in the df_mle
-            df_rep.columns = ["Alpha_MLE", "Beta_MLE", "Log-Likelihood"]
+        if progress_bar:
+            pbar = tqdm.tqdm(total = size * len(unique_conc))
+        
+        with concurrent.futures.ProcessPoolExecutor(max_workers = n_jobs) as executor:
+            futures = {
+                executor.submit(
+                    _draw_bs_reps, mle_function, data, progress_bar = False,
+                    counter_seed = counter_seed, rng_labels = (function_name, j), 
+                    **bs_kwargs
+                    ) : i
+                for i, (j, data) in enumerate(zip(unique_conc, conc_data))
+                }
             
+            # Collecting the concentrations as they finish
+            for future in concurrent.futures.as_completed(futures):
+                fits[futures[future]] = future.result()
+                if progress_bar:
+                    pbar.update(size)
+        
+        if progress_bar:
+            pbar.close()
+        
+        # Filling in the rows in the order of the concentrations
+        for j, (bs_reps, diagnostics) in zip(unique_conc, fits):
+            result.append(bs_reps, {"Concentration (uM)" : j, 
+                                    "MLE Function" : function_name}, diagnostics)
+    
+    result.trim()
+    
+    if as_frame:
+        return result.to_pandas()
+    
+    return result
+
+
+def _paired_chunk_runner(mle_functions, data, warm_start, on_failure, counter_seed, labels,
+                         fitter = "scalar"):
+    """
+    Return `run_chunk(n_chunk)`, which draws the resamples of `n_chunk` 
+    replicates once and fits every model on them. Each entry of the four 
+    lists of `_fit_block` is then a tuple with one item per model.
+    """
+    
+    data = np.asarray(data)
+    n = len(data)
+    next_replicate = [0]
+    
+    x0s = [_warm_start_x0(mle_fun, data, (), warm_start) for mle_fun in mle_functions]
+    full_outputs = [_has_full_output(mle_fun) for mle_fun in mle_functions]
+    
+    def run_chunk(n_chunk):
+        
+        # The same resamples for all the models
+        if counter_seed is None:
+            inds = draw_bs_indices(n, n_chunk)
         else:
-            # Generic Column names
-            df_rep.columns = ["Param1_MLE", "Param2_MLE", "Log-Likelihood"]
+            inds = draw_bs_indices_counter(
+                n, counter_seed, range(next_replicate[0], next_replicate[0] + n_chunk), 
+                labels
+                )
+        next_replicate[0] = next_replicate[0] + n_chunk
         
-        # Just for good measure we will add the name of the MLE Function to the DataFrame as well
-        df_rep["MLE Function"] = [mle_function.__name__] * size
+        model_fits = [
+            _fit_indices(mle_fun, data, inds, (), warm_start, x0, on_failure, 
+                         fitter = fitter, full_output = full_output)
+            for mle_fun, x0, full_output in zip(mle_functions, x0s, full_outputs)
+            ]
+        
+        return [list(zip(*[fits[c] for fits in model_fits])) for c in range(4)]
+    
+    return run_chunk
 
-        # Moving the position of the MLE Function Column 
-        col = df_rep.pop("MLE Function")
-        df_rep.insert(0, col.name, col)
+
+def paired_bootstrap_aic(mle_functions, data, size, progress_bar = True, batch_size = 1000,
+                         warm_start = None, on_failure = "raise", counter_seed = None,
+                         as_frame = True, fitter = "scalar"):
+    """
+    Function to compare models on the same bootstrapped data with the AIC.
+    
+    Every replicate resamples the data once and fits all the models to that
+    resample, so the models are compared pair by pair instead of between 
+    independent bootstraps: the resampling is shared, and the ΔAIC and 
+    Akaike weights of a replicate are not blurred by the differences 
+    between two resamples.
+    
+    Parameters
+    -----------
+    mle_functions : list of functions
+        Functions to use to calculate the MLE of the data, one per model.
+        
+    data : array or pandas DataFrame
+        Array containing the data, or a tidy DataFrame to compare the models
+        at every concentration. A tie-compressed DataFrame (see 
+        `compress_tidy`) is expanded by its "Count" column.
+    
+    size : int
+        The number of bootstrap samples to draw (per concentration).
+    
+    progress_bar : Boolean
+        Whether or not to show the progress bar.
+        Default : True
+    
+    batch_size : int
+        Number of replicates resampled per chunk.
+        Default : 1000
+    
+    warm_start : None, "mle" or "mom"
+        Starting point of every replicate fit, see `draw_bs_reps_mle`.
+        Default : None
+    
+    on_failure : "raise", "retry" or "nan"
+        What to do with replicates that fail to converge, see 
+        `bootstrap_aic`. The failed fits get NaN AIC values and weights.
+        Default : "raise"
+    
+    counter_seed : int or None
+        If given, every replicate is drawn from its own counter-based stream
+        keyed by the seed (and the concentration), see `draw_bs_reps_mle`.
+        Default : None
+    
+    as_frame : Boolean
+        Whether to return a pandas DataFrame or a `BootstrapResult`, see 
+        `bootstrap_aic`.
+        Default : True
+    
+    fitter : "scalar" or "batched"
+        Whether every replicate is fit with the MLE functions or whole 
+        chunks with their batched versions, see `draw_bs_reps_mle`.
+        Default : "scalar"
+        
+    Returns
+    -------
+    df_aic : pandas DataFrame or BootstrapResult
+        The columns of `bootstrap_aic` for every model and replicate (and
+        the "Concentration (uM)" for a tidy DataFrame), plus "Replicate", 
+        which pairs the rows fitted to the same resample, "Delta AIC", the
+        difference to the best model of that replicate, and "Akaike Weight".
+        If the run is stopped with Ctrl-C, only the replicates completed 
+        so far.
+        
+    """
+    
+    function_names = [mle_fun.__name__ for mle_fun in mle_functions]
+    
+    if len(set(function_names)) < len(function_names):
+        raise ValueError("Every model can only be compared once.")
+    
+    for mle_fun in mle_functions:
+        _check_fitter(mle_fun, fitter)
+        _check_on_failure(mle_fun, on_failure)
+    
+    # One data set, or one per concentration
+    if isinstance(data, pd.DataFrame):
+        unique_conc, conc_data = _split_concentrations(data)
+        labels = [("paired", j) for j in unique_conc]
+    else:
+        unique_conc, conc_data = [None], [np.asarray(data)]
+        labels = [("paired",)]
+    
+    # Log-likelihoods of all the models, replicates and concentrations
+    n_models = len(mle_functions)
+    bs_reps = np.full((len(unique_conc), n_models, size, 3), np.nan)
+    diagnostics = [None] * len(unique_conc)
+    n_done = [0] * len(unique_conc)
+    
+    for i, (conc_labels, conc) in enumerate(zip(labels, conc_data)):
+        
+        run_chunk = _paired_chunk_runner(mle_functions, conc, warm_start, on_failure,
+                                         counter_seed, conc_labels, fitter)
+        fits = _run_chunks(run_chunk, size, batch_size, progress_bar, {})
+        
+        # Splitting the replicates by model
+        n_done[i] = len(fits[0])
+        diagnostics[i] = []
+        for m in range(n_models):
+            model_reps, model_diagnostics = _collect_fits(
+                *[[row[m] for row in column] for column in fits]
+                )
+            bs_reps[i, m, : n_done[i]] = model_reps.reshape(-1, 3)
+            diagnostics[i].append(model_diagnostics)
+        
+        # The run was interrupted
+        if n_done[i] < size:
+            break
+    
+    # AIC, ΔAIC and weights of every model, replicate and concentration at once
+    num_params = np.array([_num_params.get(name, 2) for name in function_names])
+    aic = akaike_information_criterion(bs_reps[..., 2], num_params[:, None])
+    best = np.min(np.where(np.isnan(aic), np.inf, aic), axis = 1, keepdims = True)
+    delta_aic = aic - best
+    weights = akaike_weights(aic, axis = 1)
+    
+    # Filling in the rows, concentration by concentration and model by model
+    if unique_conc[0] is None:
+        categorical_columns = ["MLE Function"]
+    else:
+        categorical_columns = ["Concentration (uM)", "MLE Function"]
+    
+    result = BootstrapResult(
+        n_models * sum(n_done),
+        ["Param1_MLE", "Param2_MLE", "Log-Likelihood", "AIC Value", "Delta AIC", 
+         "Akaike Weight"],
+        categorical_columns = categorical_columns,
+        diagnostics = on_failure != "raise",
+        int_columns = ["Replicate"]
+        )
+    
+    for i, j in enumerate(unique_conc):
         
-        # Adding the conentration value 
-        df_rep["Concentration (uM)"] = [j] * size
-        col_c = df_rep.pop("Concentration (uM)")
-        df_rep.insert(0, col_c.name, col_c)
+        # Concentrations not reached before an interruption
+        if diagnostics[i] is None:
+            break
+        
+        for m, name in enumerate(function_names):
             
-        # Concatnating this to the Large DataFrame
-        df_mle = pd.concat([df_mle, df_rep], ignore_index = True)
+            k = n_done[i]
+            result.append(
+                np.column_stack((bs_reps[i, m, : k], aic[i, m, : k], delta_aic[i, m, : k],
+                                 weights[i, m, : k])),
+                {"Concentration (uM)" : j, "MLE Function" : name},
+                diagnostics[i][m],
+                int_values = np.arange(k)
+                )
+    
+    if as_frame:
+        return result.to_pandas()
+    
+    return result
+
+
+def parse_shard(shard):
+    """
+    Parse a shard specification.
+    
+    Parameters
+    ----------
+    shard : string or tuple
+        "i/k" or (i, k), the i-th of k shards, counting from 1.
+    
+    Returns
+    -------
+    output : tuple
+        (i, k)
+    """
+    
+    if isinstance(shard, str):
+        try:
+            shard = [int(part) for part in shard.split("/")]
+        except ValueError:
+            raise ValueError("shard must look like '3/16', got " + repr(shard))
+    
+    if len(shard) != 2 or not 1 <= shard[0] <= shard[1]:
+        raise ValueError("shard must be i/k with 1 <= i <= k, got " + repr(shard))
+    
+    return int(shard[0]), int(shard[1])
+
+
+def shard_range(size, shard, n_shards):
+    """
+    Replicates start, ..., stop - 1 computed by the shard-th of n_shards 
+    shards of a bootstrap of `size` replicates. The shards are contiguous, 
+    cover every replicate once and differ in length by at most one.
+    """
     
-    return df_mle
+    start = (shard - 1) * size // n_shards
+    stop = shard * size // n_shards
+    
+    return start, stop
+
 
+def bootstrap_shard(mle_function, data, size, shard, path, counter_seed, 
+                    progress_bar = True, batch_size = None, sufficient_stats = False, 
+                    warm_start = None, on_failure = "raise", fitter = "scalar"):
+    """
+    Compute one shard of a `bootstrap_aic` or `compare_concentrations` run 
+    and write it to a self-describing result file.
+    
+    The replicates are drawn from the counter-based streams of 
+    `replicate_rng`, so every shard can run on a different machine and 
+    `merge_shards` gives exactly the DataFrame of the whole run.
+    
+    Parameters
+    -----------
+    mle_function : function
+        Function to use to calculate the MLE of the Data
+        
+    data : array or pandas DataFrame
+        Array of data for a `bootstrap_aic` run, or tidy DataFrame of the 
+        concentration vs time to catastrophe data for a 
+        `compare_concentrations` run, expanded by its "Count" column if it
+        is tie-compressed.
+    
+    size : int
+        The number of bootstrap samples of the whole run.
+    
+    shard : string or tuple
+        "i/k" or (i, k): this is the i-th of k shards, counting from 1.
+    
+    path : string
+        Path of the .npz result file. Replaced if it exists.
+    
+    counter_seed : int
+        Seed of the whole run, see `bootstrap_aic`.
+    
+    progress_bar : Boolean
+        Whether or not to show the progress bar.
+        Default : True
+    
+    batch_size, sufficient_stats, warm_start, on_failure, fitter
+        See `bootstrap_aic`. Must be the same for all the shards.
+        
+    Returns
+    -------
+    start, stop : int
+        Range of the replicates computed by this shard.
+        
+    """
+    
+    shard, n_shards = parse_shard(shard)
+    start, stop = shard_range(size, shard, n_shards)
+    
+    function_name = mle_function.__name__
+    
+    # The data sets making up the run, with their stream labels
+    if isinstance(data, pd.DataFrame):
+        kind = "compare_concentrations"
+        groups = [
+            (function_name + "_" + str(j), j, (function_name, j), conc_data)
+            for j, conc_data in zip(*_split_concentrations(data))
+            ]
+    
+    else:
+        kind = "bootstrap_aic"
+        groups = [(function_name, None, (function_name,), np.asarray(data))]
+    
+    runs = {}
+    for key, conc, labels, group_data in groups:
+        
+        bs_reps, diagnostics = _draw_bs_reps(
+            mle_function, 
+            group_data,
+            size = stop - start, 
+            progress_bar = progress_bar,
+            batch_size = batch_size,
+            sufficient_stats = sufficient_stats,
+            n_jobs = None,
+            seed = None,
+            warm_start = warm_start,
+            on_failure = on_failure,
+            counter_seed = counter_seed,
+            rng_labels = labels,
+            replicate_offset = start,
+            fitter = fitter
+        )
+        
+        # An interrupted shard is not written
+        if len(bs_reps) < stop - start:
+            raise KeyboardInterrupt("Shard " + str(shard) + "/" + str(n_shards) 
+                                    + " interrupted, nothing was written.")
+        
+        # Provenance of the replicates
+        meta = _checkpoint_meta(mle_function, group_data, size, 
+                                100 if batch_size is None else batch_size,
+                                "counts" if sufficient_stats else "resample",
+                                warm_start = warm_start, on_failure = on_failure,
+                                fitter = "batched" if sufficient_stats else fitter)
+        meta.update({
+            "format" : "cat_analysis bootstrap shard",
+            "kind" : kind,
+            "concentration" : conc,
+            "shard" : shard,
+            "n_shards" : n_shards,
+            "start" : start,
+            "stop" : stop,
+            "rng" : "Philox, key from (counter_seed, rng_labels), counter word 3 = replicate",
+            "counter_seed" : int(counter_seed),
+            "rng_labels" : [str(label) for label in labels],
+            "numpy_version" : np.__version__,
+            })
+        
+        runs[key] = {
+            "fits" : [list(bs_reps), diagnostics["status"].tolist(), 
+                      diagnostics["nfev"].tolist(), diagnostics["message"].tolist()],
+            "meta" : meta,
+            }
+    
+    _save_runs(path, runs)
+    
+    return start, stop
 
 
+def merge_shards(paths):
+    """
+    Combine the result files of `bootstrap_shard` into the DataFrame that
+    `bootstrap_aic` or `compare_concentrations` would have returned for the
+    whole run.
+    
+    Parameters
+    ----------
+    paths : list of strings
+        Paths of the result files, in any order.
+        
+    Returns
+    -------
+    df_mle : pandas DataFrame
+        DataFrame of the whole run.
+        
+    """
+    
+    # Settings which have to agree between the shards
+    shared = ["format", "kind", "function", "size", "chunk_size", "sampler", "n_shards",
+              "counter_seed", "warm_start", "on_failure", "fitter"]
+    
+    shards = {}
+    reference = None
+    
+    for path in paths:
+        runs = _load_checkpoint(path)
+        
+        if len(runs) == 0:
+            raise ValueError(path + " does not exist or holds no bootstrap.")
+        
+        meta = next(iter(runs.values()))["meta"]
+        if meta.get("format") != "cat_analysis bootstrap shard":
+            raise ValueError(path + " is not a bootstrap shard.")
+        
+        if reference is None:
+            reference = {"path" : path, "runs" : runs}
+        
+        # Every shard must come from the same run, on the same data
+        elif list(runs) != list(reference["runs"]) or any(
+                run["meta"][k] != reference["runs"][key]["meta"][k]
+                for key, run in runs.items() for k in shared + ["data_sha1"]
+                ):
+            raise ValueError(path + " and " + reference["path"] 
+                             + " are shards of different runs.")
+        
+        if any(len(run["fits"][0]) != run["meta"]["stop"] - run["meta"]["start"]
+               for run in runs.values()):
+            raise ValueError(path + " is incomplete.")
+        
+        if meta["shard"] in shards:
+            raise ValueError("Shard " + str(meta["shard"]) + "/" + str(meta["n_shards"]) 
+                             + " is in both " + shards[meta["shard"]]["path"] 
+                             + " and " + path + ".")
+        
+        shards[meta["shard"]] = {"path" : path, "runs" : runs}
+    
+    if reference is None:
+        raise ValueError("No shard to merge.")
+    
+    meta = next(iter(reference["runs"].values()))["meta"]
+    n_shards = meta["n_shards"]
+    missing = [i for i in range(1, n_shards + 1) if i not in shards]
+    if len(missing) > 0:
+        raise ValueError("Missing shards " + ", ".join(str(i) for i in missing) 
+                         + " of " + str(n_shards) + ".")
+    
+    function_name = meta["function"]
+    on_failure = meta["on_failure"]
+    
+    # Allocating the results of all the data sets at once
+    if meta["kind"] == "compare_concentrations":
+        result = _concentration_result(function_name, meta["size"] * len(reference["runs"]),
+                                       on_failure)
+    
+    for key, run in reference["runs"].items():
+        
+        # Replicates of all the shards, in order
+        fits = [[], [], [], []]
+        for i in range(1, n_shards + 1):
+            for column, shard_column in zip(fits, shards[i]["runs"][key]["fits"]):
+                column.extend(shard_column)
+        
+        bs_reps, diagnostics = _collect_fits(*fits)
+        
+        if meta["kind"] == "bootstrap_aic":
+            result = _aic_result(function_name, bs_reps, diagnostics, on_failure)
+        else:
+            result.append(bs_reps, {"Concentration (uM)" : run["meta"]["concentration"],
+                                    "MLE Function" : function_name}, diagnostics)
+    
+    return result.to_pandas()
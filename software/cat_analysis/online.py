@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Online accumulators to summarize bootstrap replicates batch by batch.
+
+Each accumulator is updated with (batch size, number of estimates) arrays,
+e.g. the batches of `iter_bs_reps_mle`, and keeps constant memory however
+many replicates it has seen. Rows containing NaN (failed fits) are skipped.
+"""
+
+# Importing required packages
+
+import numpy as np
+
+
+def _clean_batch(batch):
+    """
+    Return the batch as a 2D float array without the rows containing NaN,
+    and the number of rows dropped.
+    """
+    
+    batch = np.asarray(batch, dtype = float)
+    
+    # A single estimate per replicate
+    if batch.ndim == 1:
+        batch = batch.reshape(-1, 1)
+    
+    finite = np.all(np.isfinite(batch), axis = 1)
+    
+    return batch[finite], len(batch) - np.sum(finite)
+
+
+class RunningMoments:
+    """
+    Running count, mean and variance of every column.
+    
+    Batches are merged with the pairwise update of Chan et al., which
+    reduces to Welford's algorithm for batches of one row and does not
+    suffer from the cancellation of the sum of squares formula.
+    """
+    
+    def __init__(self):
+        self.n = 0
+        self.n_nan = 0
+        self.mean = None
+        self.m2 = None
+    
+    def update(self, batch):
+        """
+        Add a batch of replicates.
+        
+        Parameters
+        ----------
+        batch : array
+            (batch size, number of estimates) array.
+        
+        Returns
+        -------
+        self : RunningMoments
+        """
+        
+        batch, n_nan = _clean_batch(batch)
+        self.n_nan = self.n_nan + n_nan
+        
+        n_batch = len(batch)
+        if n_batch == 0:
+            return self
+        
+        # Moments of the batch alone
+        mean_batch = np.mean(batch, axis = 0)
+        m2_batch = np.sum((batch - mean_batch)**2, axis = 0)
+        
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n_batch, mean_batch, m2_batch
+            return self
+        
+        # Merging them with the running moments
+        n = self.n + n_batch
+        delta = mean_batch - self.mean
+        self.mean = self.mean + delta * n_batch / n
+        self.m2 = self.m2 + m2_batch + delta**2 * self.n * n_batch / n
+        self.n = n
+        
+        return self
+    
+    def var(self, ddof = 1):
+        """
+        Variance of every column.
+        """
+        
+        if self.n <= ddof:
+            return None if self.m2 is None else np.full_like(self.m2, np.nan)
+        
+        return self.m2 / (self.n - ddof)
+    
+    def std(self, ddof = 1):
+        """
+        Standard deviation of every column.
+        """
+        
+        var = self.var(ddof)
+        
+        return None if var is None else np.sqrt(var)
+
+
+class RunningExtrema:
+    """
+    Running minimum and maximum of every column.
+    """
+    
+    def __init__(self):
+        self.min = None
+        self.max = None
+    
+    def update(self, batch):
+        """
+        Add a batch of replicates.
+        
+        Parameters
+        ----------
+        batch : array
+            (batch size, number of estimates) array.
+        
+        Returns
+        -------
+        self : RunningExtrema
+        """
+        
+        batch, _ = _clean_batch(batch)
+        
+        if len(batch) == 0:
+            return self
+        
+        if self.min is None:
+            self.min = np.min(batch, axis = 0)
+            self.max = np.max(batch, axis = 0)
+        else:
+            self.min = np.minimum(self.min, np.min(batch, axis = 0))
+            self.max = np.maximum(self.max, np.max(batch, axis = 0))
+        
+        return self
+
+
+class StreamingQuantiles:
+    """
+    Streaming quantile sketch of every column (merging t-digest).
+    
+    Every column is summarized by at most `compression` + 1 weighted
+    centroids. The centroids are small in the tails, where the bootstrap
+    confidence intervals are read, and large in the bulk, so extreme
+    percentiles stay accurate. A batch is merged by sorting it together
+    with the current centroids and grouping consecutive values with the
+    same integer value of the arcsine scale function.
+    
+    Parameters
+    ----------
+    compression : int, default 200
+        Maximum number of centroids per column. Larger is more accurate.
+    """
+    
+    def __init__(self, compression = 200):
+        self.compression = compression
+        self.n = 0
+        self.means = None
+        self.weights = None
+        self.extrema = RunningExtrema()
+    
+    def _compress(self, means, weights):
+        """
+        Sort the centroids of a column and merge them into at most
+        `compression` + 1 centroids.
+        """
+        
+        order = np.argsort(means, kind = "stable")
+        means = means[order]
+        weights = weights[order]
+        
+        # Quantile at the center of every centroid
+        cum_weights = np.cumsum(weights)
+        q = (cum_weights - weights / 2) / cum_weights[-1]
+        
+        # Arcsine scale function, one unit per output centroid
+        k = np.floor(self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+        
+        new_weights = np.add.reduceat(weights, starts)
+        new_means = np.add.reduceat(means * weights, starts) / new_weights
+        
+        return new_means, new_weights
+    
+    def update(self, batch):
+        """
+        Add a batch of replicates.
+        
+        Parameters
+        ----------
+        batch : array
+            (batch size, number of estimates) array.
+        
+        Returns
+        -------
+        self : StreamingQuantiles
+        """
+        
+        batch, _ = _clean_batch(batch)
+        
+        if len(batch) == 0:
+            return self
+        
+        self.extrema.update(batch)
+        
+        if self.means is None:
+            self.means = [np.empty(0) for _ in range(batch.shape[1])]
+            self.weights = [np.empty(0) for _ in range(batch.shape[1])]
+        
+        # Merging every column with its centroids
+        for i in range(batch.shape[1]):
+            self.means[i], self.weights[i] = self._compress(
+                np.concatenate((self.means[i], batch[:, i])),
+                np.concatenate((self.weights[i], np.ones(len(batch))))
+                )
+        
+        self.n = self.n + len(batch)
+        
+        return self
+    
+    def percentile(self, q):
+        """
+        Estimate percentiles of every column.
+        
+        Parameters
+        ----------
+        q : float or array_like
+            Percentiles between 0 and 100.
+        
+        Returns
+        -------
+        output : numpy array
+            (len(q), number of estimates) array of the percentiles, or one
+            row for a scalar `q`.
+        """
+        
+        q = np.asarray(q, dtype = float)
+        
+        if self.n == 0:
+            raise ValueError("No replicates were added yet.")
+        
+        # Interpolating between the centroids, anchored at the extrema
+        values = []
+        for i in range(len(self.means)):
+            cum_weights = np.cumsum(self.weights[i])
+            centers = cum_weights - self.weights[i] / 2
+            values.append(np.interp(
+                q / 100 * self.n,
+                np.concatenate(([0], centers, [self.n])),
+                np.concatenate(([self.extrema.min[i]], self.means[i],
+                                [self.extrema.max[i]]))
+                ))
+        
+        return np.array(values).T
+
+
+class BootstrapSummary:
+    """
+    Running mean, standard deviation, extrema and percentiles of bootstrap
+    replicates.
+    
+    Parameters
+    ----------
+    percentiles : array_like, default (2.5, 97.5)
+        Percentiles reported by `summary`.
+    
+    compression : int, default 200
+        Compression of the quantile sketch, see `StreamingQuantiles`.
+    """
+    
+    def __init__(self, percentiles = (2.5, 97.5), compression = 200):
+        self.percentiles = percentiles
+        self.moments = RunningMoments()
+        self.quantiles = StreamingQuantiles(compression)
+    
+    def update(self, batch):
+        """
+        Add a batch of replicates.
+        
+        Parameters
+        ----------
+        batch : array
+            (batch size, number of estimates) array.
+        
+        Returns
+        -------
+        self : BootstrapSummary
+        """
+        
+        batch, n_nan = _clean_batch(batch)
+        
+        self.moments.update(batch)
+        self.moments.n_nan = self.moments.n_nan + n_nan
+        self.quantiles.update(batch)
+        
+        return self
+    
+    def summary(self):
+        """
+        Summary of the replicates seen so far.
+        
+        Returns
+        -------
+        output : dict
+            "n" (number of replicates), "n_nan" (number of failed replicates
+            skipped), "mean", "std", "min", "max" (one entry per estimate),
+            "percentiles" and "values" (one row per percentile).
+        """
+        
+        return {
+            "n" : self.moments.n,
+            "n_nan" : self.moments.n_nan,
+            "mean" : self.moments.mean,
+            "std" : self.moments.std(),
+            "min" : self.quantiles.extrema.min,
+            "max" : self.quantiles.extrema.max,
+            "percentiles" : np.asarray(self.percentiles, dtype = float),
+            "values" : self.quantiles.percentile(self.percentiles),
+            }
+
+
+def summarize_bs_reps(batches, percentiles = (2.5, 97.5), compression = 200):
+    """
+    Summarize a stream of bootstrap replicates in constant memory.
+    
+    Parameters
+    ----------
+    batches : iterable
+        Batches of replicates, e.g. `iter_bs_reps_mle(...)`.
+    
+    percentiles : array_like, default (2.5, 97.5)
+        Percentiles to report.
+    
+    compression : int, default 200
+        Compression of the quantile sketch, see `StreamingQuantiles`.
+    
+    Returns
+    -------
+    output : dict
+        See `BootstrapSummary.summary`.
+    """
+    
+    summary = BootstrapSummary(percentiles, compression)
+    
+    for batch in batches:
+        summary.update(batch)
+    
+    return summary.summary()
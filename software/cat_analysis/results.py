@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar container for the results of the bootstrap functions.
+
+The estimates are held in one preallocated float64 array, and the model,
+the concentration and the optimizer messages as categorical codes, so that
+large runs are built without per-row Python objects. The DataFrame is only
+made on demand with `to_pandas`.
+"""
+
+# Importing required packages
+
+import numpy as np
+import pandas as pd
+
+
+class BootstrapResult:
+    """
+    Bootstrap replicates of one or several models and data sets.
+    
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows to allocate.
+    
+    float_columns : list of strings
+        Names of the estimate columns, e.g. ["Param1_MLE", "Param2_MLE",
+        "Log-Likelihood"].
+    
+    categorical_columns : list of strings, default ["MLE Function"]
+        Names of the label columns, placed before the estimates.
+    
+    diagnostics : bool, default False
+        Whether or not to keep the per-replicate "Status", "nfev" and
+        "Message" columns, placed after the estimates.
+    
+    int_columns : list of strings, default []
+        Names of integer columns, e.g. ["Replicate"], placed between the
+        labels and the estimates.
+    """
+    
+    def __init__(self, n_rows, float_columns, categorical_columns = ("MLE Function",),
+                 diagnostics = False, int_columns = ()):
+        self.float_columns = list(float_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.int_columns = list(int_columns)
+        self.diagnostics = diagnostics
+        
+        self.values = np.empty((n_rows, len(self.float_columns)))
+        self.int_values = np.empty((n_rows, len(self.int_columns)), dtype = np.int64)
+        self.codes = np.empty((n_rows, len(self.categorical_columns)), dtype = np.int32)
+        self.categories = {name : [] for name in self.categorical_columns}
+        
+        if diagnostics:
+            self.status = np.empty(n_rows, dtype = np.int8)
+            self.nfev = np.empty(n_rows, dtype = np.int64)
+            self.message_codes = np.empty(n_rows, dtype = np.int32)
+            self.messages = []
+        
+        self.n_rows = 0
+        self.attrs = {}
+    
+    def __len__(self):
+        return self.n_rows
+    
+    def _code(self, categories, value):
+        """
+        Code of a label, adding it to the categories if it is new.
+        """
+        
+        if value not in categories:
+            categories.append(value)
+        
+        return categories.index(value)
+    
+    def append(self, values, labels, diagnostics = None, int_values = None):
+        """
+        Fill the next rows.
+        
+        Parameters
+        ----------
+        values : array
+            (number of rows, number of estimate columns) array.
+        
+        labels : dict
+            {categorical column : label shared by all the rows}.
+        
+        diagnostics : dict or None, default None
+            Per-replicate "status", "nfev" and "message" arrays, see
+            `draw_bs_reps_mle`. Required if the result keeps diagnostics.
+        
+        int_values : array or None, default None
+            (number of rows, number of integer columns) array. Required if
+            the result has integer columns.
+        
+        Returns
+        -------
+        self : BootstrapResult
+        """
+        
+        values = np.asarray(values, dtype = float).reshape(-1, len(self.float_columns))
+        start = self.n_rows
+        stop = start + len(values)
+        
+        # Growing the arrays if more rows come than were allocated
+        if stop > len(self.values):
+            self._resize(max(stop, 2 * len(self.values)))
+        
+        self.values[start : stop] = values
+        
+        if len(self.int_columns) > 0:
+            self.int_values[start : stop] = np.reshape(int_values, (-1, len(self.int_columns)))
+        
+        for i, name in enumerate(self.categorical_columns):
+            self.codes[start : stop, i] = self._code(self.categories[name], labels[name])
+        
+        if self.diagnostics:
+            self.status[start : stop] = diagnostics["status"]
+            self.nfev[start : stop] = diagnostics["nfev"]
+            
+            # Messages repeat a lot, coding them saves most of their memory
+            messages, inverse = np.unique(np.asarray(diagnostics["message"], dtype = str),
+                                          return_inverse = True)
+            message_codes = np.array([self._code(self.messages, m) for m in messages.tolist()],
+                                     dtype = np.int32)
+            self.message_codes[start : stop] = message_codes[inverse.ravel()]
+        
+        self.n_rows = stop
+        
+        return self
+    
+    def _resize(self, n_rows):
+        """
+        Change the number of allocated rows, keeping the filled ones.
+        """
+        
+        self.values = np.resize(self.values, (n_rows, self.values.shape[1]))
+        self.int_values = np.resize(self.int_values, (n_rows, self.int_values.shape[1]))
+        self.codes = np.resize(self.codes, (n_rows, self.codes.shape[1]))
+        
+        if self.diagnostics:
+            self.status = np.resize(self.status, n_rows)
+            self.nfev = np.resize(self.nfev, n_rows)
+            self.message_codes = np.resize(self.message_codes, n_rows)
+    
+    def trim(self):
+        """
+        Release the allocated rows that were not filled.
+        
+        Returns
+        -------
+        self : BootstrapResult
+        """
+        
+        self._resize(self.n_rows)
+        
+        return self
+    
+    def column(self, name):
+        """
+        Values of one column.
+        
+        Parameters
+        ----------
+        name : string
+            Name of the column.
+        
+        Returns
+        -------
+        output : numpy array
+            Values of the filled rows.
+        """
+        
+        if name in self.float_columns:
+            return self.values[: self.n_rows, self.float_columns.index(name)]
+        
+        if name in self.int_columns:
+            return self.int_values[: self.n_rows, self.int_columns.index(name)]
+        
+        if name in self.categorical_columns:
+            categories = np.array(self.categories[name])
+            return categories[self.codes[: self.n_rows, self.categorical_columns.index(name)]]
+        
+        if self.diagnostics and name == "Status":
+            return self.status[: self.n_rows]
+        
+        if self.diagnostics and name == "nfev":
+            return self.nfev[: self.n_rows]
+        
+        if self.diagnostics and name == "Message":
+            return np.array(self.messages, dtype = object)[self.message_codes[: self.n_rows]]
+        
+        raise KeyError(name)
+    
+    def __getitem__(self, name):
+        return self.column(name)
+    
+    @property
+    def columns(self):
+        """
+        Names of the columns, in the order of `to_pandas`.
+        """
+        
+        columns = self.categorical_columns + self.int_columns + self.float_columns
+        
+        if self.diagnostics:
+            columns = columns + ["Status", "nfev", "Message"]
+        
+        return columns
+    
+    @property
+    def nbytes(self):
+        """
+        Memory used by the filled rows, in bytes.
+        """
+        
+        n_bytes = (self.values[: self.n_rows].nbytes + self.codes[: self.n_rows].nbytes
+                   + self.int_values[: self.n_rows].nbytes)
+        
+        if self.diagnostics:
+            n_bytes = n_bytes + (self.status[: self.n_rows].nbytes
+                                 + self.nfev[: self.n_rows].nbytes
+                                 + self.message_codes[: self.n_rows].nbytes)
+        
+        return n_bytes
+    
+    def to_pandas(self, categorical = False):
+        """
+        DataFrame of the results.
+        
+        Parameters
+        ----------
+        categorical : bool, default False
+            If True, the label and message columns are pandas Categoricals
+            sharing the codes of the result instead of object columns.
+        
+        Returns
+        -------
+        df : pandas DataFrame
+            One row per replicate, with the columns of `columns`.
+        """
+        
+        data = {}
+        
+        for i, name in enumerate(self.categorical_columns):
+            codes = self.codes[: self.n_rows, i]
+            if categorical:
+                data[name] = pd.Categorical.from_codes(codes, self.categories[name])
+            else:
+                data[name] = self.column(name)
+        
+        for i, name in enumerate(self.int_columns):
+            data[name] = self.int_values[: self.n_rows, i]
+        
+        for i, name in enumerate(self.float_columns):
+            data[name] = self.values[: self.n_rows, i]
+        
+        if self.diagnostics:
+            data["Status"] = self.status[: self.n_rows].astype(int)
+            data["nfev"] = self.nfev[: self.n_rows].astype(int)
+            if categorical:
+                data["Message"] = pd.Categorical.from_codes(
+                    self.message_codes[: self.n_rows], self.messages
+                    )
+            else:
+                data["Message"] = self.column("Message")
+        
+        df = pd.DataFrame(data, columns = self.columns)
+        df.attrs.update(self.attrs)
+        
+        return df
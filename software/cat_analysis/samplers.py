@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resampling schemes of the bootstrap: the module random number generator,
+and the draws of bootstrap samples, indices and counts.
+
+The ordinary, balanced and antithetic samplers draw from `rg`, the 
+counter-based one from its own stream per replicate.
+"""
+
+# Importing required packages
+import numpy as np
+
+import hashlib
+
+
+# Specifying random number generator. The other modules look it up here
+# on every call, so reseeding it (`modeling.rg = ...`) reaches all of them
+global rg
+
+rg = np.random.default_rng(3252)
+
+
+def draw_bs_sample(data):
+    """
+    Draw a bootstrap sample from a 1D data set.
+    
+    Parameters
+    ----------
+    data : array
+        1D array containing the data.
+    
+    Returns
+    -------
+    bs : array
+        1D array containing the bootstrapped data.
+    """
+    
+
+    # Drawing a bootstrap replicate
+    bs = rg.choice(data, size = len(data))
+    
+    return bs
+
+
+def draw_bs_indices(n, size):
+    """
+    Draw a matrix of bootstrap resampling indices in a single call.
+    
+    Row k of the output holds exactly the indices `draw_bs_sample` would
+    have picked on its k-th call, so the two approaches consume the random
+    number generator identically.
+    
+    Parameters
+    ----------
+    n : int
+        Number of measurements in the data set.
+    
+    size : int
+        Number of bootstrap replicates (rows) to draw.
+    
+    Returns
+    -------
+    inds : array
+        (size, n) integer array of indices into the data.
+    """
+    
+    # Drawing all the indices at once
+    inds = rg.integers(0, n, size = (size, n))
+    
+    return inds
+
+
+def _label_word(label):
+    """
+    Integer word identifying a label of a random number stream. Numbers 
+    that compare equal (12 and 12.0) give the same word.
+    """
+    
+    if isinstance(label, (int, float, np.integer, np.floating)):
+        label = repr(float(label))
+    
+    digest = hashlib.sha1(str(label).encode()).digest()
+    
+    return int.from_bytes(digest[:8], "little")
+
+
+def replicate_rng(seed, replicate, labels = ()):
+    """
+    Counter-based random number generator of a single bootstrap replicate.
+    
+    The generator is a Philox stream whose key is derived from `seed` and 
+    `labels` (e.g. the model and the concentration) and whose counter 
+    starts at the replicate index. Any replicate can thus be regenerated
+    on its own, in any order and on any worker, independently of the 
+    module random number generator.
+    
+    Parameters
+    ----------
+    seed : int
+        Seed of the bootstrap.
+    
+    replicate : int
+        Index of the replicate.
+    
+    labels : tuple, default ()
+        Strings or numbers naming the bootstrap, giving independent streams
+        for different models or data sets with the same seed.
+    
+    Returns
+    -------
+    rng : numpy.random.Generator
+        Generator of the replicate.
+    """
+    
+    # 128-bit key of the bootstrap
+    entropy = [int(seed)] + [_label_word(label) for label in labels]
+    key = np.random.SeedSequence(entropy).generate_state(2, dtype = np.uint64)
+    
+    # Last counter word is the replicate, the first ones advance while drawing
+    counter = np.array([0, 0, 0, replicate], dtype = np.uint64)
+    
+    return np.random.Generator(np.random.Philox(key = key, counter = counter))
+
+
+def draw_bs_indices_counter(n, seed, replicates, labels = ()):
+    """
+    Draw the bootstrap resampling indices of given replicates with the 
+    counter-based generators of `replicate_rng`.
+    
+    Parameters
+    ----------
+    n : int
+        Number of measurements in the data set.
+    
+    seed : int
+        Seed of the bootstrap.
+    
+    replicates : array_like
+        Indices of the replicates to draw.
+    
+    labels : tuple, default ()
+        Labels of the bootstrap, see `replicate_rng`.
+    
+    Returns
+    -------
+    inds : array
+        (len(replicates), n) integer array of indices into the data.
+    """
+    
+    inds = np.empty((len(replicates), n), dtype = np.int64)
+    
+    for i, replicate in enumerate(replicates):
+        inds[i] = replicate_rng(seed, replicate, labels).integers(0, n, size = n)
+    
+    return inds
+
+
+def _counts_from_indices(inds, n):
+    """
+    Number of times every measurement is drawn in every row of an index matrix.
+    """
+    
+    size = len(inds)
+    
+    # Offsetting every row so that one bincount covers the whole matrix
+    offsets = n * np.arange(size)[:, np.newaxis]
+    counts = np.bincount((inds + offsets).ravel(), minlength = size * n)
+    
+    return counts.reshape(size, n)
+
+
+def draw_bs_indices_balanced(n, size):
+    """
+    Draw the resampling indices of a balanced bootstrap.
+    
+    Every measurement appears exactly `size` times over all the replicates:
+    the indices are a random permutation of `size` copies of 0, ..., n - 1
+    cut into rows. This removes the first-order simulation error of the 
+    bootstrap mean and reduces that of smooth statistics. The whole 
+    (size, n) matrix is drawn at once.
+    
+    Parameters
+    ----------
+    n : int
+        Number of measurements in the data set.
+    
+    size : int
+        Number of bootstrap replicates (rows) to draw.
+    
+    Returns
+    -------
+    inds : array
+        (size, n) integer array of indices into the data.
+    """
+    
+    # Small integers keep the permutation of size * n indices affordable
+    dtype = np.int32 if n < 2**31 else np.int64
+    
+    inds = rg.permutation(np.tile(np.arange(n, dtype = dtype), size))
+    
+    return inds.reshape(size, n)
+
+
+def draw_bs_indices_antithetic(n, size, order):
+    """
+    Draw the resampling indices of an antithetic bootstrap.
+    
+    Replicates come in pairs: where the first one picks the k-th smallest 
+    measurement, the second one picks the k-th largest. The two members of
+    a pair are negatively correlated for statistics increasing in the 
+    data, which reduces the variance of their average. The gamma and story
+    model MLEs are not monotone in the data (alpha depends on the spread),
+    so their Monte Carlo error is not reduced.
+    
+    Parameters
+    ----------
+    n : int
+        Number of measurements in the data set.
+    
+    size : int
+        Number of bootstrap replicates (rows) to draw.
+    
+    order : array
+        Indices sorting the data, `np.argsort(data)`.
+    
+    Returns
+    -------
+    inds : array
+        (size, n) integer array of indices into the data, pairs in 
+        consecutive rows.
+    """
+    
+    # Ranks picked by the first member of every pair
+    ranks = rg.integers(0, n, size = ((size + 1) // 2, n))
+    
+    # Mirrored ranks for the second member
+    ranks = np.stack((ranks, n - 1 - ranks), axis = 1).reshape(-1, n)[:size]
+    
+    return np.asarray(order)[ranks]
+
+
+def draw_bs_counts(n, size):
+    """
+    Draw bootstrap replicates as multinomial counts of every data point.
+    
+    Parameters
+    ----------
+    n : int
+        Number of measurements in the data set.
+    
+    size : int
+        Number of bootstrap replicates to draw.
+    
+    Returns
+    -------
+    counts : array
+        (size, n) integer array. Row k holds how often every data point 
+        appears in the k-th bootstrap sample; every row sums to n.
+    """
+    
+    counts = rg.multinomial(n, np.full(n, 1 / n), size = size)
+    
+    return counts
+
+
+# Resampling schemes of the bootstrap
+_samplers = ("ordinary", "balanced", "antithetic")
+
+
+def _check_sampler(sampler, counter_seed = None, parallel = False, checkpoint = None):
+    """
+    Make sure a resampling scheme exists and can be combined with the 
+    other options.
+    """
+    
+    if sampler not in _samplers:
+        raise ValueError("sampler must be one of " + ", ".join(_samplers) + ".")
+    
+    if sampler != "ordinary" and (counter_seed is not None or parallel 
+                                  or checkpoint is not None):
+        raise ValueError("counter_seed, n_jobs, executor and checkpoint are only "
+                         "available with the ordinary sampler.")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures of the tests: the Gardner et al. measurements, and a clean
+state of the module random number generator for every test.
+"""
+
+# Importing required packages
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cat_analysis import modeling
+
+
+data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data",
+                         "gardner_mt_catastrophe_only_tubulin.csv")
+
+
+@pytest.fixture(scope = "session")
+def df_tidy():
+    """
+    Tidy DataFrame of the times to catastrophe, as made by `data_cleanup`.
+    """
+    
+    df = pd.read_csv(data_path, comment = "#")
+    
+    df_tidy = df.melt(var_name = "Concentration (uM)", 
+                      value_name = "Time to Catastrophe (s)").dropna()
+    df_tidy["Concentration (uM)"] = (
+        df_tidy["Concentration (uM)"].str.split(" ").str[0].astype(int)
+        )
+    
+    return df_tidy.reset_index(drop = True)
+
+
+@pytest.fixture(scope = "session")
+def data_12(df_tidy):
+    """
+    Times to catastrophe at 12 uM tubulin.
+    """
+    
+    return df_tidy.loc[df_tidy["Concentration (uM)"] == 12, 
+                       "Time to Catastrophe (s)"].values
+
+
+@pytest.fixture(scope = "session")
+def df_small(df_tidy):
+    """
+    First 30 measurements of every concentration.
+    """
+    
+    return df_tidy.groupby("Concentration (uM)").head(30)
+
+
+@pytest.fixture(scope = "session")
+def df_small_sorted(df_small):
+    """
+    `df_small` with the times of every concentration sorted, the order of 
+    the expanded `compress_tidy` frame.
+    """
+    
+    return df_small.sort_values(["Concentration (uM)", "Time to Catastrophe (s)"], 
+                                kind = "stable")
+
+
+@pytest.fixture(autouse = True)
+def seeded_rg():
+    """
+    Every test starts from the same state of the module generator, and 
+    gets it back even if it replaced the generator.
+    """
+    
+    rg = modeling.rg
+    state = rg.bit_generator.state
+    rg.bit_generator.state = np.random.default_rng(3252).bit_generator.state
+    
+    yield
+    
+    modeling.rg = rg
+    rg.bit_generator.state = state
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the AIC model comparison of `cat_analysis.modeling`.
+"""
+
+# Importing required packages
+import numpy as np
+import pandas as pd
+import pytest
+
+from cat_analysis import modeling
+from cat_analysis.data_cleanup import compress_tidy
+
+
+def test_akaike_weights_sum_to_one():
+    
+    rng = np.random.default_rng(2)
+    aic = 1000 + 10 * rng.normal(size = (3, 50, 4))
+    
+    weights = modeling.akaike_weights(aic, axis = 1)
+    
+    np.testing.assert_allclose(weights.sum(axis = 1), 1)
+    assert np.all(weights >= 0)
+    
+    # exp(-ΔAIC / 2) up to the normalization
+    np.testing.assert_allclose(weights[0, :, 0] / weights[0, 0, 0], 
+                               np.exp(-(aic[0, :, 0] - aic[0, 0, 0]) / 2))
+
+
+def test_akaike_weights_skip_failed_fits():
+    
+    weights = modeling.akaike_weights([[100.0, np.nan], [102.0, 5.0], [np.nan, 7.0]])
+    
+    np.testing.assert_allclose(weights[:, 0], [1 / (1 + np.exp(-1)), 
+                                               np.exp(-1) / (1 + np.exp(-1)), np.nan])
+    np.testing.assert_allclose(np.nansum(weights, axis = 0), 1)
+
+
+def test_aic_of_arrays():
+    
+    np.testing.assert_allclose(
+        modeling.akaike_information_criterion(np.array([-10.0, -20.0]), [2, 3]), 
+        [24, 46]
+        )
+
+
+def test_paired_models_share_resamples(data_12):
+    
+    df_aic = modeling.paired_bootstrap_aic([modeling.mle_iid_gamma, modeling.mle_model], 
+                                           data_12, size = 6, progress_bar = False,
+                                           batch_size = 4, counter_seed = 8)
+    
+    # Each model on its own, from the same streams
+    for mle_fun in [modeling.mle_iid_gamma, modeling.mle_model]:
+        bs_reps = modeling.draw_bs_reps_mle(mle_fun, data_12, size = 6, batch_size = 4,
+                                            counter_seed = 8, rng_labels = ("paired",))
+        df_model = df_aic.loc[df_aic["MLE Function"] == mle_fun.__name__]
+        
+        np.testing.assert_array_equal(df_model["Replicate"], np.arange(6))
+        np.testing.assert_array_equal(
+            df_model[["Param1_MLE", "Param2_MLE", "Log-Likelihood"]].values, bs_reps
+            )
+    
+    np.testing.assert_allclose(df_aic.groupby("Replicate")["Akaike Weight"].sum(), 1)
+    np.testing.assert_allclose(df_aic.groupby("Replicate")["Delta AIC"].min(), 0)
+
+
+def test_paired_models_only_once(data_12):
+    
+    with pytest.raises(ValueError):
+        modeling.paired_bootstrap_aic([modeling.mle_iid_gamma, modeling.mle_iid_gamma],
+                                      data_12, size = 2, progress_bar = False)
+
+
+def test_paired_compressed_frame(df_small, df_small_sorted):
+    
+    mle_functions = [modeling.mle_iid_gamma, modeling.mle_model]
+    kwargs = dict(size = 4, progress_bar = False, batch_size = 2, counter_seed = 8)
+    
+    compressed = modeling.paired_bootstrap_aic(mle_functions, compress_tidy(df_small), 
+                                               **kwargs)
+    full = modeling.paired_bootstrap_aic(mle_functions, df_small_sorted, **kwargs)
+    
+    pd.testing.assert_frame_equal(compressed, full)
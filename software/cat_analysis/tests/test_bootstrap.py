@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the nonparametric bootstrap functions of `cat_analysis.modeling`.
+"""
+
+# Importing required packages
+import numpy as np
+import pandas as pd
+import pytest
+
+from cat_analysis import modeling
+from cat_analysis.data_cleanup import bin_times, compress_ties, compress_tidy
+
+
+@pytest.mark.parametrize("mle_fun, fitter, warm_start", [
+    (modeling.mle_iid_gamma, "scalar", None),
+    (modeling.mle_iid_gamma, "batched", "mle"),
+    (modeling.mle_model, "scalar", "mle"),
+    (modeling.mle_model, "batched", None),
+    ])
+def test_draw_bs_replicate_matches_run(data_12, mle_fun, fitter, warm_start):
+    
+    bs_reps = modeling.draw_bs_reps_mle(mle_fun, data_12, size = 12, batch_size = 5,
+                                        counter_seed = 7, rng_labels = ("test",),
+                                        warm_start = warm_start, fitter = fitter)
+    
+    for i in (0, 6, 11):
+        bs_sample, output = modeling.draw_bs_replicate(mle_fun, data_12, i, 7, ("test",),
+                                                       warm_start = warm_start,
+                                                       fitter = fitter)
+        
+        assert len(bs_sample) == len(data_12)
+        np.testing.assert_array_equal(output, bs_reps[i])
+
+
+
+def sample_mean(data):
+    """
+    Mean of a sample, in the layout of the MLE functions.
+    """
+    
+    return [np.mean(data), 0.0, 0.0]
+
+
+def test_balanced_uses_every_index_size_times():
+    
+    inds = modeling.draw_bs_indices_balanced(13, 40)
+    
+    assert inds.shape == (40, 13)
+    np.testing.assert_array_equal(np.bincount(inds.ravel(), minlength = 13), 40)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 7])
+def test_balanced_run_uses_every_measurement_size_times(batch_size):
+    
+    # Powers of n + 1, so that the digits of the sum of a resample are its 
+    # counts
+    n = 8
+    data = float(n + 1)**np.arange(n)
+    
+    bs_reps = modeling.draw_bs_reps_mle(sample_mean, data, size = 20, 
+                                        batch_size = batch_size, sampler = "balanced")
+    
+    sums = np.rint(bs_reps[:, 0] * n).astype(np.int64)
+    counts = sums[:, None] // (n + 1)**np.arange(n) % (n + 1)
+    
+    np.testing.assert_array_equal(counts.sum(axis = 0), 20)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 7])
+def test_antithetic_pairs_span_chunks(batch_size):
+    
+    # Sorted data, so that the mirror of value v is n + 1 - v
+    n = 25
+    data = np.arange(1, n + 1, dtype = float)
+    
+    bs_reps = modeling.draw_bs_reps_mle(sample_mean, data, size = 20, 
+                                        batch_size = batch_size, sampler = "antithetic")
+    
+    np.testing.assert_allclose(bs_reps[0::2, 0] + bs_reps[1::2, 0], n + 1)
+
+
+def test_antithetic_odd_size():
+    
+    with pytest.raises(ValueError):
+        modeling.draw_bs_reps_mle(sample_mean, np.arange(10.0), size = 5, 
+                                  sampler = "antithetic")
+
+
+def test_sampler_needs_ordinary_options(data_12):
+    
+    with pytest.raises(ValueError):
+        modeling.draw_bs_reps_mle(sample_mean, data_12, size = 4, counter_seed = 1,
+                                  sampler = "balanced")
+
+
+def flaky_mean(data, method = None):
+    """
+    Mean of the data, failing unless the largest value was resampled or the
+    fallback method is asked for.
+    """
+    
+    if data.max() < 10 and method != "fallback":
+        raise RuntimeError("Convergence failed with message", "No 10 in the sample.")
+    
+    return [np.mean(data)]
+
+
+def failing_samples(size):
+    """
+    Which of the next `size` resamples of 1, ..., 10 make `flaky_mean` fail,
+    leaving the module generator untouched.
+    """
+    
+    state = modeling.rg.bit_generator.state
+    inds = modeling.draw_bs_indices(10, size)
+    modeling.rg.bit_generator.state = state
+    
+    return (inds < 9).all(axis = 1)
+
+
+def test_on_failure_raise():
+    
+    with pytest.raises(RuntimeError, match = "Convergence failed"):
+        modeling.draw_bs_reps_mle(flaky_mean, np.arange(1.0, 11.0), size = 20, 
+                                  batch_size = 20)
+
+
+def test_on_failure_nan():
+    
+    failed = failing_samples(20)
+    assert failed.any() and not failed.all()
+    
+    res, diagnostics = modeling.draw_bs_reps_mle(
+        flaky_mean, np.arange(1.0, 11.0), size = 20, batch_size = 20, on_failure = "nan",
+        return_diagnostics = True
+        )
+    
+    np.testing.assert_array_equal(np.isnan(res[:, 0]), failed)
+    np.testing.assert_array_equal(diagnostics["status"], np.where(failed, 1, 0))
+    assert (diagnostics["message"][failed] == "No 10 in the sample.").all()
+
+
+def test_on_failure_retry(monkeypatch):
+    
+    monkeypatch.setitem(modeling._fallback_methods, "flaky_mean", "fallback")
+    failed = failing_samples(20)
+    
+    res, diagnostics = modeling.draw_bs_reps_mle(
+        flaky_mean, np.arange(1.0, 11.0), size = 20, batch_size = 20, on_failure = "retry",
+        return_diagnostics = True
+        )
+    
+    assert not np.isnan(res).any()
+    np.testing.assert_array_equal(diagnostics["status"], np.where(failed, 2, 0))
+
+
+def test_on_failure_retry_needs_fallback():
+    
+    with pytest.raises(ValueError, match = "fallback"):
+        modeling.draw_bs_reps_mle(flaky_mean, np.arange(1.0, 11.0), size = 2, 
+                                  on_failure = "retry")
+
+
+@pytest.mark.parametrize("counter_seed", [None, 11])
+def test_parallel_matches_serial(data_12, counter_seed):
+    
+    kwargs = dict(size = 12, batch_size = 5, seed = 3, counter_seed = counter_seed)
+    
+    serial = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, n_jobs = 1, 
+                                       **kwargs)
+    parallel = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, n_jobs = 2, 
+                                         **kwargs)
+    
+    np.testing.assert_array_equal(parallel, serial)
+
+
+def test_counter_streams_do_not_depend_on_split(data_12):
+    
+    kwargs = dict(counter_seed = 7, rng_labels = ("split",))
+    
+    whole = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 10, 
+                                      batch_size = 3, **kwargs)
+    
+    # Two runs with other chunks, one of them on a process pool
+    first = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 4, 
+                                      batch_size = 4, **kwargs)
+    second = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 6, 
+                                       batch_size = 2, n_jobs = 2, replicate_offset = 4,
+                                       **kwargs)
+    
+    np.testing.assert_array_equal(np.concatenate((first, second)), whole)
+    
+    inds = modeling.draw_bs_indices_counter(50, 7, range(10), ("split",))
+    np.testing.assert_array_equal(
+        modeling.draw_bs_indices_counter(50, 7, [6, 2], ("split",)), inds[[6, 2]]
+        )
+
+
+def test_counter_streams_of_labels_differ():
+    
+    inds_a = modeling.draw_bs_indices_counter(50, 7, range(3), ("a",))
+    inds_b = modeling.draw_bs_indices_counter(50, 7, range(3), ("b",))
+    
+    assert not np.array_equal(inds_a, inds_b)
+
+
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(), 
+    dict(sampler = "balanced"), 
+    dict(n_jobs = 2),
+    dict(sufficient_stats = True),
+    ])
+def test_reseeding_reaches_every_path(data_12, kwargs):
+    
+    def run(seed):
+        modeling.rg = np.random.default_rng(seed)
+        return modeling.bootstrap_aic(modeling.mle_iid_gamma, data_12, 6, 
+                                      progress_bar = False, batch_size = 4, **kwargs)
+    
+    pd.testing.assert_frame_equal(run(11), run(11))
+    assert not np.array_equal(run(11)["Param1_MLE"], run(12)["Param1_MLE"])
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2, 1.5])
+def test_invalid_n_jobs(data_12, n_jobs):
+    
+    with pytest.raises(ValueError, match = "n_jobs"):
+        modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 2, 
+                                  n_jobs = n_jobs)
+
+
+def test_concentrations_parallel_match_serial(df_small):
+    
+    kwargs = dict(size = 6, progress_bar = False, batch_size = 3, counter_seed = 9)
+    
+    serial = modeling.compare_concentrations(modeling.mle_iid_gamma, df_small, **kwargs)
+    parallel = modeling.compare_concentrations(modeling.mle_iid_gamma, df_small, 
+                                               n_jobs = 2, **kwargs)
+    
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_concentrations_split_once(df_small):
+    
+    unique_conc, conc_data = modeling._split_concentrations(df_small)
+    
+    assert unique_conc == sorted(df_small["Concentration (uM)"].unique().tolist())
+    for j, data in zip(unique_conc, conc_data):
+        np.testing.assert_array_equal(
+            data, 
+            df_small.loc[df_small["Concentration (uM)"] == j, "Time to Catastrophe (s)"]
+            )
+
+
+def test_concentrations_of_compressed_frame(df_small, df_small_sorted):
+    
+    kwargs = dict(size = 6, progress_bar = False, batch_size = 3, counter_seed = 9)
+    
+    compressed = modeling.compare_concentrations(modeling.mle_iid_gamma, 
+                                                 compress_tidy(df_small), **kwargs)
+    full = modeling.compare_concentrations(modeling.mle_iid_gamma, df_small_sorted, 
+                                           **kwargs)
+    
+    pd.testing.assert_frame_equal(compressed, full)
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2, 1.5])
+def test_concentrations_invalid_n_jobs(df_small, n_jobs):
+    
+    with pytest.raises(ValueError, match = "n_jobs"):
+        modeling.compare_concentrations(modeling.mle_iid_gamma, df_small, size = 2,
+                                        progress_bar = False, n_jobs = n_jobs)
+
+
+@pytest.mark.parametrize("mle_fun", [modeling.mle_iid_gamma, modeling.mle_model])
+def test_batch_size_keeps_fitter(data_12, mle_fun):
+    
+    state = modeling.rg.bit_generator.state
+    default = modeling.draw_bs_reps_mle(mle_fun, data_12, size = 4)
+    
+    modeling.rg.bit_generator.state = state
+    chunked = modeling.draw_bs_reps_mle(mle_fun, data_12, size = 4, batch_size = 3)
+    
+    np.testing.assert_array_equal(chunked, default)
+
+
+@pytest.mark.parametrize("mle_fun, fitter, args", [
+    (modeling.mle_iid_gamma, "vectorized", ()),
+    (modeling.model_log_likelihood, "batched", ()),
+    (modeling.mle_iid_gamma, "batched", (1,)),
+    ])
+def test_invalid_fitter(data_12, mle_fun, fitter, args):
+    
+    with pytest.raises(ValueError):
+        modeling.draw_bs_reps_mle(mle_fun, data_12, args = args, size = 2, fitter = fitter)
+
+
+def test_adaptive_stops_at_tol():
+    
+    data = np.random.default_rng(5).exponential(1, 50)
+    
+    bs_reps, report = modeling.draw_bs_reps_mle_adaptive(
+        sample_mean, data, tol = 0.2, percentiles = (2.5, 97.5), batch_size = 100, 
+        n_jobs = 1, seed = 4
+        )
+    
+    assert report["converged"] and report["reason"] == "tol"
+    assert report["size"] == len(bs_reps) < 100000
+    assert len(bs_reps) % 100 == 0
+    assert report["rel_mc_se"][:, 0].max() <= 0.2
+    
+    # Batch i is the fixed-size bootstrap seeded with [seed, i]
+    batches = [
+        modeling.draw_bs_reps_mle(sample_mean, data, size = 100, batch_size = 100, 
+                                  seed = [4, i], n_jobs = 1)
+        for i in range(len(bs_reps) // 100)
+        ]
+    np.testing.assert_array_equal(bs_reps, np.concatenate(batches))
+    
+    # The reported percentiles are those of the replicates
+    np.testing.assert_allclose(report["values"][:, 0], 
+                               np.percentile(bs_reps[:, 0], [2.5, 97.5]))
+
+
+def test_adaptive_stops_at_max_size():
+    
+    data = np.random.default_rng(5).exponential(1, 50)
+    
+    with pytest.warns(UserWarning, match = "max_size"):
+        bs_reps, report = modeling.draw_bs_reps_mle_adaptive(
+            sample_mean, data, tol = 1e-6, max_size = 250, batch_size = 100
+            )
+    
+    assert len(bs_reps) == report["size"] == 250
+    assert not report["converged"] and report["reason"] == "max_size"
+
+
+def test_mc_se_of_uniform_percentiles():
+    
+    # The standard error of the p-th sample quantile of N uniforms is 
+    # sqrt(p (1 - p) / N)
+    n = 40000
+    bs_reps = np.random.default_rng(2).uniform(size = (n, 1))
+    
+    values, mc_se, _ = modeling._percentile_mc_se(bs_reps, [5, 50])
+    
+    np.testing.assert_allclose(values[:, 0], [0.05, 0.5], atol = 0.01)
+    np.testing.assert_allclose(mc_se[:, 0], np.sqrt([0.05 * 0.95 / n, 0.25 / n]), 
+                               rtol = 0.1)
+
+
+def test_profile_fitter_in_bootstrap(data_12):
+    
+    kwargs = dict(size = 4, batch_size = 2, counter_seed = 3, rng_labels = ("profile",))
+    
+    profile = modeling.draw_bs_reps_mle(modeling.mle_model_profile, data_12, 
+                                        on_failure = "retry", **kwargs)
+    trust = modeling.draw_bs_reps_mle(modeling.mle_model, data_12, **kwargs, 
+                                      fitter = "batched")
+    
+    assert np.all(profile[:, 2] >= trust[:, 2] - 1e-9)
+
+
+# The story model maximum is flat near equal rates, where the two fitters
+# only agree to about 1e-7
+@pytest.mark.parametrize("mle_fun, fitter, full_fun, rtol", [
+    (modeling.mle_iid_gamma, "scalar", modeling.mle_iid_gamma, 1e-7),
+    (modeling.mle_iid_gamma, "batched", modeling.mle_iid_gamma, 1e-7),
+    (modeling.mle_model, "batched", modeling.mle_model_profile, 1e-6),
+    ])
+def test_compressed_matches_full(data_12, mle_fun, fitter, full_fun, rtol):
+    
+    values, counts = compress_ties(data_12)
+    state = modeling.rg.bit_generator.state
+    
+    bs_reps = modeling.draw_bs_reps_compressed(mle_fun, values, counts, size = 6, 
+                                               fitter = fitter)
+    
+    # The same count replicates, expanded to whole samples
+    modeling.rg.bit_generator.state = state
+    counts_block = modeling.rg.multinomial(len(data_12), counts / len(data_12), size = 6)
+    
+    for bs_rep, row in zip(bs_reps, counts_block):
+        np.testing.assert_allclose(bs_rep, full_fun(np.repeat(values, row)), rtol = rtol)
+
+
+def test_compressed_expands_for_fitters_without_counts(data_12):
+    
+    values, counts = compress_ties(data_12)
+    state = modeling.rg.bit_generator.state
+    
+    bs_reps = modeling.draw_bs_reps_compressed(sample_mean, values, counts, size = 6)
+    
+    modeling.rg.bit_generator.state = state
+    counts_block = modeling.rg.multinomial(len(data_12), counts / len(data_12), size = 6)
+    
+    np.testing.assert_allclose(bs_reps[:, 0], counts_block @ values / len(data_12))
+
+
+@pytest.mark.parametrize("mle_fun, method, rtol", [
+    (modeling.mle_iid_gamma, "newton", 1e-8),
+    (modeling.mle_model, "profile", 1e-6),
+    (modeling.mle_model, "trust-exact", 1e-6),
+    ])
+def test_compressed_fit_matches_full(data_12, mle_fun, method, rtol):
+    
+    values, counts = compress_ties(data_12)
+    
+    np.testing.assert_allclose(mle_fun(values, method = method, counts = counts), 
+                               mle_fun(data_12, method = method), rtol = rtol)
+
+
+@pytest.mark.parametrize("mle_fun", [modeling.mle_iid_gamma_binned, modeling.mle_model_binned])
+def test_binned_replicates_fit_resampled_counts(data_12, mle_fun):
+    
+    with pytest.warns(UserWarning):
+        edges, counts = bin_times(data_12, 5)
+    state = modeling.rg.bit_generator.state
+    
+    bs_reps = modeling.draw_bs_reps_binned(mle_fun, edges, counts, size = 3)
+    
+    # The same resampled bin counts, fit one by one
+    modeling.rg.bit_generator.state = state
+    counts_block = modeling.rg.multinomial(np.sum(counts), counts / np.sum(counts), 
+                                           size = 3)
+    
+    for bs_rep, row in zip(bs_reps, counts_block):
+        np.testing.assert_array_equal(bs_rep, mle_fun(edges, row))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the checkpoints and shards of the bootstrap functions.
+"""
+
+# Importing required packages
+import numpy as np
+import pandas as pd
+import pytest
+
+from cat_analysis import checkpoint, modeling
+from cat_analysis.data_cleanup import compress_tidy
+
+
+# Number of fits left before `interrupted_mean` stops the run, None to 
+# never stop it
+fits_left = [None]
+
+
+def interrupted_mean(data, shift = 0.0):
+    """
+    Mean of a sample plus `shift`, in the layout of the MLE functions, 
+    interrupting the run with a KeyboardInterrupt when `fits_left` runs out.
+    """
+    
+    if fits_left[0] is not None:
+        if fits_left[0] == 0:
+            raise KeyboardInterrupt
+        fits_left[0] = fits_left[0] - 1
+    
+    return [np.mean(data) + shift, 0.0, 0.0]
+
+
+def test_resume_matches_uninterrupted(tmp_path):
+    
+    path = str(tmp_path / "checkpoint.npz")
+    data = np.arange(1, 31, dtype = float)
+    state = modeling.rg.bit_generator.state
+    
+    bs_reps = modeling.draw_bs_reps_mle(interrupted_mean, data, size = 20, batch_size = 4)
+    
+    # Stopping in the third chunk, after two checkpoints
+    modeling.rg.bit_generator.state = state
+    fits_left[0] = 10
+    try:
+        with pytest.warns(UserWarning, match = "8 of 20"):
+            partial = modeling.draw_bs_reps_mle(interrupted_mean, data, size = 20, 
+                                                batch_size = 4, checkpoint = path, 
+                                                checkpoint_every = 4)
+    finally:
+        fits_left[0] = None
+    
+    np.testing.assert_array_equal(partial, bs_reps[:8])
+    
+    # The generator state is taken from the checkpoint
+    modeling.rg.bit_generator.state = np.random.default_rng(0).bit_generator.state
+    resumed = modeling.draw_bs_reps_mle(interrupted_mean, data, size = 20, batch_size = 4,
+                                        checkpoint = path, checkpoint_every = 4, 
+                                        resume = True)
+    
+    np.testing.assert_array_equal(resumed, bs_reps)
+
+
+def test_resume_other_run(tmp_path):
+    
+    path = str(tmp_path / "checkpoint.npz")
+    data = np.arange(1, 31, dtype = float)
+    
+    modeling.draw_bs_reps_mle(interrupted_mean, data, size = 8, batch_size = 4, 
+                              checkpoint = path)
+    
+    with pytest.raises(ValueError, match = "different bootstrap"):
+        modeling.draw_bs_reps_mle(interrupted_mean, data[1:], size = 8, batch_size = 4,
+                                  checkpoint = path, resume = True)
+
+
+# Runs differing from the checkpointed one in a single option
+@pytest.mark.parametrize("mle_fun, kwargs", [
+    (interrupted_mean, dict(args = (1.0,))),
+    (modeling.mle_iid_gamma, dict(warm_start = "mle")),
+    (modeling.mle_iid_gamma, dict(on_failure = "nan")),
+    (modeling.mle_iid_gamma, dict(fitter = "batched")),
+    ])
+def test_resume_other_options(tmp_path, data_12, mle_fun, kwargs):
+    
+    path = str(tmp_path / "checkpoint.npz")
+    
+    modeling.draw_bs_reps_mle(mle_fun, data_12, size = 4, batch_size = 2, 
+                              checkpoint = path)
+    
+    with pytest.raises(ValueError, match = "different bootstrap"):
+        modeling.draw_bs_reps_mle(mle_fun, data_12, size = 4, batch_size = 2,
+                                  checkpoint = path, resume = True, **kwargs)
+
+
+def test_checkpoint_replaced_atomically(tmp_path, monkeypatch):
+    
+    path = str(tmp_path / "checkpoint.npz")
+    fits = [[np.array([1.0, 2.0, 3.0])], [0], [5], ["Converged."]]
+    
+    checkpoint._save_checkpoint(path, "first", fits, {"size" : 1})
+    saved = checkpoint._load_checkpoint(path)
+    
+    # A write cut off halfway through
+    def failing_savez(f, **arrays):
+        f.write(b"PK\x03\x04")
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(np, "savez", failing_savez)
+    
+    with pytest.raises(OSError):
+        checkpoint._save_checkpoint(path, "second", fits, {"size" : 1})
+    
+    monkeypatch.undo()
+    
+    loaded = checkpoint._load_checkpoint(path)
+    assert list(loaded) == ["first"]
+    np.testing.assert_array_equal(loaded["first"]["fits"][0], saved["first"]["fits"][0])
+    assert loaded["first"]["meta"] == saved["first"]["meta"]
+
+
+
+@pytest.fixture
+def shard_paths(tmp_path, data_12):
+    """
+    The three shards of a counter-based gamma bootstrap of 10 replicates.
+    """
+    
+    paths = [str(tmp_path / ("shard_" + str(i) + ".npz")) for i in (1, 2, 3)]
+    
+    for i, path in enumerate(paths):
+        modeling.bootstrap_shard(modeling.mle_iid_gamma, data_12, 10, (i + 1, 3), path,
+                                 counter_seed = 5, progress_bar = False, batch_size = 3)
+    
+    return paths
+
+
+def test_merged_shards_match_run(data_12, shard_paths):
+    
+    df_mle = modeling.bootstrap_aic(modeling.mle_iid_gamma, data_12, 10, 
+                                    progress_bar = False, batch_size = 3, counter_seed = 5)
+    
+    pd.testing.assert_frame_equal(modeling.merge_shards(shard_paths[::-1]), df_mle)
+
+
+def test_merge_shards_detects_duplicates(shard_paths):
+    
+    with pytest.raises(ValueError, match = "is in both"):
+        modeling.merge_shards(shard_paths + shard_paths[:1])
+
+
+def test_merge_shards_detects_missing(shard_paths):
+    
+    with pytest.raises(ValueError, match = "Missing shards 2 of 3"):
+        modeling.merge_shards([shard_paths[0], shard_paths[2]])
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(counter_seed = 6), 
+    dict(counter_seed = 5, fitter = "batched"),
+    ])
+def test_merge_shards_of_different_runs(tmp_path, data_12, shard_paths, kwargs):
+    
+    other = str(tmp_path / "other.npz")
+    modeling.bootstrap_shard(modeling.mle_iid_gamma, data_12, 10, (2, 3), other,
+                             progress_bar = False, batch_size = 3, **kwargs)
+    
+    with pytest.raises(ValueError, match = "different runs"):
+        modeling.merge_shards([shard_paths[0], other, shard_paths[2]])
+
+
+def test_shard_of_compressed_frame(tmp_path, df_small, df_small_sorted):
+    
+    paths = []
+    for name, df in [("compressed", compress_tidy(df_small)), ("full", df_small_sorted)]:
+        paths.append(str(tmp_path / (name + ".npz")))
+        modeling.bootstrap_shard(modeling.mle_iid_gamma, df, 6, (1, 1), paths[-1],
+                                 counter_seed = 5, progress_bar = False, batch_size = 3)
+    
+    pd.testing.assert_frame_equal(modeling.merge_shards(paths[:1]), 
+                                  modeling.merge_shards(paths[1:]))
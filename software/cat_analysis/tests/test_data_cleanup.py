@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of `cat_analysis.data_cleanup`.
+"""
+
+# Importing required packages
+import warnings
+
+import numpy as np
+import pytest
+
+from cat_analysis.data_cleanup import bin_times, compress_ties
+
+
+def test_bin_times_collapses_gaps():
+    
+    data = np.array([5, 10, 10, 40, 45, 100])
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        edges, counts = bin_times(data, 5)
+    
+    # Every run of empty bins is a single bin without counts
+    np.testing.assert_array_equal(
+        edges, [2.5, 7.5, 12.5, 37.5, 42.5, 47.5, 97.5, 102.5]
+        )
+    np.testing.assert_array_equal(counts, [1, 2, 0, 1, 1, 0, 1])
+
+
+def test_bin_times_compressed():
+    
+    data = np.array([5, 10, 10, 40, 45, 100])
+    values, counts = compress_ties(data)
+    
+    for full, compressed in zip(bin_times(data, 5),
+                                bin_times(values, 5, counts = counts)):
+        np.testing.assert_array_equal(full, compressed)
+
+
+def test_bin_times_warns_off_grid():
+    
+    with pytest.warns(UserWarning, match = "2 of the times"):
+        edges, counts = bin_times([5, 12, 12, 15], 5)
+    
+    np.testing.assert_array_equal(counts, [1, 2, 1])
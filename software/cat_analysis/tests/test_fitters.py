@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the MLE functions of `cat_analysis.modeling`.
+"""
+
+# Importing required packages
+import numpy as np
+import pytest
+
+from cat_analysis import modeling
+from cat_analysis.data_cleanup import bin_times
+
+
+@pytest.fixture(scope = "module")
+def two_rates():
+    """
+    Story model data with clearly different rates, 1 and 20.
+    """
+    
+    rng = np.random.default_rng(1)
+    
+    return rng.exponential(1, 500) + rng.exponential(1 / 20, 500)
+
+
+@pytest.fixture(scope = "module")
+def binned_12(data_12):
+    """
+    The 12 uM times in bins of 5 s, some of them being off that grid.
+    """
+    
+    with pytest.warns(UserWarning, match = "not multiples of 5"):
+        return bin_times(data_12, 5)
+
+
+def central_difference(fun, params, step = 1e-6):
+    """
+    Central differences of `fun` in every parameter, with relative steps.
+    """
+    
+    params = np.asarray(params, dtype = float)
+    
+    return np.array([
+        (np.asarray(fun(params * (1 + step * u))) 
+         - np.asarray(fun(params * (1 - step * u)))) / (2 * step * params @ u)
+        for u in np.eye(len(params))
+        ])
+
+
+@pytest.mark.parametrize("params", [[2.4, 0.0075], [0.8, 0.002]])
+def test_gamma_derivatives(data_12, params):
+    
+    score = modeling.log_likelihood_gamma_score(data_12, params)
+    hessian = modeling.log_likelihood_gamma_hessian(data_12, params)
+    
+    np.testing.assert_allclose(
+        score, 
+        central_difference(lambda p: modeling.log_likelihood_gamma(data_12, p), params), 
+        rtol = 1e-5
+        )
+    np.testing.assert_allclose(
+        hessian, 
+        central_difference(lambda p: modeling.log_likelihood_gamma_score(data_12, p), params),
+        rtol = 1e-5
+        )
+
+
+# Distinct rates in both orders, and nearly equal rates
+@pytest.mark.parametrize("params", [[0.004, 0.009], [0.009, 0.004], 
+                                    [0.005, 0.005 * (1 + 1e-6)]])
+def test_model_derivatives(data_12, params):
+    
+    score = modeling.model_log_likelihood_score(params, data_12)
+    hessian = modeling.model_log_likelihood_hessian(params, data_12)
+    
+    np.testing.assert_allclose(
+        score, 
+        central_difference(lambda p: modeling.model_log_likelihood(p, data_12), params), 
+        rtol = 1e-5, atol = 1e-2
+        )
+    np.testing.assert_allclose(
+        hessian, 
+        central_difference(lambda p: modeling.model_log_likelihood_score(p, data_12), params),
+        rtol = 1e-5, atol = 10
+        )
+
+
+def test_model_equal_rates_limit(data_12):
+    
+    # Gamma(2, beta) density beta^2 t exp(-beta t)
+    beta = 0.005
+    gamma_2 = np.sum(2 * np.log(beta) + np.log(data_12) - beta * data_12)
+    
+    assert modeling.model_log_likelihood([beta, beta], data_12) == pytest.approx(gamma_2)
+    assert modeling.model_log_likelihood([beta, beta * (1 + 1e-9)], data_12) == \
+        pytest.approx(gamma_2)
+
+
+def test_model_long_times():
+    
+    # exp(-beta t) underflows for both rates
+    data = np.array([2e5, 3e5])
+    
+    assert np.isfinite(modeling.model_log_likelihood([0.004, 0.009], data))
+
+
+def test_story_terms():
+    
+    # Both sides of the switch to the series close to 0
+    x = np.array([0, 1e-8, 1e-3, 0.0099, 0.0101, 0.5, 3, 40])
+    log_h, g1, g2 = modeling._story_terms(x)
+    
+    x_safe = np.where(x > 0, x, 1)
+    np.testing.assert_allclose(
+        log_h, np.where(x > 0, np.log(-np.expm1(-x_safe) / x_safe), 0), 
+        rtol = 1e-10, atol = 1e-14
+        )
+    np.testing.assert_allclose(g1, modeling._story_g1(x), rtol = 1e-10)
+    np.testing.assert_allclose(g2, modeling._story_g2(x), rtol = 1e-10)
+
+
+def test_gamma_fitters_agree(data_12):
+    
+    mle = modeling.mle_iid_gamma(data_12)
+    
+    np.testing.assert_allclose(modeling.mle_iid_gamma_batch(data_12[None, :])[0], mle, 
+                               rtol = 1e-8)
+    np.testing.assert_allclose(modeling.mle_iid_gamma(data_12, method = "trust-exact"), 
+                               mle, rtol = 1e-6)
+
+
+@pytest.mark.parametrize("data_name", ["data_12", "two_rates"])
+def test_model_batch_reaches_powell(request, data_name):
+    
+    data = request.getfixturevalue(data_name)
+    
+    mle = modeling.mle_model(data)
+    fit = modeling.mle_model_batch(data[None, :])[0]
+    
+    # Both ordered, the batched fit at least as high as Powell
+    assert mle[0] <= mle[1] and fit[0] <= fit[1]
+    assert fit[2] >= mle[2] - 1e-9
+
+
+@pytest.mark.parametrize("data_name", ["data_12", "two_rates"])
+def test_model_gradient_fit_reaches_powell(request, data_name):
+    
+    data = request.getfixturevalue(data_name)
+    
+    mle = modeling.mle_model(data)
+    fit = modeling.mle_model(data, method = "trust-exact")
+    
+    assert fit[0] <= fit[1]
+    assert fit[2] >= mle[2] - 1e-9
+
+
+@pytest.mark.parametrize("data_name", ["data_12", "two_rates"])
+def test_model_profile_matches_trust_exact(request, data_name):
+    
+    data = request.getfixturevalue(data_name)
+    
+    fit = modeling.mle_model_profile(data)
+    trust = modeling.mle_model(data, method = "trust-exact")
+    
+    assert fit[0] <= fit[1]
+    assert fit[2] >= trust[2] - 1e-9
+    np.testing.assert_allclose(fit, trust, rtol = 1e-5)
+    
+    # Stationary points of the likelihood match the mean
+    np.testing.assert_allclose(1 / fit[0] + 1 / fit[1], np.mean(data), rtol = 1e-12)
+
+
+def test_model_profile_counts(data_12):
+    
+    values, counts = np.unique(data_12, return_counts = True)
+    
+    with_counts = modeling._mle_model_profile(values, counts)
+    full = modeling._mle_model_profile(data_12)
+    
+    # The maximum is flat close to equal rates, so the rates agree less
+    np.testing.assert_allclose(with_counts.x, full.x, rtol = 1e-6)
+    np.testing.assert_allclose(with_counts.fun, full.fun, rtol = 1e-12)
+
+
+def test_model_candidates(data_12):
+    
+    x0 = [0.001, 0.02]
+    starts = modeling._model_candidates(data_12, 12, x0 = x0)
+    
+    assert starts.shape == (12, 2)
+    assert np.all(starts[:, 0] <= starts[:, 1])
+    assert any(np.allclose(start, x0) for start in starts)
+    
+    # Best first, scored with the batched likelihood
+    log_likelihood = modeling._model_derivs(starts, data_12)[0]
+    assert np.all(np.diff(log_likelihood) <= 0)
+    np.testing.assert_allclose(
+        log_likelihood, [modeling.model_log_likelihood(start, data_12) for start in starts]
+        )
+
+
+@pytest.mark.parametrize("data_name", ["data_12", "two_rates"])
+def test_model_multistart_reaches_batch(request, data_name):
+    
+    data = request.getfixturevalue(data_name)
+    
+    fit = modeling.mle_model_multistart(data)
+    batch = modeling.mle_model_batch(data[None, :])[0]
+    
+    assert fit[0] <= fit[1]
+    assert fit[2] >= batch[2] - 1e-9
+
+
+@pytest.mark.parametrize("derivs, params", [
+    (modeling._gamma_binned_derivs, [2.5, 0.008]),
+    (modeling._model_binned_derivs, [0.004, 0.009]),
+    (modeling._model_binned_derivs, [0.009, 0.004]),
+    ])
+def test_binned_gradient(binned_12, derivs, params):
+    
+    edges, counts = binned_12
+    params = np.array(params)
+    
+    log_likelihood, grad = derivs(params, edges, counts)
+    
+    # Central differences in the log parameters
+    step = 1e-5
+    fd = [
+        (derivs(params * np.exp(step * u), edges, counts)[0] 
+         - derivs(params * np.exp(-step * u), edges, counts)[0]) / (2 * step)
+        for u in np.eye(2)
+        ]
+    
+    np.testing.assert_allclose(grad, fd, rtol = 1e-4, atol = 1e-3)
+
+
+@pytest.mark.parametrize("mle_fun", [modeling.mle_iid_gamma_binned, modeling.mle_model_binned])
+def test_binned_gradient_fit_matches_simplex(binned_12, mle_fun):
+    
+    edges, counts = binned_12
+    
+    mle = mle_fun(edges, counts)
+    simplex = mle_fun(edges, counts, method = "Nelder-Mead", x0 = mle[:2])
+    
+    # Nelder-Mead only refines the gradient-based maximum
+    assert simplex[2] - mle[2] < 1e-5
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the jackknife and BCa intervals of `cat_analysis.modeling`.
+"""
+
+# Importing required packages
+import numpy as np
+import pytest
+import scipy.stats
+
+from cat_analysis import modeling
+
+
+@pytest.fixture(scope = "module")
+def small_data(data_12):
+    """
+    Every fifth measurement at 12 uM, with ties, small enough for n refits.
+    """
+    
+    return data_12[::5]
+
+
+def test_jackknife_gamma_matches_refits(small_data):
+    
+    jack = modeling.jackknife_gamma(small_data)
+    refits = np.array([modeling.mle_iid_gamma(np.delete(small_data, i)) 
+                       for i in range(len(small_data))])
+    
+    np.testing.assert_allclose(jack, refits, rtol = 1e-8)
+
+
+def test_jackknife_model_matches_refits(small_data):
+    
+    jack = modeling.jackknife_model(small_data)
+    refits = modeling.mle_model_batch(np.array([
+        np.delete(small_data, i) for i in range(len(small_data))
+        ]))
+    
+    np.testing.assert_allclose(jack, refits, rtol = 1e-6)
+
+
+def test_jackknife_mle_falls_back_to_refits():
+    
+    def mle_mean(data):
+        return np.array([np.mean(data), 0.0])
+    
+    data = np.arange(1.0, 6.0)
+    jack = modeling.jackknife_mle(mle_mean, data)
+    
+    np.testing.assert_allclose(jack[:, 0], (15 - data) / 4)
+
+
+def test_bca_matches_direct_computation(small_data):
+    
+    bs_reps = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, small_data, size = 500, 
+                                        batch_size = 100)
+    percentiles = np.array([2.5, 50, 97.5])
+    conf_int = modeling.bca_conf_int(modeling.mle_iid_gamma, small_data, bs_reps, 
+                                     percentiles)
+    
+    # Textbook BCa with the jackknife from n refits
+    mle = modeling.mle_iid_gamma(small_data)[:-1]
+    jack = np.array([modeling.mle_iid_gamma(np.delete(small_data, i))[:-1] 
+                     for i in range(len(small_data))])
+    z = scipy.stats.norm.ppf(percentiles / 100)
+    
+    for j in range(2):
+        z0 = scipy.stats.norm.ppf(np.mean(bs_reps[:, j] < mle[j]))
+        u = jack[:, j].mean() - jack[:, j]
+        a = np.sum(u**3) / (6 * np.sum(u**2)**1.5)
+        adjusted = scipy.stats.norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+        
+        np.testing.assert_allclose(conf_int[:, j], 
+                                   np.percentile(bs_reps[:, j], 100 * adjusted), 
+                                   rtol = 1e-10)
+
+
+def test_bca_without_bias_or_skew_is_percentile():
+    
+    # Replicates symmetric about the estimate and a jackknife without skew
+    def mle_mean(data):
+        return np.array([np.mean(data), 0.0])
+    
+    data = np.arange(1.0, 6.0)
+    bs_reps = np.column_stack((3 + np.linspace(-1, 1, 1001), np.zeros(1001)))
+    
+    conf_int = modeling.bca_conf_int(mle_mean, data, bs_reps)
+    
+    np.testing.assert_allclose(conf_int[:, 0], 
+                               np.percentile(bs_reps[:, 0], [2.5, 97.5]))
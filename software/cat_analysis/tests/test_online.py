@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the online accumulators of `cat_analysis.online` and of the 
+streaming bootstrap feeding them.
+"""
+
+# Importing required packages
+import numpy as np
+import pytest
+
+from cat_analysis import modeling, online
+
+
+@pytest.fixture(scope = "module")
+def replicates():
+    """
+    Normal replicates of two estimates, far from 0 so that naive sums of 
+    squares would cancel.
+    """
+    
+    rng = np.random.default_rng(8)
+    
+    return rng.normal(loc = [1e8, 0.0], scale = [1.0, 2.0], size = (100000, 2))
+
+
+def test_running_moments(replicates):
+    
+    moments = online.RunningMoments()
+    
+    # Batches of uneven sizes, down to single rows
+    for batch in np.split(replicates, [1, 2, 10, 777, 5000, 60000]):
+        moments.update(batch)
+    
+    assert moments.n == len(replicates)
+    np.testing.assert_allclose(moments.mean, replicates.mean(axis = 0), rtol = 1e-12)
+    np.testing.assert_allclose(moments.var(), replicates.var(axis = 0, ddof = 1), 
+                               rtol = 1e-9)
+
+
+def test_running_moments_skip_nan(replicates):
+    
+    batch = replicates[:10].copy()
+    batch[3, 1] = np.nan
+    
+    moments = online.RunningMoments().update(batch)
+    
+    assert moments.n == 9
+    np.testing.assert_allclose(moments.mean, np.delete(batch, 3, axis = 0).mean(axis = 0))
+
+
+def test_streaming_quantiles(replicates):
+    
+    percentiles = [0.5, 2.5, 50, 97.5, 99.5]
+    
+    quantiles = online.StreamingQuantiles()
+    for batch in np.split(replicates, 100):
+        quantiles.update(batch)
+    
+    values = quantiles.percentile(percentiles)
+    
+    # Within a tiny fraction of the standard deviations of np.percentile, 
+    # and at the right ranks, in the tails too
+    np.testing.assert_allclose(values, np.percentile(replicates, percentiles, axis = 0), 
+                               rtol = 0, atol = 0.02)
+    ranks = np.mean(replicates[:, None, :] <= values[None, :, :], axis = 0)
+    np.testing.assert_allclose(ranks, np.tile(np.array(percentiles)[:, None] / 100, 2), 
+                               atol = 3e-4)
+    
+    np.testing.assert_array_equal(quantiles.extrema.min, replicates.min(axis = 0))
+    np.testing.assert_array_equal(quantiles.extrema.max, replicates.max(axis = 0))
+
+
+def test_iter_bs_reps_matches_draw(data_12):
+    
+    state = modeling.rg.bit_generator.state
+    bs_reps = modeling.draw_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 25, 
+                                        batch_size = 10)
+    
+    modeling.rg.bit_generator.state = state
+    batches = list(modeling.iter_bs_reps_mle(modeling.mle_iid_gamma, data_12, size = 25,
+                                             batch_size = 10))
+    
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    np.testing.assert_array_equal(np.concatenate(batches), bs_reps)
+    
+    summary = online.summarize_bs_reps(batches)
+    np.testing.assert_allclose(summary["mean"], bs_reps.mean(axis = 0), rtol = 1e-12)
+    np.testing.assert_allclose(summary["std"], bs_reps.std(axis = 0, ddof = 1), 
+                               rtol = 1e-9)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the parametric bootstrap functions of `cat_analysis.modeling`.
+"""
+
+# Importing required packages
+import numpy as np
+import pytest
+
+from cat_analysis import modeling
+
+
+@pytest.mark.parametrize("mle_fun, params, mean, var", [
+    (modeling.mle_iid_gamma, [2.4, 0.0075], 2.4 / 0.0075, 2.4 / 0.0075**2),
+    (modeling.mle_model, [0.004, 0.009], 1 / 0.004 + 1 / 0.009, 
+     1 / 0.004**2 + 1 / 0.009**2),
+    ])
+def test_samples_have_model_moments(mle_fun, params, mean, var):
+    
+    samples = modeling.draw_parametric_samples(mle_fun, params, 1000, 200)
+    
+    assert samples.shape == (200, 1000)
+    np.testing.assert_allclose(samples.mean(), mean, rtol = 0.01)
+    np.testing.assert_allclose(samples.var(), var, rtol = 0.03)
+
+
+def test_no_sampler_for_other_models(data_12):
+    
+    def mle_mean(data):
+        return np.array([np.mean(data), 0.0])
+    
+    with pytest.raises(ValueError):
+        modeling.draw_parametric_bs_reps_mle(mle_mean, data_12)
+
+
+def test_replicates_do_not_depend_on_batch_size(data_12):
+    
+    # The gamma blocks are drawn row after row from the module generator
+    state = modeling.rg.bit_generator.state
+    one_batch = modeling.draw_parametric_bs_reps_mle(modeling.mle_iid_gamma, data_12, 
+                                                     size = 10, batch_size = 10)
+    modeling.rg.bit_generator.state = state
+    two_batches = modeling.draw_parametric_bs_reps_mle(modeling.mle_iid_gamma, data_12, 
+                                                       size = 10, batch_size = 5)
+    
+    np.testing.assert_array_equal(one_batch, two_batches)
+
+
+def fit_both(mle_fun, data):
+    """
+    Parametric replicates of the same simulated data sets with both fitters.
+    """
+    
+    state = modeling.rg.bit_generator.state
+    scalar = modeling.draw_parametric_bs_reps_mle(mle_fun, data, size = 20, 
+                                                  batch_size = 10)
+    modeling.rg.bit_generator.state = state
+    batched = modeling.draw_parametric_bs_reps_mle(mle_fun, data, size = 20, 
+                                                   batch_size = 10, fitter = "batched")
+    
+    return scalar, batched
+
+
+def test_gamma_fitters_agree(data_12):
+    
+    scalar, batched = fit_both(modeling.mle_iid_gamma, data_12)
+    
+    np.testing.assert_allclose(batched, scalar, rtol = 1e-6)
+
+
+def test_model_batched_fitter_reaches_scalar(data_12):
+    
+    # The simulated data sets are close to the equal rates limit, where the 
+    # maximum is flat in the rates, so only the log likelihoods are compared
+    scalar, batched = fit_both(modeling.mle_model, data_12)
+    
+    assert np.all(batched[:, 2] >= scalar[:, 2] - 1e-6)
+
+
+def test_bootstrap_aic_parametric(data_12):
+    
+    df_mle = modeling.bootstrap_aic(modeling.mle_iid_gamma, data_12, size = 8, 
+                                    parametric = True, fitter = "batched")
+    
+    assert len(df_mle) == 8
+    assert np.isfinite(df_mle.select_dtypes("number").values).all()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the columnar `BootstrapResult` container.
+"""
+
+# Importing required packages
+import numpy as np
+import pandas as pd
+import pytest
+
+from cat_analysis import modeling
+from cat_analysis.results import BootstrapResult
+
+
+def old_frame(function_name, conc, bs_reps, diagnostics = None):
+    """
+    DataFrame of one concentration as it was built row by row before the 
+    container, with the generic parameter names.
+    """
+    
+    df_rep = pd.DataFrame(bs_reps, columns = ["Param1_MLE", "Param2_MLE", 
+                                              "Log-Likelihood"])
+    df_rep.insert(0, "MLE Function", [function_name] * len(df_rep))
+    df_rep.insert(0, "Concentration (uM)", [conc] * len(df_rep))
+    
+    if diagnostics is not None:
+        df_rep["Status"] = diagnostics["status"]
+        df_rep["nfev"] = diagnostics["nfev"]
+        df_rep["Message"] = diagnostics["message"]
+    
+    return df_rep
+
+
+@pytest.fixture
+def filled_result():
+    """
+    Result of two concentrations with diagnostics, allocated too small so 
+    that it has to grow.
+    """
+    
+    rng = np.random.default_rng(0)
+    result = BootstrapResult(3, ["Param1_MLE", "Param2_MLE", "Log-Likelihood"],
+                             ["Concentration (uM)", "MLE Function"], diagnostics = True)
+    
+    frames = []
+    for conc, n in [(7, 4), (12, 5)]:
+        bs_reps = rng.normal(size = (n, 3))
+        diagnostics = {
+            "status" : np.arange(n) % 3,
+            "nfev" : np.arange(n) + 10,
+            "message" : np.array(["ok", "failed"] * n, dtype = object)[:n],
+            }
+        result.append(bs_reps, {"Concentration (uM)" : conc, "MLE Function" : "mle_model"},
+                      diagnostics)
+        frames.append(old_frame("mle_model", conc, bs_reps, diagnostics))
+    
+    return result, pd.concat(frames, ignore_index = True)
+
+
+def test_to_pandas_matches_concatenated_frames(filled_result):
+    
+    result, df_expected = filled_result
+    
+    assert len(result) == 9
+    pd.testing.assert_frame_equal(result.to_pandas(), df_expected)
+
+
+def test_categorical_frame_has_same_values(filled_result):
+    
+    result, df_expected = filled_result
+    df = result.to_pandas(categorical = True)
+    
+    assert isinstance(df["MLE Function"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Message"].dtype, pd.CategoricalDtype)
+    for column in ["Concentration (uM)", "MLE Function", "Message"]:
+        df[column] = df[column].astype(df_expected[column].dtype)
+    pd.testing.assert_frame_equal(df, df_expected)
+
+
+def test_trim_keeps_filled_rows(filled_result):
+    
+    result, df_expected = filled_result
+    result.trim()
+    
+    assert len(result.values) == len(result)
+    np.testing.assert_array_equal(result["Log-Likelihood"], df_expected["Log-Likelihood"])
+    np.testing.assert_array_equal(result["Message"], df_expected["Message"])
+    
+    with pytest.raises(KeyError):
+        result["AIC Value"]
+
+
+def test_compare_concentrations_result_matches_frame(df_tidy):
+    
+    df_small = df_tidy.groupby("Concentration (uM)").head(30)
+    kwargs = dict(size = 6, progress_bar = False, batch_size = 3, counter_seed = 5)
+    
+    df_mle = modeling.compare_concentrations(modeling.mle_iid_gamma, df_small, **kwargs)
+    result = modeling.compare_concentrations(modeling.mle_iid_gamma, df_small, 
+                                             as_frame = False, **kwargs)
+    
+    assert isinstance(result, BootstrapResult)
+    assert len(df_mle) == 6 * df_small["Concentration (uM)"].nunique()
+    pd.testing.assert_frame_equal(result.to_pandas(), df_mle)
@@ -12,7 +12,6 @@ from cat_analysis.modeling import *
 from cat_analysis.data_cleanup import *
 
 from bokeh.io import export_png
-import pandas as pd
 
 
 
@@ -22,24 +21,14 @@ df_tidy = tidy_reader("data/tidy_mt_catastrophe.xlsx")
 # Extracting the data for 12uM conc
 data_12 = (df_tidy.loc[df_tidy["Concentration (uM)"] == 12, "Time to Catastrophe (s)"]).values
 
-# AIC with bootstrap samples
-# Gamma
-df_gamma = bootstrap_aic(
-    mle_iid_gamma,
+# AIC with bootstrap samples, both models fit to the same resamples
+df_aic = paired_bootstrap_aic(
+    [mle_iid_gamma, mle_model],
     data_12,
-    size = 10000
+    size = 10000,
+    batch_size = 1000
     )
 
-# Story
-df_model = bootstrap_aic(
-    mle_model,
-    data_12,
-    size = 10000
-    )
-
-# Concatnating
-df_aic = pd.concat([df_gamma, df_model], ignore_index = True)
-
 # Plotting the figure 
 aic_ecdf = aic_ecdf_plotter(df_aic, "AIC Values for Gamma and Story Distribution")
 